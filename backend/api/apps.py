@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def restore_search_triggers(sender, using, **kwargs):
+    from .search import ensure_sqlite_triggers
+    ensure_sqlite_triggers(connections[using])
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Keep the dashboard counters in step with model writes
+        from . import signals  # noqa: F401
+        post_migrate.connect(restore_search_triggers, sender=self)
@@ -14,7 +14,7 @@ from django.core.mail import send_mail
 from django.conf import settings
 import re
 from .serializers import UserSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import jwt_for_user
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -137,7 +137,8 @@ def logout(request):
     Logout user by deleting their token
     """
     try:
-        token = Token.objects.get(user=request.user)
+        # By id, since JWT requests carry a ClaimsUser rather than a User
+        token = Token.objects.get(user_id=request.user.pk)
         token.delete()
         return Response({
             'message': 'Successfully logged out'
@@ -249,15 +250,20 @@ def user_profile(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def login_view(request):
+    """
+    Authenticate user and return a JWT access/refresh pair whose claims
+    (id, username, email, is_staff) let requests skip the user lookup
+    """
     username = request.data.get('username')
     password = request.data.get('password')
     
     user = authenticate(username=username, password=password)
     
     if user is not None:
-        refresh = RefreshToken.for_user(user)
+        refresh = jwt_for_user(user)
         return Response({
             'token': str(refresh.access_token),
+            'refresh': str(refresh),
             'user': UserSerializer(user).data
         })
     return Response(
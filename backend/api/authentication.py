@@ -0,0 +1,228 @@
+import copy
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import cached_property
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .cache import cache_is_shared
+from .metrics import registry
+
+TOKEN_VERSION_KEY_PREFIX = 'auth-token-version'
+
+
+def _token_version_key(key):
+    # Hashed so raw tokens never end up in a shared cache backend
+    return f'{TOKEN_VERSION_KEY_PREFIX}:{hashlib.sha256(key.encode("utf-8")).hexdigest()}'
+
+
+def get_token_version(key):
+    version_key = _token_version_key(key)
+    version = cache.get(version_key)
+    if version is None:
+        # add() keeps whichever token another process set first
+        cache.add(version_key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(version_key)
+    return version
+
+
+def _set_new_token_version(key):
+    cache.set(_token_version_key(key), uuid.uuid4().hex, timeout=None)
+
+
+def invalidate_token(key):
+    """
+    Make every process drop its cached user for token `key`.
+
+    Like bump_model_version(), the version moves now and again on commit, so
+    a request that read the old row in between cannot keep it cached.
+    """
+    _set_new_token_version(key)
+    transaction.on_commit(lambda: _set_new_token_version(key))
+
+
+class TokenCache:
+    """
+    Thread-safe, process-local LRU of token key -> (user, token, version)
+    with a time-to-live. Size and lifetime come from TOKEN_CACHE_SIZE and
+    TOKEN_CACHE_TIMEOUT.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        max_size = getattr(settings, 'TOKEN_CACHE_SIZE', 10000)
+        timeout = getattr(settings, 'TOKEN_CACHE_TIMEOUT', 300)
+        if max_size <= 0 or timeout <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
+def record_auth_cache(hit):
+    if getattr(settings, 'METRICS_ENABLED', True):
+        registry.inc('api_auth_cache_total', backend='CachedTokenAuthentication',
+                     result='hit' if hit else 'miss')
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that remembers token -> user in memory.
+
+    A hit costs one lookup of the token's version in the Django cache and
+    no database queries. Logging out (deleting the token) and saving the
+    user, which covers deactivation, move the version and so invalidate
+    the entry in every process sharing the cache. Without a shared cache
+    (see cache_is_shared()) a revocation would only reach the process that
+    handled it, so every request reads the token from the database.
+    """
+
+    def authenticate_credentials(self, key):
+        if not cache_is_shared():
+            return super().authenticate_credentials(key)
+
+        # Read the version before the database so a change committed while
+        # we load the user leaves the entry already stale
+        version = get_token_version(key)
+        cached = token_cache.get(key)
+        if cached is not None:
+            user, token, cached_version = cached
+            if cached_version == version:
+                record_auth_cache(hit=True)
+                # Each request gets its own copy to modify
+                return copy.copy(user), token
+            token_cache.delete(key)
+
+        record_auth_cache(hit=False)
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, (user, token, version))
+        return copy.copy(user), token
+
+
+def _set_user_claims(token, user):
+    token['username'] = user.username
+    token['email'] = user.email
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+
+
+def jwt_for_user(user):
+    """
+    Refresh token for `user` whose access tokens carry the claims
+    ClaimsUser reads, so authenticating them needs no database.
+    """
+    refresh = RefreshToken.for_user(user)
+    _set_user_claims(refresh, user)
+    return refresh
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh (SIMPLE_JWT's TOKEN_REFRESH_SERIALIZER) that reloads the
+    user and writes the claims from the current row, so a renewed access
+    token never carries a staff flag or email the user has since lost.
+    Inactive and deleted users cannot renew at all.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(pk=refresh.payload.get(jwt_settings.USER_ID_CLAIM)).first()
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        _set_user_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION and hasattr(refresh, 'blacklist'):
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user built from the claims of a verified JWT (see jwt_for_user)
+    by JWTStatelessUserAuthentication, without touching the database.
+
+    id, username, email and the staff flags come from the token. Any other
+    User attribute (names, date_joined, ...) loads the row once, the first
+    time it is read. Claims are fixed when the token is issued; refreshing
+    rebuilds them from the user row (ClaimsTokenRefreshSerializer), so
+    changes to the user reach stateless requests within
+    ACCESS_TOKEN_LIFETIME.
+    """
+
+    @cached_property
+    def id(self):
+        # The claim holds the id as a string
+        return User._meta.pk.to_python(self.token[jwt_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def _user(self):
+        return User.objects.get(pk=self.id)
+
+    def __getattr__(self, attr):
+        # Only reached for names neither this class nor TokenUser defines
+        if attr.startswith('_') or attr == 'token':
+            raise AttributeError(attr)
+        if attr in self.token.payload:
+            return self.token[attr]
+        return getattr(self._user, attr)
+
+    def __eq__(self, other):
+        if isinstance(other, User):
+            return self.pk == other.pk
+        return super().__eq__(other)
+
+    __hash__ = TokenUser.__hash__
@@ -0,0 +1,30 @@
+from django.db.models import OuterRef, Subquery
+
+from .models import Item, StaffItemAssignment
+
+
+def newest_open_assignment():
+    """
+    Subquery for the id of the newest open assignment of the outer item,
+    answered from the partial index on open assignments.
+    """
+    return Subquery(
+        StaffItemAssignment.objects.filter(item=OuterRef('pk'), return_date__isnull=True)
+        .order_by('-id').values('id')[:1]
+    )
+
+
+def sync_current_assignments(item_ids=None):
+    """
+    Point each item's current_assignment at its newest open assignment, or
+    clear it. Covers every item when `item_ids` is None. Runs in the
+    caller's transaction.
+    """
+    items = Item.objects.all()
+    if item_ids is not None:
+        item_ids = {pk for pk in item_ids if pk is not None}
+        if not item_ids:
+            return 0
+        items = items.filter(pk__in=item_ids)
+    return items.update(current_assignment=newest_open_assignment())
+
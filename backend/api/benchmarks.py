@@ -0,0 +1,183 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from .loadtest import percentile
+from .models import Item, Category
+
+# Name and URL of each endpoint the suite measures. URLs are formatted with
+# ids from the dataset, so they work at any size.
+ENDPOINTS = [
+    ('items', '/api/items/'),
+    ('items_cursor', '/api/items/?pagination=cursor&page_size=100'),
+    ('items_filtered', '/api/items/?category={category}&status=available'),
+    ('items_search', '/api/items/?search=laptop'),
+    ('items_sparse', '/api/items/?pagination=cursor&page_size=100&fields=id,name,tag_number'),
+    ('item_detail', '/api/items/{item}/'),
+    ('assignments', '/api/assignments/'),
+    ('assignments_cursor', '/api/assignments/?pagination=cursor&page_size=100'),
+    ('staff', '/api/staff/'),
+    ('dashboard', '/api/dashboard/stats'),
+]
+
+# Absolute slack on top of the relative tolerance, so a fast endpoint
+# jittering by a millisecond does not count as a regression
+NOISE_FLOOR = {'median_ms': 2.0, 'p95_ms': 5.0, 'peak_kb': 64.0}
+
+# The suite's own cache, so clearing it between requests cannot touch a
+# shared or file-based cache the settings point at. It lives in this one
+# process, so it is as good as shared for the response cache.
+SUITE_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-suite',
+    }
+}
+
+
+def run_suite(runs=20, warmup=3, endpoints=ENDPOINTS, log=None):
+    """
+    Request every endpoint `runs` times as an admin and return
+    {name: {median_ms, p95_ms, queries, peak_kb, status}}.
+
+    Requests go through a private cache (SUITE_CACHES), cleared before
+    each one so the database work is measured, not a cache hit. Peak
+    memory comes from one extra request under tracemalloc, which would
+    otherwise slow the timed runs.
+    """
+    log = log or (lambda message: None)
+    user, _ = User.objects.get_or_create(
+        username='benchmark-suite', defaults={'is_staff': True, 'email': 'benchmark@example.com'}
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+    ids = {
+        'item': Item.objects.order_by('pk').values_list('pk', flat=True).first() or 0,
+        'category': Category.objects.order_by('pk').values_list('pk', flat=True).first() or 0,
+    }
+
+    results = {}
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                           CACHES=SUITE_CACHES, CACHE_SHARED=True):
+        for name, template in endpoints:
+            results[name] = _measure(client, template.format(**ids), runs, warmup)
+            log(format_result(name, results[name]))
+    return results
+
+
+def _measure(client, url, runs, warmup):
+    """
+    Time `runs` cold-cache GETs of `url` after `warmup` untimed ones.
+    """
+    for _ in range(warmup):
+        cache.clear()
+        client.get(url)
+
+    timings = []
+    query_counts = []
+    for _ in range(runs):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        # Captured queries are read from the query log lazily, and every
+        # request resets the log, so count them now
+        query_counts.append(len(queries))
+
+    cache.clear()
+    tracemalloc.start()
+    client.get(url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'status': response.status_code,
+        'median_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'queries': max(query_counts),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def format_result(name, result):
+    return (
+        f"{name}: status={result['status']} median={result['median_ms']}ms "
+        f"p95={result['p95_ms']}ms queries={result['queries']} peak={result['peak_kb']}KB"
+    )
+
+
+def calibrate(rounds=20):
+    """
+    Milliseconds this machine takes for a fixed mix of Python work and
+    trivial queries, the fastest of `rounds` after one warm-up. Stored with
+    the baseline, so compare_results() can scale latency limits to a
+    machine faster or slower than the one that recorded it.
+    """
+    payload = {'rows': [{'id': i, 'name': f'Item {i}', 'price': '9.99'} for i in range(200)]}
+    timings = []
+    for _ in range(rounds + 1):
+        started = time.perf_counter()
+        for _ in range(50):
+            json.loads(json.dumps(payload))
+        with connection.cursor() as cursor:
+            for _ in range(200):
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(min(timings[1:]), 3)
+
+
+def compare_results(results, baseline, tolerance=0.5, speed=1.0):
+    """
+    List the regressions of `results` against `baseline`, both keyed by
+    dataset size and then endpoint. Latency and memory may grow by
+    `tolerance` (a fraction) plus NOISE_FLOOR before they count; any extra
+    query counts, as does a status that changed. Baseline latencies are
+    first multiplied by `speed`, this machine's calibrate() time over the
+    baseline's. Entries missing from either side are skipped, so new
+    endpoints and sizes can be added before re-baselining.
+    """
+    regressions = []
+    for size, endpoints in results.items():
+        for name, result in endpoints.items():
+            expected = baseline.get(size, {}).get(name)
+            if expected is None:
+                continue
+            if result['status'] != expected['status']:
+                regressions.append(f"{size}/{name}: status {expected['status']} -> {result['status']}")
+            if result['queries'] > expected['queries']:
+                regressions.append(f"{size}/{name}: queries {expected['queries']} -> {result['queries']}")
+            for metric in ('median_ms', 'p95_ms', 'peak_kb'):
+                scale = 1.0 if metric == 'peak_kb' else speed
+                limit = expected[metric] * scale * (1 + tolerance) + NOISE_FLOOR[metric]
+                if result[metric] > limit:
+                    regressions.append(
+                        f"{size}/{name}: {metric} {expected[metric]} -> {result[metric]} "
+                        f"(limit {limit:.1f})"
+                    )
+    return regressions
+
+
+def load_baseline(path):
+    """
+    (results, meta) of a baseline file written by save_baseline().
+    """
+    with open(path, encoding='utf-8') as handle:
+        baseline = json.load(handle)
+    return baseline['results'], baseline.get('meta', {})
+
+
+def save_baseline(path, results, meta):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({'meta': meta, 'results': results}, handle, indent=2, sort_keys=True)
+        handle.write('\n')
@@ -0,0 +1,450 @@
+from datetime import date
+
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import Item, Category, Supplier, Staff, StaffItemAssignment
+from .availability import sync_current_assignments
+from .counters import (
+    apply_deltas, item_count_deltas, open_assignment_count_deltas,
+    open_assignment_deltas, uncategorize,
+)
+from .cache import bump_model_version
+
+
+class BulkRequestError(Exception):
+    """
+    Raised when a bulk request body cannot be processed at all.
+    """
+
+
+def _parse_id(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        pk = int(value)
+    except (TypeError, ValueError):
+        return None
+    return pk if pk > 0 else None
+
+
+def _entry_list(data, name, max_entries):
+    entries = data.get(name) if hasattr(data, 'get') else None
+    if not isinstance(entries, list) or not entries:
+        raise BulkRequestError(f'"{name}" must be a non-empty list')
+    if len(entries) > max_entries:
+        raise BulkRequestError(f'At most {max_entries} entries per request')
+    return entries
+
+
+def _record_assignment_changes(departments, sign):
+    # bulk_create() and update() send no signals, so do their bookkeeping here
+    apply_deltas(open_assignment_deltas(departments, sign))
+    bump_model_version(StaffItemAssignment)
+    bump_model_version(Item)
+
+
+class BulkAssigner:
+    """
+    Assigns many items in one request.
+
+    Body: {"assignments": [{"item_id": 1, "staff_id": 2, "notes": "..."}, ...]}
+    with an optional top-level "staff_id" used by entries that omit theirs.
+
+    Items, staff and existing (staff, item) pairs are each loaded with one
+    query, valid entries are written with one bulk_create() and every
+    item's current_assignment with one UPDATE, all in a single transaction.
+    Invalid entries are reported and skipped.
+    """
+    max_entries = 5000
+
+    def __init__(self):
+        self.results = []
+        self.created = 0
+        self.failed = 0
+
+    def run(self, data):
+        entries = _entry_list(data, 'assignments', self.max_entries)
+        default_staff = data.get('staff_id')
+
+        parsed = []
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                entry = {}
+            parsed.append((
+                index,
+                _parse_id(entry.get('item_id')),
+                _parse_id(entry.get('staff_id', default_staff)),
+                entry.get('notes') or None,
+            ))
+        item_ids = {item_id for _, item_id, _, _ in parsed if item_id}
+        staff_ids = {staff_id for _, _, staff_id, _ in parsed if staff_id}
+
+        with transaction.atomic():
+            # Lock the items so a concurrent assignment cannot slip in
+            # between the availability check and the insert
+            items = dict(
+                Item.objects.select_for_update()
+                .filter(pk__in=item_ids).values_list('id', 'current_assignment_id')
+            )
+            departments = dict(
+                Staff.objects.filter(pk__in=staff_ids).values_list('id', 'department')
+            )
+            existing_pairs = set(
+                StaffItemAssignment.objects.filter(item_id__in=items, staff_id__in=departments)
+                .values_list('staff_id', 'item_id')
+            )
+
+            claimed = set()
+            pending = []
+            for index, item_id, staff_id, notes in parsed:
+                errors = self._validate(item_id, staff_id, items, departments, existing_pairs, claimed)
+                if errors:
+                    self._fail(index, item_id, staff_id, errors)
+                    continue
+                claimed.add(item_id)
+                pending.append((index, StaffItemAssignment(
+                    staff_id=staff_id, item_id=item_id, notes=notes
+                )))
+
+            if pending:
+                created = StaffItemAssignment.objects.bulk_create(
+                    [assignment for _, assignment in pending]
+                )
+                sync_current_assignments(claimed)
+                _record_assignment_changes(
+                    [departments[assignment.staff_id] for assignment in created], sign=1
+                )
+                for (index, _), assignment in zip(pending, created):
+                    self.results.append({
+                        'index': index,
+                        'id': assignment.pk,
+                        'item_id': assignment.item_id,
+                        'staff_id': assignment.staff_id,
+                    })
+                self.created = len(created)
+
+        self.results.sort(key=lambda result: result['index'])
+        return self.report()
+
+    def report(self):
+        return {'created': self.created, 'failed': self.failed, 'results': self.results}
+
+    @staticmethod
+    def _validate(item_id, staff_id, items, departments, existing_pairs, claimed):
+        errors = {}
+        if item_id is None:
+            errors['item_id'] = ['A valid item id is required.']
+        elif item_id not in items:
+            errors['item_id'] = ['Item not found.']
+        elif items[item_id] is not None or item_id in claimed:
+            errors['item_id'] = ['Item is already assigned.']
+
+        if staff_id is None:
+            errors['staff_id'] = ['A valid staff id is required.']
+        elif staff_id not in departments:
+            errors['staff_id'] = ['Staff member not found.']
+
+        if not errors and (staff_id, item_id) in existing_pairs:
+            errors['non_field_errors'] = ['This item was already assigned to this staff member.']
+        return errors
+
+    def _fail(self, index, item_id, staff_id, errors):
+        self.failed += 1
+        self.results.append({
+            'index': index, 'item_id': item_id, 'staff_id': staff_id, 'errors': errors,
+        })
+
+
+class BulkReturner:
+    """
+    Closes many open assignments in one request.
+
+    Body: {"assignment_ids": [...]} and/or {"item_ids": [...]} (returns the
+    item's current assignment), with an optional "return_date"
+    (YYYY-MM-DD, default today).
+
+    Assignments are loaded with one query, closed with one UPDATE and the
+    affected items' current_assignment refreshed with another, in a single
+    transaction. Entries that cannot be returned are reported and skipped.
+    """
+    max_entries = 5000
+
+    def __init__(self):
+        self.results = []
+        self.returned = 0
+        self.failed = 0
+
+    def run(self, data):
+        if not hasattr(data, 'get'):
+            raise BulkRequestError('Expected a JSON object')
+        entries = []
+        for name, key in (('assignment_ids', 'assignment_id'), ('item_ids', 'item_id')):
+            if data.get(name) is not None:
+                entries.extend((key, value) for value in _entry_list(data, name, self.max_entries))
+        if not entries:
+            raise BulkRequestError('"assignment_ids" or "item_ids" must be a non-empty list')
+        if len(entries) > self.max_entries:
+            raise BulkRequestError(f'At most {self.max_entries} entries per request')
+        return_date = self._parse_return_date(data.get('return_date'))
+
+        assignment_ids = {_parse_id(v) for k, v in entries if k == 'assignment_id'} - {None}
+        item_ids = {_parse_id(v) for k, v in entries if k == 'item_id'} - {None}
+
+        with transaction.atomic():
+            # One query covers both ways of naming an assignment
+            rows = StaffItemAssignment.objects.select_for_update(of=('self',)).filter(
+                Q(pk__in=assignment_ids) | Q(item_id__in=item_ids, return_date__isnull=True)
+            ).order_by('id')
+            by_id = {}
+            by_item = {}
+            for row in rows.values('id', 'item_id', 'assigned_date', 'return_date', 'staff__department'):
+                by_id[row['id']] = row
+                if row['return_date'] is None:
+                    by_item[row['item_id']] = row
+
+            closing = {}
+            for index, (key, value) in enumerate(entries):
+                pk = _parse_id(value)
+                row = by_id.get(pk) if key == 'assignment_id' else by_item.get(pk)
+                errors = self._validate(key, pk, row, return_date, closing)
+                if errors:
+                    self.failed += 1
+                    self.results.append({'index': index, key: value, 'errors': errors})
+                    continue
+                closing[row['id']] = row
+                self.results.append({
+                    'index': index, key: pk, 'id': row['id'], 'item_id': row['item_id'],
+                })
+
+            if closing:
+                StaffItemAssignment.objects.filter(pk__in=closing).update(
+                    return_date=return_date, updated_at=timezone.now()
+                )
+                sync_current_assignments(row['item_id'] for row in closing.values())
+                _record_assignment_changes(
+                    [row['staff__department'] for row in closing.values()], sign=-1
+                )
+                self.returned = len(closing)
+
+        return self.report()
+
+    def report(self):
+        return {'returned': self.returned, 'failed': self.failed, 'results': self.results}
+
+    @staticmethod
+    def _parse_return_date(value):
+        if value in (None, ''):
+            return timezone.localdate()
+        try:
+            return date.fromisoformat(str(value))
+        except ValueError:
+            raise BulkRequestError('"return_date" must be a date in YYYY-MM-DD format')
+
+    @staticmethod
+    def _validate(key, pk, row, return_date, closing):
+        if pk is None:
+            return {key: ['A valid id is required.']}
+        if row is None:
+            if key == 'item_id':
+                return {key: ['Item is not currently assigned.']}
+            return {key: ['Assignment not found.']}
+        if row['return_date'] is not None:
+            return {key: ['Assignment has already been returned.']}
+        if row['id'] in closing:
+            return {key: ['Assignment is listed more than once.']}
+        if return_date < row['assigned_date']:
+            return {'return_date': ['Return date cannot be before the assigned date.']}
+        return {}
+
+
+# Set-based updates and deletes. Each does in a few statements what the
+# per-object signals would do row by row, inside the caller's transaction.
+
+def _stamp(values):
+    # update() skips auto_now
+    return {**values, 'updated_at': timezone.now()}
+
+
+def raw_delete(queryset, batch_size=1000):
+    """
+    Delete the rows of `queryset` with plain DELETE statements and return
+    how many went.
+
+    Nothing else happens: no on_delete cascades and no delete signals.
+    QuerySet.delete() would load every row to send post_delete for each
+    one, and the receivers in signals.py would apply the counter deltas a
+    second time, row by row. The delete_* functions below do the cascades,
+    counter deltas and cache version bumps for the whole set instead.
+
+    The primary keys are read first and deleted in batches of
+    `batch_size`, because MySQL refuses a DELETE whose subquery reads the
+    table being deleted from.
+    """
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    meta = queryset.model._meta
+    pks = list(queryset.order_by().values_list('pk', flat=True))
+    deleted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), batch_size):
+            batch = pks[start:start + batch_size]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM {quote(meta.db_table)} WHERE {quote(meta.pk.column)} IN ({placeholders})',
+                batch,
+            )
+            deleted += cursor.rowcount
+    return deleted
+
+
+def update_items(queryset, values):
+    if 'category' in values:
+        old_counts = dict(
+            queryset.order_by().values_list('category_id').annotate(count=Count('id'))
+        )
+        new_category_id = values['category'].pk if values['category'] else None
+        deltas = item_count_deltas(old_counts, sign=-1)
+        deltas.update(item_count_deltas({new_category_id: sum(old_counts.values())}))
+        apply_deltas(deltas)
+    updated = queryset.update(**_stamp(values))
+    bump_model_version(Item)
+    return updated
+
+
+def delete_items(queryset):
+    items = Item.objects.filter(pk__in=queryset.order_by().values('pk'))
+    assignments = StaffItemAssignment.objects.filter(item__in=items)
+    category_counts = dict(items.values_list('category_id').annotate(count=Count('id')))
+    open_counts = dict(
+        assignments.filter(return_date__isnull=True).order_by()
+        .values_list('staff__department').annotate(count=Count('id'))
+    )
+    deltas = item_count_deltas(category_counts, sign=-1)
+    deltas.update(open_assignment_count_deltas(open_counts, sign=-1))
+    apply_deltas(deltas)
+
+    # The CASCADE to assignments, done as one statement
+    raw_delete(assignments)
+    deleted = raw_delete(items)
+    bump_model_version(StaffItemAssignment)
+    bump_model_version(Item)
+    return deleted
+
+
+def update_rows(queryset, values):
+    updated = queryset.update(**_stamp(values))
+    bump_model_version(queryset.model)
+    return updated
+
+
+def delete_categories(queryset):
+    categories = Category.objects.filter(pk__in=queryset.order_by().values('pk'))
+    category_ids = list(categories.values_list('pk', flat=True))
+    # The SET NULL on items, done as one statement
+    Item.objects.filter(category_id__in=category_ids).update(category=None)
+    uncategorize(category_ids)
+    deleted = raw_delete(categories)
+    bump_model_version(Item)
+    bump_model_version(Category)
+    return deleted
+
+
+def delete_suppliers(queryset):
+    suppliers = Supplier.objects.filter(pk__in=queryset.order_by().values('pk'))
+    Item.objects.filter(supplier__in=suppliers).update(supplier=None)
+    deleted = raw_delete(suppliers)
+    bump_model_version(Item)
+    bump_model_version(Supplier)
+    return deleted
+
+
+class BulkUpdateDestroyMixin:
+    """
+    List-level PATCH and DELETE for a ModelViewSet (routed by BulkRouter).
+
+    The target rows are named by "ids" in the body, by the viewset's list
+    filters in the query string (e.g. PATCH /api/items/?status=available),
+    or both. PATCH applies the same "changes" to every row; they are
+    validated once by the viewset's serializer, so the field validators
+    still apply, and written with a single UPDATE. Unique fields cannot be
+    bulk-updated. perform_bulk_update() and perform_bulk_destroy() default
+    to a plain UPDATE and to QuerySet.delete(), which deletes row by row
+    with signals; subclasses override them with set-based SQL.
+    """
+    bulk_max_ids = 10000
+
+    def bulk_update(self, request, *args, **kwargs):
+        changes = request.data.get('changes') if hasattr(request.data, 'get') else None
+        if not isinstance(changes, dict) or not changes:
+            return Response({'error': '"changes" must be a non-empty object'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        values = self.validate_bulk_changes(changes)
+        queryset, missing = self.get_bulk_queryset(request)
+        with transaction.atomic():
+            updated = self.perform_bulk_update(queryset, values)
+        return Response({'updated': updated, 'missing': missing})
+
+    def bulk_destroy(self, request, *args, **kwargs):
+        queryset, missing = self.get_bulk_queryset(request)
+        with transaction.atomic():
+            deleted = self.perform_bulk_destroy(queryset)
+        return Response({'deleted': deleted, 'missing': missing})
+
+    def perform_bulk_update(self, queryset, values):
+        return update_rows(queryset, values)
+
+    def perform_bulk_destroy(self, queryset):
+        _, deleted = queryset.delete()
+        # delete() also counts the rows it cascaded to
+        return deleted.get(queryset.model._meta.label, 0)
+
+    def validate_bulk_changes(self, changes):
+        serializer = self.get_serializer(data=changes, partial=True)
+        serializer.is_valid(raise_exception=True)
+        values = dict(serializer.validated_data)
+        model_fields = {field.name: field for field in self.queryset.model._meta.concrete_fields}
+        errors = {
+            name: ['Must be unique, so it cannot be set on many objects at once.']
+            for name in values if model_fields[name].unique
+        }
+        if errors:
+            raise ValidationError(errors)
+        return values
+
+    def get_bulk_queryset(self, request):
+        """
+        Rows named by the request, and the requested ids that do not exist.
+        """
+        model = self.queryset.model
+        ids = request.data.get('ids') if hasattr(request.data, 'get') else None
+        filter_params = {
+            name for backend in self.filter_backends
+            for name in getattr(backend, 'filter_params', ())
+        }
+        filtered = filter_params & set(request.query_params)
+        if ids is None and not filtered:
+            raise ValidationError({'ids': ['Pass "ids" or at least one list filter.']})
+
+        # The list filters may order by or join in extra columns; keep only
+        # the matching primary keys so the result can be updated/deleted
+        queryset = model._default_manager.all()
+        if filtered:
+            matches = self.filter_queryset(model._default_manager.all())
+            queryset = queryset.filter(pk__in=matches.order_by().values('pk'))
+
+        missing = []
+        if ids is not None:
+            if not isinstance(ids, list) or len(ids) > self.bulk_max_ids:
+                raise ValidationError({'ids': [f'Must be a list of at most {self.bulk_max_ids} ids.']})
+            parsed = {_parse_id(value) for value in ids}
+            if None in parsed:
+                raise ValidationError({'ids': ['Every id must be a positive integer.']})
+            queryset = queryset.filter(pk__in=parsed)
+            found = set(model._default_manager.filter(pk__in=parsed).values_list('pk', flat=True))
+            missing = sorted(parsed - found)
+        return queryset, missing
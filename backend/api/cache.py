@@ -0,0 +1,129 @@
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .metrics import record_cache
+
+VERSION_KEY_PREFIX = 'model-version'
+RESPONSE_KEY_PREFIX = 'response'
+
+
+def _version_key(model):
+    return f'{VERSION_KEY_PREFIX}:{model._meta.label_lower}'
+
+
+def _new_version():
+    # Tokens start with the time of the change, for Last-Modified headers
+    return f'{time.time():.6f}:{uuid.uuid4().hex}'
+
+
+def version_timestamp(version):
+    """
+    The Unix time a version token was created, or None for tokens that
+    carry no time.
+    """
+    try:
+        return float(version.split(':', 1)[0])
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_model_versions(models):
+    """
+    Return the current version token of each model, creating any that are
+    missing. One cache round trip when all tokens exist.
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # add() keeps whichever token another process set first
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _set_new_version(key):
+    cache.set(key, _new_version(), timeout=None)
+
+
+def bump_model_version(model):
+    """
+    Invalidate every cached response that depends on `model`.
+
+    The version moves both now and again once the surrounding transaction
+    commits: the first bump keeps readers inside the transaction from seeing
+    a stale entry, and the second discards anything another request cached
+    from the pre-commit data in between.
+    """
+    key = _version_key(model)
+    _set_new_version(key)
+    transaction.on_commit(lambda: _set_new_version(key))
+
+
+def cache_is_shared():
+    """
+    Whether the cache, and so every version token, is shared by all worker
+    processes (CACHE_SHARED). With a per-process cache, a write bumps the
+    versions in one worker only and the others keep serving what they
+    cached before it.
+    """
+    return getattr(settings, 'CACHE_SHARED', False)
+
+
+def user_role(user):
+    if user and user.is_authenticated:
+        return 'admin' if user.is_staff else 'user'
+    return 'anonymous'
+
+
+def response_cache_key(request, models):
+    params = sorted(
+        (key, value)
+        for key in request.query_params
+        for value in request.query_params.getlist(key)
+    )
+    versions = get_model_versions(models)
+    raw = repr((request.path, params, user_role(request.user), versions))
+    return f'{RESPONSE_KEY_PREFIX}:{hashlib.sha256(raw.encode("utf-8")).hexdigest()}'
+
+
+def cached_response(*models, timeout=None):
+    """
+    Cache the data of successful GET responses from a view or viewset method.
+
+    The key covers the path, query parameters, the user's role and the
+    current version of every model in `models`, so a write to any of them
+    makes the old entries unreachable instead of stale. Without a shared
+    cache (see cache_is_shared()) the view runs every time.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            # Works for both function views (request first) and methods
+            # (self first, request on self)
+            request = args[0] if hasattr(args[0], 'query_params') else args[0].request
+            if request.method != 'GET' or not cache_is_shared():
+                return view_func(*args, **kwargs)
+
+            key = response_cache_key(request, models)
+            data = cache.get(key)
+            record_cache('response', data is not None)
+            if data is not None:
+                return Response(data)
+
+            response = view_func(*args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,216 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import cache_is_shared, get_model_versions, user_role, version_timestamp
+from .metrics import record_cache
+
+
+def database_versions(querysets):
+    """
+    A version for the rows of each queryset: their latest updated_at and
+    their count, so edits move it and so do deletes. All of them are read
+    in one query.
+    """
+    versions = [('', 0)] * len(querysets)
+    parts, params = [], []
+    for index, queryset in enumerate(querysets):
+        try:
+            sql, query_params = (
+                queryset.order_by().values_list('updated_at').query.sql_with_params()
+            )
+        except EmptyResultSet:
+            continue
+        parts.append(f'SELECT {index}, MAX(updated_at), COUNT(*) FROM ({sql}) rows_{index}')
+        params.extend(query_params)
+    if parts:
+        with connections[querysets[0].db].cursor() as cursor:
+            cursor.execute(' UNION ALL '.join(parts), params)
+            for index, changed, count in cursor.fetchall():
+                versions[index] = (str(changed or ''), count)
+    return versions
+
+
+def response_versions(models, querysets=None):
+    """
+    The version of each of `models` that a response's validators hang on,
+    or None when they cannot be computed.
+
+    With a shared cache these are the model version tokens (see cache.py):
+    one cache read and no SQL. A per-process cache would miss other
+    workers' writes, so otherwise they come from the database, in one
+    query: database_versions() over the queryset given for each model in
+    `querysets` (the rows actually rendered) or its whole table. Models
+    without an updated_at column cannot be versioned that way.
+    """
+    if cache_is_shared():
+        return get_model_versions(models)
+    querysets = querysets or {}
+    for model in models:
+        try:
+            model._meta.get_field('updated_at')
+        except FieldDoesNotExist:
+            return None
+    return database_versions([
+        querysets.get(model, model._default_manager.all()) for model in models
+    ])
+
+
+class ResponseValidators:
+    """
+    ETag and Last-Modified for a GET response, derived from the versions of
+    the models it renders (see response_versions()). Every write path moves
+    those versions, so the validators change exactly when the data can have.
+    """
+
+    def __init__(self, request, versions):
+        params = sorted(
+            (key, value)
+            for key in request.query_params
+            for value in request.query_params.getlist(key)
+        )
+        # Per user, since some querysets depend on who is asking
+        raw = repr((
+            request.path, params, request.user.pk, user_role(request.user),
+            getattr(request, 'accepted_media_type', None), versions,
+        ))
+        self.etag = quote_etag(hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32])
+
+        # Database versions carry no time: a delete does not move the
+        # latest updated_at, so only the ETag can see it
+        timestamps = [version_timestamp(version) for version in versions]
+        self.last_modified = None
+        if timestamps and None not in timestamps:
+            changed = max(timestamps)
+            # HTTP dates have one-second resolution. Only send one once its
+            # second is over, so a later write in the same second cannot be
+            # hidden behind an If-Modified-Since equal to it.
+            if math.floor(changed) < math.floor(time.time()):
+                self.last_modified = math.floor(changed)
+
+    def not_modified(self, request):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+        if if_none_match:
+            # Weak comparison (RFC 9110 13.1.2)
+            etags = {etag.removeprefix('W/') for etag in parse_etags(if_none_match)}
+            fresh = '*' in etags or self.etag in etags
+        elif if_modified_since is not None:
+            fresh = self.last_modified is not None and self.last_modified <= if_modified_since
+        else:
+            return False
+        record_cache('conditional', fresh)
+        return fresh
+
+    def apply(self, response):
+        response['ETag'] = self.etag
+        if self.last_modified is not None:
+            response['Last-Modified'] = http_date(self.last_modified)
+        # Revalidate every time rather than trusting a heuristic lifetime
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Accept', 'Authorization', 'Cookie'))
+        return response
+
+    def not_modified_response(self):
+        return self.apply(Response(status=status.HTTP_304_NOT_MODIFIED))
+
+
+def conditional_response(*models):
+    """
+    Answer GET requests to a view with 304 Not Modified when the client's
+    If-None-Match / If-Modified-Since still match, before the view runs.
+    Other responses with status 200 get ETag and Last-Modified headers.
+    Without a shared cache the validators cover each model's whole table.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            # Same calling conventions as cached_response()
+            request = args[0] if hasattr(args[0], 'query_params') else args[0].request
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(*args, **kwargs)
+            versions = response_versions(models)
+            if versions is None:
+                return view_func(*args, **kwargs)
+
+            validators = ResponseValidators(request, versions)
+            if validators.not_modified(request):
+                return validators.not_modified_response()
+            response = view_func(*args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                validators.apply(response)
+            return response
+        return wrapper
+    return decorator
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for a viewset's list and retrieve actions.
+
+    `conditional_models` lists every model the responses render, including
+    nested objects. The check runs right after authentication and
+    permissions. With a shared cache it does not touch the database;
+    otherwise the first model is versioned over the rows the request would
+    render (get_conditional_querysets()) and the others over their tables.
+    """
+    conditional_models = ()
+    conditional_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.response_validators = None
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+        querysets = None if cache_is_shared() else self.get_conditional_querysets()
+        versions = response_versions(self.conditional_models, querysets)
+        if versions is None:
+            return
+        self.response_validators = ResponseValidators(request, versions)
+        if self.response_validators.not_modified(request):
+            raise NotModified(self.response_validators.not_modified_response())
+
+    def get_conditional_querysets(self):
+        """
+        The rows this request renders, by model: the filtered list, or the
+        single object a retrieve looks up.
+        """
+        model = self.conditional_models[0]
+        if not hasattr(model, 'updated_at'):
+            return {}
+        queryset = self.get_queryset()
+        if self.action == 'list':
+            queryset = self.filter_queryset(queryset)
+        else:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            try:
+                queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            except (TypeError, ValueError, ValidationError):
+                # get_object() answers 404 for a malformed lookup
+                queryset = queryset.none()
+        return {model: queryset}
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'response_validators', None)
+        if validators is not None and response.status_code == status.HTTP_200_OK:
+            validators.apply(response)
+        return response
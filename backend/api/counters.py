@@ -0,0 +1,180 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import DashboardCounter, Item, Staff
+
+
+def category_key(category_id):
+    return '' if category_id is None else str(category_id)
+
+
+def apply_deltas(deltas):
+    """
+    Add each {(kind, key): delta} to its counter row, creating rows as
+    needed. Runs in the caller's transaction, so counters commit or roll back
+    with the writes that moved them.
+    """
+    with transaction.atomic():
+        for (kind, key), delta in sorted(deltas.items()):
+            if not delta:
+                continue
+            updated = DashboardCounter.objects.filter(kind=kind, key=key).update(
+                value=F('value') + delta
+            )
+            if updated:
+                continue
+            try:
+                with transaction.atomic():
+                    DashboardCounter.objects.create(kind=kind, key=key, value=delta)
+            except IntegrityError:
+                # Created concurrently; fall back to the increment
+                DashboardCounter.objects.filter(kind=kind, key=key).update(
+                    value=F('value') + delta
+                )
+
+
+def item_deltas(category_ids, sign=1):
+    """
+    Deltas for items (given by category id) being added (sign=1) or
+    removed (sign=-1).
+    """
+    return item_count_deltas(Counter(category_ids), sign)
+
+
+def item_count_deltas(counts, sign=1):
+    """
+    Like item_deltas(), for {category_id: number of items}.
+    """
+    deltas = Counter()
+    for category_id, count in counts.items():
+        deltas[(DashboardCounter.TOTAL_ITEMS, '')] += sign * count
+        deltas[(DashboardCounter.CATEGORY_ITEMS, category_key(category_id))] += sign * count
+    return deltas
+
+
+def open_assignment_deltas(departments, sign=1):
+    """
+    Deltas for open assignments (given by staff department) being opened
+    (sign=1) or closed (sign=-1).
+    """
+    return open_assignment_count_deltas(Counter(departments), sign)
+
+
+def open_assignment_count_deltas(counts, sign=1):
+    """
+    Like open_assignment_deltas(), for {department: number of assignments}.
+    """
+    deltas = Counter()
+    for department, count in counts.items():
+        deltas[(DashboardCounter.ASSIGNED_ITEMS, '')] += sign * count
+        deltas[(DashboardCounter.DEPARTMENT_ASSIGNMENTS, department)] += sign * count
+    return deltas
+
+
+def uncategorize(category_ids):
+    """
+    Move the item counts of deleted categories to "uncategorized", the way
+    their items were moved by the SET NULL.
+    """
+    keys = [category_key(pk) for pk in category_ids]
+    rows = DashboardCounter.objects.filter(kind=DashboardCounter.CATEGORY_ITEMS, key__in=keys)
+    moved = sum(row.value for row in rows)
+    rows.delete()
+    apply_deltas({(DashboardCounter.CATEGORY_ITEMS, ''): moved})
+
+
+def record_items_created(items):
+    """
+    Count items written through a path that skips post_save, such as
+    bulk_create().
+    """
+    apply_deltas(item_deltas(item.category_id for item in items))
+
+
+def compute_from_source():
+    """
+    Recompute every counter from the source tables; returns {(kind, key): value}.
+    """
+    values = {
+        (DashboardCounter.TOTAL_ITEMS, ''): 0,
+        (DashboardCounter.TOTAL_STAFF, ''): 0,
+        (DashboardCounter.ASSIGNED_ITEMS, ''): 0,
+    }
+    for row in Item.objects.values('category_id').annotate(count=Count('id')).order_by():
+        values[(DashboardCounter.TOTAL_ITEMS, '')] += row['count']
+        values[(DashboardCounter.CATEGORY_ITEMS, category_key(row['category_id']))] = row['count']
+
+    departments = (
+        Staff.objects.values('department')
+        .annotate(
+            staff_count=Count('id', distinct=True),
+            open_count=Count('assignments', filter=Q(assignments__return_date__isnull=True)),
+        )
+        .order_by()
+    )
+    for row in departments:
+        values[(DashboardCounter.TOTAL_STAFF, '')] += row['staff_count']
+        if row['open_count']:
+            values[(DashboardCounter.ASSIGNED_ITEMS, '')] += row['open_count']
+            values[(DashboardCounter.DEPARTMENT_ASSIGNMENTS, row['department'])] = row['open_count']
+    return values
+
+
+def stored_values():
+    return {
+        (row.kind, row.key): row.value
+        for row in DashboardCounter.objects.all()
+    }
+
+
+def diff_counters():
+    """
+    Compare stored counters with the source tables; returns a list of
+    (kind, key, stored, expected) for every mismatch.
+    """
+    expected = compute_from_source()
+    stored = stored_values()
+    mismatches = []
+    for key in sorted(set(expected) | set(stored)):
+        want = expected.get(key, 0)
+        have = stored.get(key, 0)
+        if want != have:
+            mismatches.append((key[0], key[1], have, want))
+    return mismatches
+
+
+def rebuild_counters():
+    """
+    Replace all counters with values recomputed from the source tables.
+    """
+    with transaction.atomic():
+        values = compute_from_source()
+        DashboardCounter.objects.all().delete()
+        DashboardCounter.objects.bulk_create([
+            DashboardCounter(kind=kind, key=key, value=value)
+            for (kind, key), value in values.items()
+            if value or not key
+        ])
+    return values
+
+
+def read_dashboard_counters():
+    """
+    Return the counters in the shape dashboard_stats needs, reading
+    O(categories + departments) rows.
+    """
+    totals = {}
+    categories = {}
+    departments = {}
+    for row in DashboardCounter.objects.all():
+        if row.kind == DashboardCounter.CATEGORY_ITEMS:
+            if row.value:
+                categories[row.key] = row.value
+        elif row.kind == DashboardCounter.DEPARTMENT_ASSIGNMENTS:
+            if row.value:
+                departments[row.key] = row.value
+        else:
+            totals[row.kind] = row.value
+    return totals, categories, departments
@@ -0,0 +1,95 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# (output column, queryset lookup) pairs for each export
+ITEM_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('name', 'name'),
+    ('model', 'model'),
+    ('serial_number', 'serial_number'),
+    ('tag_number', 'tag_number'),
+    ('date_of_purchase', 'date_of_purchase'),
+    ('purchase_price', 'purchase_price'),
+    ('notes', 'notes'),
+    ('category', 'category__name'),
+    ('supplier', 'supplier__name'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+ASSIGNMENT_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('staff_id', 'staff_id'),
+    ('staff_name', 'staff__name'),
+    ('staff_email', 'staff__email'),
+    ('department', 'staff__department'),
+    ('item_id', 'item_id'),
+    ('item_name', 'item__name'),
+    ('serial_number', 'item__serial_number'),
+    ('tag_number', 'item__tag_number'),
+    ('assigned_date', 'assigned_date'),
+    ('return_date', 'return_date'),
+    ('notes', 'notes'),
+    ('created_at', 'created_at'),
+]
+
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """
+    File-like object whose write() just hands the line back, so csv.writer
+    can be used to format one row at a time.
+    """
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _iter_rows(queryset, columns):
+    lookups = [lookup for _, lookup in columns]
+    # values_list() + iterator() streams tuples from a server-side cursor
+    # where the database supports it, without building model instances.
+    return queryset.values_list(*lookups).iterator(chunk_size=CHUNK_SIZE)
+
+
+def iter_csv(queryset, columns):
+    writer = csv.writer(_Echo())
+    # The header goes out before the query runs.
+    yield writer.writerow([name for name, _ in columns])
+    for row in _iter_rows(queryset, columns):
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def iter_ndjson(queryset, columns):
+    names = [name for name, _ in columns]
+    encoder = DjangoJSONEncoder()
+    for row in _iter_rows(queryset, columns):
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+def streaming_export(queryset, columns, export_format, filename):
+    """
+    Build a StreamingHttpResponse that writes `queryset` as CSV or NDJSON.
+    """
+    if export_format == 'ndjson':
+        response = StreamingHttpResponse(
+            iter_ndjson(queryset, columns), content_type='application/x-ndjson'
+        )
+        extension = 'ndjson'
+    else:
+        response = StreamingHttpResponse(
+            iter_csv(queryset, columns), content_type='text/csv; charset=utf-8'
+        )
+        extension = 'csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
@@ -0,0 +1,181 @@
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation() returns database values from .values()
+# unchanged: str() of a str and int() of an int. Subclasses (EmailField,
+# SlugField, ...) inherit the same behaviour.
+IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField)
+
+
+class UnsupportedSerializer(Exception):
+    pass
+
+
+def iso_datetime(value, tz, field):
+    """
+    DateTimeField.to_representation() for an aware datetime and ISO 8601
+    output, with the field's timezone resolved once per request.
+    """
+    if tz is None or value.utcoffset() is None:
+        return field.to_representation(value)
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _field_timezone(field):
+    # What DateTimeField.enforce_timezone() would use
+    return field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+
+def _relation(model, source):
+    field = model._meta.get_field(source)
+    if not field.concrete or not (field.many_to_one or field.one_to_one):
+        raise UnsupportedSerializer(f'{model.__name__}.{source} is not a forward relation')
+    return field
+
+
+def _compile_fields(serializer, prefix, paths, converters, timezones):
+    """
+    Python expression building `serializer`'s output dict from a .values()
+    row named `row`, whose keys are added to `paths`. Converters are added
+    to `converters`, and DateTimeFields to `timezones`, by variable name.
+    """
+    if (type(serializer).to_representation is not serializers.Serializer.to_representation
+            or not isinstance(serializer, serializers.ModelSerializer)):
+        raise UnsupportedSerializer(f'{type(serializer).__name__} customises to_representation')
+    model = serializer.Meta.model
+    items = []
+
+    for field in serializer._readable_fields:
+        source = field.source
+        if source == '*' or '.' in source or getattr(field, 'source_attrs', [source]) != [source]:
+            raise UnsupportedSerializer(f'{field.field_name} has a computed source')
+        path = prefix + source
+
+        if isinstance(field, serializers.ModelSerializer):
+            _relation(model, source)
+            paths.append(path)
+            nested = _compile_fields(field, path + '__', paths, converters, timezones)
+            # A null foreign key renders None, like Serializer.to_representation
+            value = f'(None if row[{path!r}] is None else {nested})'
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                raise UnsupportedSerializer(f'{field.field_name} has a pk_field')
+            _relation(model, source)
+            # .values() yields the foreign key column, which is the pk
+            paths.append(path)
+            value = f'row[{path!r}]'
+        elif isinstance(field, serializers.RelatedField) or not _is_column(model, source):
+            raise UnsupportedSerializer(f'{field.field_name} is not a plain column')
+        elif isinstance(field, IDENTITY_FIELDS):
+            paths.append(path)
+            value = f'row[{path!r}]'
+        elif (isinstance(field, serializers.DateTimeField)
+              and getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() == ISO_8601):
+            paths.append(path)
+            name = f'_f{len(timezones)}'
+            timezones[name] = field
+            converters[name] = field
+            value = f'(None if (v := row[{path!r}]) is None else _iso_datetime(v, {name}_tz, {name}))'
+        else:
+            paths.append(path)
+            name = f'_c{len(converters)}'
+            converters[name] = field.to_representation
+            value = f'(None if (v := row[{path!r}]) is None else {name}(v))'
+        items.append(f'{field.field_name!r}: {value}')
+
+    return '{' + ', '.join(items) + '}'
+
+
+def _is_column(model, source):
+    return any(field.name == source and not field.is_relation for field in model._meta.concrete_fields)
+
+
+class RowMapper:
+    """
+    Compiled mapping from `.values(*paths)` rows to serializer output; see
+    compile_row_mapper(). bind() resolves the active timezone and returns
+    the row function for one request.
+    """
+
+    def __init__(self, paths, make, timezones):
+        self.paths = paths
+        self._make = make
+        self._timezones = timezones
+
+    def bind(self):
+        return self._make(*(_field_timezone(field) for field in self._timezones))
+
+
+def compile_row_mapper(serializer):
+    """
+    Compile a RowMapper that turns a `.values(*mapper.paths)` row into the
+    dict `serializer.to_representation()` would build from the model
+    instance, without the per-field, per-row dispatch of DRF serializers.
+
+    Only plain model columns, forward relations rendered as primary keys
+    and nested ModelSerializers of those are supported; anything else
+    raises UnsupportedSerializer so callers can fall back to `serializer`.
+    """
+    paths = []
+    converters = {}
+    timezones = {}
+    expression = _compile_fields(serializer, '', paths, converters, timezones)
+    arguments = ', '.join(f'{name}_tz' for name in timezones)
+    namespace = {**converters, '_iso_datetime': iso_datetime}
+    exec(
+        f'def make({arguments}):\n'
+        f'    def map_row(row):\n'
+        f'        return {expression}\n'
+        f'    return map_row\n',
+        namespace,
+    )
+    return RowMapper(tuple(dict.fromkeys(paths)), namespace['make'], list(timezones.values()))
+
+
+class FastListMixin:
+    """
+    Serves a viewset's list action from `.values()` rows and a compiled row
+    mapper instead of instantiating the serializer per row. The output is
+    identical to the serializer's; serializers the compiler cannot handle
+    use the normal list(). Set `fast_list = False` to turn it off.
+    """
+    fast_list = True
+
+    def get_row_mapper(self):
+        serializer = self.get_serializer()
+        if self.get_fieldset() is not None:
+            # Compile sparse fieldsets per request rather than caching
+            # every combination clients ask for
+            return compile_row_mapper(serializer)
+        cls = type(self)
+        if '_row_mapper' not in cls.__dict__:
+            try:
+                cls._row_mapper = compile_row_mapper(serializer)
+            except UnsupportedSerializer:
+                cls._row_mapper = None
+        return cls._row_mapper
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_list:
+            return super().list(request, *args, **kwargs)
+        try:
+            mapper = self.get_row_mapper()
+        except UnsupportedSerializer:
+            mapper = None
+        if mapper is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # The pagination keys ride along for cursor links
+        keys = ['pk', *(name.lstrip('-') for name in getattr(self, 'keyset_ordering', None) or ())]
+        rows = queryset.values(*dict.fromkeys([*mapper.paths, *keys]))
+
+        map_row = mapper.bind()
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([map_row(row) for row in page])
+        return Response([map_row(row) for row in rows])
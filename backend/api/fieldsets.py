@@ -0,0 +1,115 @@
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from .querysets import eager_load
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_field_paths(value):
+    """
+    Turn "id,item.name,item.tag_number" into a tree of field names:
+    {'id': {}, 'item': {'name': {}, 'tag_number': {}}}.
+    """
+    tree = {}
+    for path in value.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name.strip(), {})
+    return tree
+
+
+def _collapse(name, field):
+    # Render a nested object as its primary key, which needs neither a join
+    # nor any of its columns.
+    kwargs = {} if field.source == name else {'source': field.source}
+    return serializers.PrimaryKeyRelatedField(read_only=True, **kwargs)
+
+
+def _prune(serializer, fields, expand, prefix, errors):
+    readable = [name for name, field in serializer.fields.items() if not field.write_only]
+
+    for name in set(fields or ()) | set(expand):
+        if name not in readable:
+            errors.append(f'Unknown field "{prefix}{name}".')
+
+    for name in readable:
+        field = serializer.fields[name]
+        if fields is not None and name not in fields and name not in expand:
+            del serializer.fields[name]
+        elif isinstance(field, serializers.ModelSerializer):
+            children = fields.get(name) if fields is not None else None
+            if children or name in expand:
+                _prune(field, children or None, expand.get(name, {}), f'{prefix}{name}.', errors)
+            elif fields is not None:
+                serializer.fields[name] = _collapse(name, field)
+        elif expand.get(name):
+            errors.append(f'"{prefix}{name}" has no fields to expand.')
+
+
+def apply_fieldset(serializer, fields, expand):
+    """
+    Cut a serializer down to the requested fields, in place.
+
+    `fields` is a tree from parse_field_paths(), or None to keep every
+    field. When it is given, nested objects it names without sub-fields are
+    rendered as their primary key unless they are also in `expand`.
+    Write-only fields are never touched. Raises ValidationError for names
+    the serializer does not render.
+    """
+    errors = []
+    _prune(serializer, fields, expand, '', errors)
+    if errors:
+        param = FIELDS_PARAM if fields is not None else EXPAND_PARAM
+        raise ValidationError({param: errors})
+    return serializer
+
+
+class SparseFieldsetMixin:
+    """
+    Lets list and retrieve requests choose what each object renders.
+
+    `?fields=id,name,category` keeps only those fields, with nested objects
+    as ids; `?expand=category` renders a nested object in full, and dotted
+    names (`?fields=id,item.name`) pick fields inside one. Because
+    eager_load() reads the pruned serializer, the query joins and loads
+    only what is rendered.
+    """
+    fieldset_actions = ('list', 'retrieve')
+
+    def get_fieldset(self):
+        """
+        The (fields, expand) trees for this request, or None when the
+        response should render every field.
+        """
+        if not hasattr(self, '_fieldset'):
+            params = self.request.query_params
+            self._fieldset = None
+            if self.action in self.fieldset_actions and (
+                    FIELDS_PARAM in params or EXPAND_PARAM in params):
+                fields = params.get(FIELDS_PARAM)
+                self._fieldset = (
+                    parse_field_paths(fields) if fields is not None else None,
+                    parse_field_paths(params.get(EXPAND_PARAM, '')),
+                )
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            apply_fieldset(getattr(serializer, 'child', serializer), *fieldset)
+        return serializer
+
+    def eager_load_fieldset(self, queryset):
+        """
+        Load only the requested fields' columns and joins, for viewsets
+        that do not otherwise shape their queryset.
+        """
+        if self.get_fieldset() is None:
+            return queryset
+        return eager_load(queryset, self.get_serializer())
@@ -0,0 +1,93 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .search import search_items
+
+
+def _parse(params, name, parse, errors):
+    value = params.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return parse(value)
+    except (ValueError, InvalidOperation):
+        errors[name] = [f"Invalid value '{value}'."]
+        return None
+
+
+def _parse_id(value):
+    pk = int(value)
+    if pk < 1:
+        raise ValueError(value)
+    return pk
+
+
+def _parse_price(value):
+    price = Decimal(value)
+    if not price.is_finite():
+        raise InvalidOperation(value)
+    return price
+
+
+class ItemFilter(BaseFilterBackend):
+    """
+    Server-side item filters:
+
+        ?category=<id>  ?supplier=<id>
+        ?purchased_after=YYYY-MM-DD  ?purchased_before=YYYY-MM-DD
+        ?min_price=  ?max_price=
+        ?status=available|assigned|all
+
+    Bounds are inclusive. Every filter has an index behind it, and status
+    reads Item.current_assignment, so it never touches the assignment table.
+    """
+    statuses = ('available', 'assigned', 'all')
+    filter_params = (
+        'category', 'supplier', 'purchased_after', 'purchased_before',
+        'min_price', 'max_price', 'status',
+    )
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        errors = {}
+        lookups = {
+            'category_id': _parse(params, 'category', _parse_id, errors),
+            'supplier_id': _parse(params, 'supplier', _parse_id, errors),
+            'date_of_purchase__gte': _parse(params, 'purchased_after', date.fromisoformat, errors),
+            'date_of_purchase__lte': _parse(params, 'purchased_before', date.fromisoformat, errors),
+            'purchase_price__gte': _parse(params, 'min_price', _parse_price, errors),
+            'purchase_price__lte': _parse(params, 'max_price', _parse_price, errors),
+        }
+        item_status = params.get('status', '').strip().lower() or 'all'
+        if item_status not in self.statuses:
+            errors['status'] = [f"Must be one of: {', '.join(self.statuses)}."]
+        if errors:
+            raise ValidationError(errors)
+
+        queryset = queryset.filter(**{
+            lookup: value for lookup, value in lookups.items() if value is not None
+        })
+        if item_status != 'all':
+            queryset = queryset.filter(
+                current_assignment__isnull=(item_status == 'available')
+            )
+        return queryset
+
+
+class ItemSearchFilter(BaseFilterBackend):
+    """
+    Full-text search over item name, model, serial/tag number and notes
+    with ?search=. Results are ranked by relevance unless keyset pagination
+    imposes its own order.
+    """
+    search_param = 'search'
+    filter_params = (search_param,)
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return search_items(queryset, text)
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import cache_is_shared, get_model_versions
+from .metrics import record_cache
+from .models import Staff
+
+STAFF_KEY_PREFIX = 'request-staff'
+
+# Cached in place of None, which the cache cannot tell apart from a miss
+NO_STAFF = 0
+
+_UNRESOLVED = object()
+
+
+def _lookup_staff_id(email):
+    return Staff.objects.filter(email=email).values_list('id', flat=True).first()
+
+
+def _cached_staff_id(email, timeout):
+    # Keyed on the Staff version, so any staff write makes old entries
+    # unreachable and the TTL only bounds how long unused ones linger
+    version, = get_model_versions([Staff])
+    key = f'{STAFF_KEY_PREFIX}:{version}:{email}'
+    staff_id = cache.get(key)
+    record_cache('staff_lookup', staff_id is not None)
+    if staff_id is None:
+        staff_id = _lookup_staff_id(email) or NO_STAFF
+        cache.set(key, staff_id, timeout)
+    return staff_id or None
+
+
+def request_staff_id(request):
+    """
+    Id of the Staff record matching the request user's email, or None.
+
+    Resolved at most once per request and remembered on it, so the viewset
+    queryset and the object permission share one lookup. Set
+    STAFF_LOOKUP_CACHE_TIMEOUT to also share it across requests, which
+    needs a shared cache like response caching does.
+    """
+    staff_id = request.__dict__.get('_staff_id', _UNRESOLVED)
+    if staff_id is not _UNRESOLVED:
+        return staff_id
+
+    email = getattr(request.user, 'email', None)
+    timeout = getattr(settings, 'STAFF_LOOKUP_CACHE_TIMEOUT', 0)
+    if not email:
+        staff_id = None
+    elif timeout and cache_is_shared():
+        staff_id = _cached_staff_id(email, timeout)
+    else:
+        staff_id = _lookup_staff_id(email)
+    request.__dict__['_staff_id'] = staff_id
+    return staff_id
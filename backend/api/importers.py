@@ -0,0 +1,201 @@
+import csv
+import io
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .models import Item, Category, Supplier
+from .counters import record_items_created
+from .cache import bump_model_version
+
+
+class ImportFormatError(Exception):
+    """
+    Raised when an upload cannot be read as an item CSV at all.
+    """
+
+
+class ItemCSVImporter:
+    """
+    Streams an item CSV into the database.
+
+    Rows are parsed one at a time, category and supplier names are resolved
+    from maps loaded once up front, serial/tag uniqueness is checked against
+    sets prefetched once, and valid rows are written with bulk_create() in
+    fixed-size batches, each in its own transaction. Memory therefore depends
+    on the batch size rather than on the size of the upload.
+    """
+    batch_size = 1000
+    max_reported_errors = 1000
+
+    required_columns = {'name'}
+    known_columns = {
+        'name', 'model', 'serial_number', 'tag_number', 'date_of_purchase',
+        'purchase_price', 'notes', 'category', 'supplier',
+    }
+    # Fields whose values come straight from the CSV and go through the
+    # model field validators (relations are resolved separately).
+    validated_fields = [
+        'name', 'model', 'serial_number', 'tag_number', 'date_of_purchase',
+        'purchase_price', 'notes',
+    ]
+
+    def __init__(self, batch_size=None):
+        if batch_size:
+            self.batch_size = batch_size
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        # {'row', 'error'}: the first line a partial import did not read
+        self.aborted = None
+
+    def run(self, upload):
+        """
+        Import every row of `upload` (a Django UploadedFile) and return the
+        report dict.
+
+        A file that cannot be read at all raises ImportFormatError before
+        anything is written. If it stops decoding or parsing partway
+        through, the rows before that point are committed and the report
+        says where the import stopped (`aborted`) instead of raising, since
+        the earlier batches cannot be taken back.
+        """
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            try:
+                reader = csv.DictReader(stream)
+                self._check_header(reader.fieldnames)
+            except UnicodeDecodeError:
+                raise ImportFormatError('File must be UTF-8 encoded CSV')
+            except csv.Error as e:
+                raise ImportFormatError(f'Malformed CSV: {e}')
+            self._load_lookups()
+
+            batch = []
+            try:
+                for row in reader:
+                    # DictReader tracks the physical line, which is what users see
+                    item = self._build_item(reader.line_num, row)
+                    if item is None:
+                        continue
+                    batch.append((reader.line_num, item))
+                    if len(batch) >= self.batch_size:
+                        self._flush(batch)
+                        batch = []
+            except UnicodeDecodeError:
+                self._abort(reader, 'File must be UTF-8 encoded CSV')
+            except csv.Error as e:
+                self._abort(reader, f'Malformed CSV: {e}')
+            if batch:
+                self._flush(batch)
+        finally:
+            stream.detach()
+
+        return self.report()
+
+    def report(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'aborted': self.aborted,
+        }
+
+    def _abort(self, reader, error):
+        # line_num still counts the last row returned; the stream decodes in
+        # chunks, so the bad byte may sit a few lines further on
+        self.aborted = {'row': reader.line_num + 1, 'error': error}
+
+    def _check_header(self, fieldnames):
+        if not fieldnames:
+            raise ImportFormatError('File is empty')
+        columns = {self._normalize(name) for name in fieldnames}
+        missing = self.required_columns - columns
+        if missing:
+            raise ImportFormatError(f"Missing required column(s): {', '.join(sorted(missing))}")
+
+    def _load_lookups(self):
+        self.categories = dict(Category.objects.values_list('name', 'id'))
+        self.suppliers = dict(Supplier.objects.values_list('name', 'id'))
+        self.serial_numbers = set(
+            Item.objects.filter(serial_number__isnull=False)
+            .values_list('serial_number', flat=True).iterator()
+        )
+        self.tag_numbers = set(
+            Item.objects.filter(tag_number__isnull=False)
+            .values_list('tag_number', flat=True).iterator()
+        )
+
+    @staticmethod
+    def _normalize(name):
+        return (name or '').strip().lower().replace(' ', '_')
+
+    def _record_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_reported_errors:
+            self.errors.append({'row': line, 'errors': errors})
+
+    def _build_item(self, line, row):
+        values = {}
+        for key, value in row.items():
+            column = self._normalize(key)
+            if column in self.known_columns and isinstance(value, str):
+                value = value.strip()
+                values[column] = value or None
+
+        errors = {}
+        item = Item(**{field: values.get(field) for field in self.validated_fields})
+
+        category_name = values.get('category')
+        if category_name:
+            item.category_id = self.categories.get(category_name)
+            if item.category_id is None:
+                errors['category'] = [f"Unknown category '{category_name}'"]
+
+        supplier_name = values.get('supplier')
+        if supplier_name:
+            item.supplier_id = self.suppliers.get(supplier_name)
+            if item.supplier_id is None:
+                errors['supplier'] = [f"Unknown supplier '{supplier_name}'"]
+
+        try:
+            item.clean_fields(exclude=['category', 'supplier'])
+        except ValidationError as e:
+            errors.update(e.message_dict)
+
+        if item.serial_number and item.serial_number in self.serial_numbers:
+            errors.setdefault('serial_number', []).append('Serial number already exists.')
+        if item.tag_number and item.tag_number in self.tag_numbers:
+            errors.setdefault('tag_number', []).append('Tag number already exists.')
+
+        if errors:
+            self._record_error(line, errors)
+            return None
+
+        # Claim the identifiers so later rows in the same file collide with them
+        if item.serial_number:
+            self.serial_numbers.add(item.serial_number)
+        if item.tag_number:
+            self.tag_numbers.add(item.tag_number)
+        return item
+
+    def _flush(self, batch):
+        try:
+            with transaction.atomic():
+                items = Item.objects.bulk_create([item for _, item in batch])
+                # bulk_create() sends no post_save, so do its bookkeeping here
+                record_items_created(items)
+                bump_model_version(Item)
+            self.created += len(batch)
+        except IntegrityError:
+            # Something was written concurrently; fall back to row-by-row so
+            # only the conflicting rows are rejected.
+            for line, item in batch:
+                try:
+                    with transaction.atomic():
+                        item.save(force_insert=True)
+                    self.created += 1
+                except IntegrityError:
+                    item.pk = None
+                    self._record_error(line, {'non_field_errors': ['Serial or tag number already exists.']})
@@ -0,0 +1,388 @@
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+SEARCH_TERMS = ['laptop', 'monitor', 'phone', 'printer', 'headset', 'router']
+
+# Relative weight of each action in a virtual user's mix: mostly browsing,
+# a steady dashboard poll and a trickle of assignments and returns.
+DEFAULT_MIX = {
+    'items_list': 30,
+    'items_search': 10,
+    'item_detail': 15,
+    'assignments_list': 10,
+    'dashboard': 20,
+    'assign': 10,
+    'return': 5,
+}
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted, non-empty list.
+    """
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LoadStats:
+    """
+    Thread-safe latency and outcome record per endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(list)
+        self._errors = defaultdict(int)
+        self._statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint, seconds, status):
+        # status is None when the request never got a response
+        with self._lock:
+            self._latencies[endpoint].append(seconds * 1000)
+            self._statuses[endpoint][status or 'failed'] += 1
+            if status is None or status >= 400:
+                self._errors[endpoint] += 1
+
+    def summary(self, elapsed):
+        """
+        {endpoint: {requests, rps, errors, error_rate, p50_ms, p95_ms,
+        p99_ms, max_ms, statuses}} plus a '__total__' entry.
+        """
+        with self._lock:
+            latencies = {name: sorted(values) for name, values in self._latencies.items()}
+            errors = dict(self._errors)
+            statuses = {name: dict(counts) for name, counts in self._statuses.items()}
+        latencies['__total__'] = sorted(value for values in latencies.values() for value in values)
+        errors['__total__'] = sum(errors.values())
+
+        summary = {}
+        for name, values in latencies.items():
+            if not values:
+                continue
+            summary[name] = {
+                'requests': len(values),
+                'rps': round(len(values) / elapsed, 1),
+                'errors': errors.get(name, 0),
+                'error_rate': round(errors.get(name, 0) / len(values), 4),
+                'p50_ms': round(percentile(values, 0.50), 1),
+                'p95_ms': round(percentile(values, 0.95), 1),
+                'p99_ms': round(percentile(values, 0.99), 1),
+                'max_ms': round(values[-1], 1),
+            }
+            if name in statuses:
+                summary[name]['statuses'] = {str(code): count for code, count in statuses[name].items()}
+        return summary
+
+
+class Client:
+    """
+    One keep-alive HTTP connection with the virtual user's credentials.
+    http.client reconnects by itself when the server closes the connection,
+    as gunicorn's sync workers do after every response.
+    """
+
+    def __init__(self, base_url, token=None, timeout=30):
+        parts = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        self.prefix = parts.path.rstrip('/')
+        self.headers = {'Accept': 'application/json'}
+        if token:
+            self.headers['Authorization'] = f'Token {token}'
+
+    def request(self, method, path, body=None, headers=None):
+        """
+        Send a request and return (status, headers, parsed JSON body or None).
+        """
+        headers = {**self.headers, **(headers or {})}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            raise
+        data = None
+        if payload and response.getheader('Content-Type', '').startswith('application/json'):
+            data = json.loads(payload)
+        return response.status, response, data
+
+    def close(self):
+        self.connection.close()
+
+
+class ItemPool:
+    """
+    Available item ids shared by the virtual users, so two of them never
+    try to assign the same item.
+    """
+
+    def __init__(self, item_ids):
+        self._free = deque(item_ids)
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            return self._free.popleft() if self._free else None
+
+    def put(self, item_id):
+        with self._lock:
+            self._free.append(item_id)
+
+
+class VirtualUser(threading.Thread):
+    """
+    Runs weighted random actions against the API until `deadline`, pausing
+    `think_time` seconds (on average) between them.
+    """
+
+    def __init__(self, number, base_url, token, fixture, stats, deadline, mix, think_time, seed):
+        super().__init__(name=f'virtual-user-{number}', daemon=True)
+        self.client = Client(base_url, token)
+        self.fixture = fixture
+        self.stats = stats
+        self.deadline = deadline
+        self.actions = list(mix)
+        self.weights = [mix[action] for action in self.actions]
+        self.think_time = think_time
+        self.rng = random.Random(seed * 10_000 + number)
+        self.held = []
+        self.dashboard_etag = None
+
+    def run(self):
+        try:
+            while time.monotonic() < self.deadline:
+                action = self.rng.choices(self.actions, self.weights)[0]
+                getattr(self, f'do_{action}')()
+                if self.think_time:
+                    time.sleep(self.rng.expovariate(1 / self.think_time))
+        finally:
+            self.give_back()
+            self.client.close()
+
+    def give_back(self):
+        # Return what this user still holds, outside the measured load, so
+        # the next run starts from the same state
+        if self.held:
+            try:
+                self.client.request('POST', '/api/assignments/bulk-return/', {'item_ids': self.held})
+            except (OSError, http.client.HTTPException):
+                pass
+            self.held = []
+
+    def call(self, endpoint, method, path, body=None, headers=None):
+        started = time.perf_counter()
+        try:
+            status, response, data = self.client.request(method, path, body, headers)
+        except (OSError, http.client.HTTPException):
+            self.stats.record(endpoint, time.perf_counter() - started, None)
+            return None, None, None
+        self.stats.record(endpoint, time.perf_counter() - started, status)
+        return status, response, data
+
+    def do_items_list(self):
+        self.call('items_list', 'GET', f'/api/items/?page={self.rng.randint(1, self.fixture["item_pages"])}')
+
+    def do_items_search(self):
+        self.call('items_search', 'GET', f'/api/items/?search={self.rng.choice(SEARCH_TERMS)}')
+
+    def do_item_detail(self):
+        self.call('item_detail', 'GET', f'/api/items/{self.rng.choice(self.fixture["item_ids"])}/')
+
+    def do_assignments_list(self):
+        self.call('assignments_list', 'GET', '/api/assignments/')
+
+    def do_dashboard(self):
+        # Pollers revalidate what they already have
+        headers = {'If-None-Match': self.dashboard_etag} if self.dashboard_etag else None
+        status, response, _ = self.call('dashboard', 'GET', '/api/dashboard/stats', headers=headers)
+        if status in (200, 304):
+            self.dashboard_etag = response.getheader('ETag') or self.dashboard_etag
+
+    def do_assign(self):
+        item_id = self.fixture['pool'].take()
+        if item_id is None:
+            return self.do_return()
+        status, _, _ = self.call('assign', 'POST', '/api/assignments/', {
+            'item_id': item_id, 'staff_id': self.rng.choice(self.fixture['staff_ids']),
+        })
+        if status == 201:
+            self.held.append(item_id)
+        else:
+            self.fixture['pool'].put(item_id)
+
+    def do_return(self):
+        if not self.held:
+            return
+        item_id = self.held.pop(0)
+        status, _, _ = self.call('return', 'POST', '/api/assignments/bulk-return/', {'item_ids': [item_id]})
+        if status == 200:
+            self.fixture['pool'].put(item_id)
+
+
+def login(base_url, username, password):
+    status, _, data = Client(base_url).request(
+        'POST', '/api/auth/login/', {'username': username, 'password': password}
+    )
+    if status != 200:
+        raise RuntimeError(f'Login as {username!r} failed with {status}: {data}')
+    return data['token']
+
+
+def load_fixture(base_url, token, pool_size=500):
+    """
+    Collect the ids the virtual users need through the API itself: a pool
+    of available items, staff to assign them to and the item page count.
+    """
+    client = Client(base_url, token)
+    status, _, data = client.request('GET', '/api/items/')
+    if status != 200:
+        raise RuntimeError(f'GET /api/items/ returned {status}')
+    page_size = len(data['results']) or 1
+    item_pages = max(1, -(-data['count'] // page_size))
+
+    item_ids = []
+    path = '/api/items/?status=available&pagination=cursor&page_size=100'
+    while path and len(item_ids) < pool_size:
+        status, _, data = client.request('GET', path)
+        item_ids.extend(item['id'] for item in data['results'])
+        path = data.get('next') and urlsplit(data['next'])._replace(scheme='', netloc='').geturl()
+    status, _, data = client.request('GET', '/api/staff/')
+    staff_ids = [staff['id'] for staff in data['results']]
+    client.close()
+
+    if not item_ids or not staff_ids:
+        raise RuntimeError('The database needs available items and staff; seed it first.')
+    return {
+        'item_pages': item_pages,
+        'item_ids': item_ids,
+        'staff_ids': staff_ids,
+        'pool': ItemPool(item_ids),
+    }
+
+
+def run_load(base_url, token, users=20, duration=30, ramp_up=0, think_time=0.1,
+             mix=DEFAULT_MIX, seed=0, log=None):
+    """
+    Drive `users` concurrent virtual users against `base_url` for
+    `duration` seconds, starting them evenly over `ramp_up` seconds, and
+    return LoadStats.summary() for the whole run.
+    """
+    log = log or (lambda message: None)
+    fixture = load_fixture(base_url, token)
+    stats = LoadStats()
+    started = time.monotonic()
+    deadline = started + ramp_up + duration
+    threads = []
+    for number in range(users):
+        thread = VirtualUser(number, base_url, token, fixture, stats, deadline, mix, think_time, seed)
+        thread.start()
+        threads.append(thread)
+        if ramp_up:
+            time.sleep(ramp_up / users)
+    log(f'{users} virtual users running for {duration}s')
+    for thread in threads:
+        thread.join()
+    return stats.summary(time.monotonic() - started)
+
+
+def format_summary(summary):
+    lines = [
+        f"{'endpoint':<18}{'requests':>9}{'rps':>8}{'errors':>8}"
+        f"{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    ]
+    for name in sorted(summary, key=lambda name: (name == '__total__', name)):
+        result = summary[name]
+        lines.append(
+            f"{'total' if name == '__total__' else name:<18}{result['requests']:>9}{result['rps']:>8}"
+            f"{result['error_rate']:>8.1%}{result['p50_ms']:>9}{result['p95_ms']:>9}"
+            f"{result['p99_ms']:>9}{result['max_ms']:>9}"
+        )
+    for name in sorted(summary):
+        if name != '__total__' and summary[name]['errors']:
+            lines.append(f"{name} statuses: {summary[name]['statuses']}")
+    return '\n'.join(lines)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class LocalServer:
+    """
+    The app served from a child process on 127.0.0.1: gunicorn, as in
+    docker-compose.yml, or runserver where gunicorn is not installed.
+    `env` overrides the settings' environment variables, e.g. to point at a
+    scratch database.
+    """
+
+    def __init__(self, manage_py, env=None, server='gunicorn', workers=4, threads=1):
+        self.manage_py = str(manage_py)
+        self.env = {**os.environ, **(env or {})}
+        self.server = server
+        self.workers = workers
+        self.threads = threads
+        self.port = free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.process = None
+
+    def manage(self, *args, env=None):
+        subprocess.run(
+            [sys.executable, self.manage_py, *args], env={**self.env, **(env or {})},
+            check=True, stdout=subprocess.DEVNULL,
+        )
+
+    def start(self, timeout=30):
+        cwd = os.path.dirname(os.path.abspath(self.manage_py))
+        if self.server == 'gunicorn':
+            command = [
+                sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{self.port}',
+                '--workers', str(self.workers), '--threads', str(self.threads),
+                '--log-level', 'warning', 'inventory_backend.wsgi:application',
+            ]
+        else:
+            command = [sys.executable, self.manage_py, 'runserver', '--noreload', f'127.0.0.1:{self.port}']
+        # Failures show up in the report's status counts; the server's own
+        # request log would drown out the command's output
+        self.process = subprocess.Popen(
+            command, cwd=cwd, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'{self.server} exited with {self.process.returncode}')
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=1):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f'{self.server} did not start within {timeout}s')
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
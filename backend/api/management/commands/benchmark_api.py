@@ -0,0 +1,96 @@
+import platform
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.benchmarks import calibrate, compare_results, load_baseline, run_suite, save_baseline
+from api.seed import flush_dataset, generate_dataset
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency, query count and peak memory of the main endpoints "
+        "at several dataset sizes, and fail if any regressed against the "
+        "stored baseline. Runs in a throwaway test database seeded with "
+        "seed_data's generator, so the configured database is never touched. "
+        "Latency limits are scaled by a calibration run, so a baseline from "
+        "another machine still applies roughly; after an intended performance "
+        "change, or to gate on a different reference machine, rerun with "
+        "--save-baseline and commit benchmarks/baseline.json."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000',
+                            help='Comma-separated item counts (assignments are a tenth)')
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Allowed latency/memory growth as a fraction (0.5 = 50%%)')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Write the results as the new baseline instead of comparing')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+
+        # A fresh database keeps runs repeatable and the real data safe
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            calibration_ms = calibrate()
+            results = {}
+            for size in sizes:
+                self.stdout.write(f"Seeding {size} items...")
+                flush_dataset()
+                generate_dataset(
+                    items=size, assignments=size // 10, staff=max(size // 20, 10),
+                    seed=options['seed'],
+                )
+                results[str(size)] = run_suite(
+                    runs=options['runs'], warmup=options['warmup'],
+                    log=lambda line: self.stdout.write(f"  {line}"),
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            save_baseline(baseline_path, results, {
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'database': connection.vendor,
+                'runs': options['runs'],
+                'seed': options['seed'],
+                'calibration_ms': calibration_ms,
+            })
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {baseline_path}"))
+            return
+
+        if not baseline_path.exists():
+            raise CommandError(f"No baseline at {baseline_path}; run with --save-baseline first.")
+        baseline, meta = load_baseline(baseline_path)
+        speed = 1.0
+        if meta.get('calibration_ms'):
+            # Only ever loosened: a machine that merely looks faster for the
+            # calibration must not make ordinary jitter fail the run
+            speed = max(1.0, calibration_ms / meta['calibration_ms'])
+            self.stdout.write(f"Calibration {calibration_ms}ms against the baseline's "
+                              f"{meta['calibration_ms']}ms; latency limits scaled by {speed:.2f}")
+        regressions = compare_results(results, baseline, options['tolerance'], speed)
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regression(s) against {baseline_path}. If the change is "
+                f"intended, rerun with --save-baseline and commit the new baseline."
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
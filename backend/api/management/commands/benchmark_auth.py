@@ -0,0 +1,76 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication, JWTStatelessUserAuthentication,
+)
+
+from api.authentication import CachedTokenAuthentication, jwt_for_user, token_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests per second of an authenticated endpoint under each "
+        "authentication backend: database and cached API tokens, database "
+        "and stateless JWT. Runs inside a transaction that is rolled back, "
+        "so nothing is left behind."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--warmup', type=int, default=100)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user(username='benchmark-auth', email='benchmark@example.com')
+            token = f'Token {Token.objects.create(user=user).key}'
+            bearer = f'Bearer {jwt_for_user(user).access_token}'
+            backends = [
+                (TokenAuthentication, token),
+                (CachedTokenAuthentication, token),
+                (JWTAuthentication, bearer),
+                (JWTStatelessUserAuthentication, bearer),
+            ]
+            for backend, header in backends:
+                self._run(backend, header, options['requests'], options['warmup'])
+            transaction.set_rollback(True)
+        token_cache.clear()
+
+    def _run(self, backend, header, requests, warmup):
+        # The view only returns the user's id, so every query counted is the
+        # authentication backend's own
+        view = type('BenchmarkView', (APIView,), {
+            'authentication_classes': [backend],
+            'permission_classes': [IsAuthenticated],
+            'get': lambda self, request: Response({'id': request.user.pk}),
+        }).as_view()
+        factory = APIRequestFactory()
+
+        def call():
+            return view(factory.get('/api/benchmark/', HTTP_AUTHORIZATION=header))
+
+        token_cache.clear()
+        for _ in range(warmup):
+            call()
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(requests):
+                response = call()
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{backend.__name__}: status={response.status_code} "
+            f"{requests / elapsed:.0f} req/s "
+            f"({elapsed * 1000 / requests:.3f}ms/request, "
+            f"{len(queries) / requests:.2f} queries/request)"
+        ))
@@ -0,0 +1,73 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Item, StaffItemAssignment
+from api.seed import generate_dataset, flush_dataset
+from api.views import dashboard_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dashboard_stats view against the configured database. "
+        "With --seed, first replaces the inventory tables with a generated "
+        "dataset (defaults to 1M items / 100k assignments)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true',
+                            help='Flush inventory tables and generate a dataset first')
+        parser.add_argument('--items', type=int, default=1_000_000)
+        parser.add_argument('--assignments', type=int, default=100_000)
+        parser.add_argument('--staff', type=int, default=5_000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.stdout.write("Seeding dataset...")
+            flush_dataset()
+            generate_dataset(
+                items=options['items'],
+                assignments=options['assignments'],
+                staff=options['staff'],
+                log=self.stdout.write,
+            )
+
+        self.stdout.write(
+            f"Dataset: {Item.objects.count()} items, "
+            f"{StaffItemAssignment.objects.count()} assignments"
+        )
+
+        factory = APIRequestFactory()
+        user = User(username='benchmark', is_staff=True)
+
+        def call():
+            request = factory.get('/api/dashboard/stats')
+            force_authenticate(request, user=user)
+            return dashboard_stats(request)
+
+        for _ in range(options['warmup']):
+            call()
+
+        timings = []
+        query_count = 0
+        for _ in range(options['runs']):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = call()
+                timings.append((time.perf_counter() - started) * 1000)
+            query_count = len(queries)
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(self.style.SUCCESS(
+            f"dashboard_stats: status={response.status_code} queries={query_count} "
+            f"min={timings[0]:.1f}ms median={statistics.median(timings):.1f}ms "
+            f"p95={p95:.1f}ms max={timings[-1]:.1f}ms over {len(timings)} runs"
+        ))
@@ -0,0 +1,62 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Item
+from api.parsers import FastJSONParser, MessagePackParser
+from api.querysets import eager_load
+from api.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from api.serializers import ItemSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare encode and decode time and payload size of the JSON and "
+        "MessagePack renderers on ItemSerializer output for a page of items "
+        "from the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=500,
+                            help='Items in the rendered page')
+        parser.add_argument('--runs', type=int, default=50)
+
+    def handle(self, *args, **options):
+        serializer = ItemSerializer(many=True)
+        queryset = eager_load(Item.objects.all(), serializer.child)[:options['items']]
+        data = ItemSerializer(queryset, many=True).data
+        if not data:
+            raise CommandError("No items to render; seed the database first.")
+        self.stdout.write(
+            f"{len(data)} items; orjson {'installed' if orjson else 'missing'}, "
+            f"msgpack {'installed' if msgpack else 'missing'}"
+        )
+
+        codecs = [
+            ('JSONRenderer (DRF)', JSONRenderer(), JSONParser()),
+            ('FastJSONRenderer', FastJSONRenderer(), FastJSONParser()),
+        ]
+        if msgpack is not None:
+            codecs.append(('MessagePackRenderer', MessagePackRenderer(), MessagePackParser()))
+
+        baseline = None
+        for name, renderer, parser in codecs:
+            payload = renderer.render(data, renderer.media_type)
+            encode = self._time(lambda: renderer.render(data, renderer.media_type), options['runs'])
+            decode = self._time(lambda: parser.parse(io.BytesIO(payload)), options['runs'])
+            baseline = baseline or encode
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: encode {encode * 1000:.2f}ms ({baseline / encode:.1f}x), "
+                f"decode {decode * 1000:.2f}ms, {len(payload)} bytes"
+            ))
+
+    def _time(self, func, runs):
+        func()
+        started = time.perf_counter()
+        for _ in range(runs):
+            func()
+        return (time.perf_counter() - started) / runs
+
@@ -0,0 +1,114 @@
+import importlib.util
+import json
+import secrets
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.loadtest import LocalServer, format_summary, login, run_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a mix of item browsing, assignment creation and dashboard "
+        "polls from many concurrent virtual users, and report p50/p95/p99 "
+        "latency, throughput and error rate per endpoint. By default the app "
+        "is served by gunicorn, as in docker-compose.yml, from a scratch "
+        "SQLite database seeded with seed_data; --database configured uses "
+        "the database from the environment (e.g. a local Postgres) and "
+        "--url drives a server that is already running."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds of full load')
+        parser.add_argument('--ramp-up', type=float, default=5,
+                            help='Seconds over which the users start')
+        parser.add_argument('--think-time', type=float, default=0.1,
+                            help='Mean pause between a user\'s requests, in seconds')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--url', help='Base URL of a running server; nothing is started')
+        parser.add_argument('--database', choices=['scratch', 'configured'], default='scratch')
+        parser.add_argument('--items', type=int, default=10_000,
+                            help='Items to seed the scratch database with')
+        parser.add_argument('--server', choices=['gunicorn', 'runserver'],
+                            default='gunicorn' if importlib.util.find_spec('gunicorn') else 'runserver')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=1, help='Threads per gunicorn worker')
+        parser.add_argument('--username', default='load-test')
+        parser.add_argument('--password',
+                            help='Password of --username; required with --url or --database configured')
+        parser.add_argument('--json', help='Also write the summary to this file')
+
+    def handle(self, *args, **options):
+        log = self.stdout.write
+        if options['url']:
+            if not options['password']:
+                raise CommandError("--url needs --username and --password of an admin user.")
+            summary = self._drive(options['url'], options, log)
+        else:
+            with tempfile.TemporaryDirectory(prefix='load-test-') as scratch:
+                server = self._server(Path(scratch), options)
+                with server:
+                    log(f"Serving with {options['server']} at {server.url}")
+                    summary = self._drive(server.url, options, log)
+
+        self.stdout.write(format_summary(summary))
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as handle:
+                json.dump(summary, handle, indent=2)
+                handle.write('\n')
+        total = summary.get('__total__', {})
+        if total.get('errors'):
+            self.stdout.write(self.style.WARNING(
+                f"{total['errors']} of {total['requests']} requests failed"
+            ))
+
+    def _server(self, scratch, options):
+        env = {
+            'DEBUG': 'False',
+            'ALLOWED_HOSTS': '127.0.0.1,localhost',
+            # Worker processes must share model versions, or one worker's
+            # cached responses outlive another worker's writes
+            'CACHE_BACKEND': 'file',
+            'CACHE_LOCATION': str(scratch / 'cache'),
+            'METRICS_DIR': str(scratch / 'metrics'),
+        }
+        if options['database'] == 'scratch':
+            env.update({'DB_ENGINE': 'django.db.backends.sqlite3', 'DB_NAME': str(scratch / 'db.sqlite3')})
+        server = LocalServer(
+            Path(settings.BASE_DIR) / 'manage.py', env, server=options['server'],
+            workers=options['workers'], threads=options['threads'],
+        )
+
+        if options['database'] == 'scratch':
+            self.stdout.write(f"Seeding a scratch database with {options['items']} items...")
+            server.manage('migrate', '--noinput')
+            server.manage(
+                'seed_data', '--items', str(options['items']),
+                '--assignments', str(options['items'] // 10),
+                '--staff', str(max(options['items'] // 20, 10)),
+                '--seed', str(options['seed']),
+            )
+            options['password'] = secrets.token_urlsafe(16)
+            server.manage(
+                'createsuperuser', '--noinput', '--username', options['username'],
+                '--email', 'load-test@example.com',
+                env={'DJANGO_SUPERUSER_PASSWORD': options['password']},
+            )
+        elif not options['password']:
+            raise CommandError("--database configured needs --username and --password of an admin user.")
+        return server
+
+    def _drive(self, url, options, log):
+        try:
+            token = login(url, options['username'], options['password'])
+            return run_load(
+                url, token, users=options['users'], duration=options['duration'],
+                ramp_up=options['ramp_up'], think_time=options['think_time'],
+                seed=options['seed'], log=log,
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.counters import diff_counters, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the dashboard counters from the item, staff and assignment "
+        "tables, then verify them. With --check, only verify and exit with an "
+        "error if any counter has drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Report drift without rewriting the counters')
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            values = rebuild_counters()
+            self.stdout.write(f"Rebuilt {len(values)} counters")
+
+        mismatches = diff_counters()
+        for kind, key, stored, expected in mismatches:
+            self.stdout.write(f"{kind}[{key}]: stored={stored} expected={expected}")
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} counter(s) out of date")
+        self.stdout.write(self.style.SUCCESS("Counters match the source tables"))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Item, Category, Supplier, Staff, StaffItemAssignment
+from api.seed import flush_dataset, generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Deterministically generate categories, suppliers, staff, items and "
+        "assignments with bulk_create(). The same options always produce the "
+        "same rows. Refuses to run on a database that already holds inventory "
+        "rows unless --flush is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10_000)
+        parser.add_argument('--assignments', type=int, default=1_000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--suppliers', type=int, default=50)
+        parser.add_argument('--staff', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed; change it for a different dataset')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--flush', action='store_true',
+                            help='Delete every inventory row first')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            flush_dataset()
+        elif any(model.objects.exists() for model in (Item, Category, Supplier, Staff, StaffItemAssignment)):
+            raise CommandError("Inventory tables are not empty; pass --flush to replace their rows.")
+
+        counts = generate_dataset(
+            items=options['items'],
+            assignments=options['assignments'],
+            categories=options['categories'],
+            suppliers=options['suppliers'],
+            staff=options['staff'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Created " + ", ".join(f"{count} {name}" for name, count in counts.items())
+        ))
@@ -0,0 +1,232 @@
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+PAGE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 500, 1000)
+
+# Every metric the registry accepts: name -> (type, help, histogram buckets)
+METRICS = {
+    'api_requests_total': (
+        'counter', 'Requests by view, action, method and status.', None),
+    'api_request_duration_seconds': (
+        'histogram', 'Request latency by view and action.', LATENCY_BUCKETS),
+    'api_request_queries': (
+        'histogram', 'SQL queries per request by view and action.', QUERY_BUCKETS),
+    'api_auth_requests_total': (
+        'counter', 'Requests by the authentication backend that accepted them.', None),
+    'api_auth_cache_total': (
+        'counter', 'Token cache lookups by backend and result (hit or miss).', None),
+    'api_cache_total': (
+        'counter', 'Response, conditional GET and staff lookup cache results.', None),
+    'api_pagination_depth': (
+        'histogram', 'Page number requested from page-number paginated lists.', PAGE_BUCKETS),
+    'api_cursor_pages_total': (
+        'counter', 'Keyset-paginated pages by view and position (first or continued).', None),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms for this process, labelled like Prometheus
+    metrics and rendered in its text exposition format.
+
+    With METRICS_DIR set, each process writes its values to <pid>.json in
+    that directory, at most every METRICS_FLUSH_INTERVAL seconds from a
+    background thread, and collect() sums the files of every process. So
+    a scrape answered by any gunicorn worker covers all of them, lagging
+    by up to one interval. Empty the directory when the server starts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._counters = {}
+        self._histograms = {}
+        self._dirty = False
+        self._flusher = None
+
+    def _check_process(self):
+        # A forked worker starts from zero rather than re-reporting what
+        # the parent counted, and needs its own flush thread
+        if self._pid != os.getpid():
+            self._reset()
+        if self._flusher is None and self.directory is not None:
+            self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+            self._flusher.start()
+
+    @property
+    def directory(self):
+        directory = getattr(settings, 'METRICS_DIR', None)
+        return Path(directory) if directory else None
+
+    def inc(self, name, amount=1, **labels):
+        if METRICS[name][0] != 'counter':
+            raise ValueError(f'{name} is not a counter')
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._check_process()
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._dirty = True
+
+    def observe(self, name, value, **labels):
+        kind, _, buckets = METRICS[name]
+        if kind != 'histogram':
+            raise ValueError(f'{name} is not a histogram')
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._check_process()
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(buckets) + 1), 0, 0]
+            counts = histogram[0]
+            # Per-bucket counts; render() makes them cumulative
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            histogram[1] += value
+            histogram[2] += 1
+            self._dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self._counters.items()],
+                'histograms': [
+                    [name, labels, list(counts), total, count]
+                    for (name, labels), (counts, total, count) in self._histograms.items()
+                ],
+            }
+
+    def flush(self):
+        """
+        Write this process's values to METRICS_DIR, replacing its last file.
+        """
+        directory = self.directory
+        if directory is None:
+            return
+        with self._lock:
+            self._dirty = False
+        directory.mkdir(parents=True, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temporary, directory / f'{os.getpid()}.json')
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0))
+            if self._dirty:
+                try:
+                    self.flush()
+                except OSError:
+                    pass
+
+    def collect(self):
+        """
+        Counters and histograms summed over every process that wrote to
+        METRICS_DIR, or this process's alone without one.
+        """
+        directory = self.directory
+        if directory is None:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            snapshots = []
+            for path in directory.glob('*.json'):
+                try:
+                    snapshots.append(json.loads(path.read_text(encoding='utf-8')))
+                except (OSError, ValueError):
+                    # A file replaced or removed while we read it
+                    continue
+
+        counters = {}
+        histograms = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, counts, total, count in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [[0] * len(counts), 0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+        return counters, histograms
+
+    def render(self):
+        """
+        Prometheus text exposition (format 0.0.4) of collect().
+        """
+        counters, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip((*buckets, math.inf), counts):
+                    cumulative += bucket_count
+                    le = (('le', _format_value(bound)),)
+                    lines.append(f'{name}_bucket{_format_labels(labels, le)} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+                lines.append(f'{name}_count{_format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._dirty = False
+
+
+registry = MetricsRegistry()
+
+
+def record_cache(cache_name, hit):
+    """
+    Count a lookup in one of the app's caches for api_cache_total.
+    """
+    if getattr(settings, 'METRICS_ENABLED', True):
+        registry.inc('api_cache_total', cache=cache_name, result='hit' if hit else 'miss')
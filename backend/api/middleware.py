@@ -0,0 +1,223 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.pagination import PageNumberPagination
+
+from .metrics import registry
+from .pagination import KeysetPagination
+from .slowqueries import SlowQueryRecorder
+
+logger = logging.getLogger('api.sql')
+
+# Placeholder lists, so "IN (%s, %s)" and "IN (%s, %s, %s)" share a signature
+PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+
+
+def query_signature(sql):
+    """
+    The statement with its parameter list collapsed. Django passes SQL with
+    %s placeholders to execute wrappers, so queries that differ only in
+    their parameters already share the text.
+    """
+    return PLACEHOLDER_LIST.sub('%s...', sql)
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper() callable that counts and times queries
+    and tallies their signatures.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.signatures[query_signature(sql)] += 1
+
+    def duplicates(self, threshold):
+        """
+        [(signature, count)] for statements run at least `threshold` times,
+        the usual sign of an N+1 loop.
+        """
+        return [(sql, count) for sql, count in self.signatures.most_common() if count >= threshold]
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Counts and times the SQL a sampled request runs and reports it as
+    Server-Timing entries (`db`, plus `db-dup` for repeated statements)
+    and as a JSON line on the `api.sql` logger: INFO normally, WARNING
+    when a statement repeats SQL_DUPLICATE_THRESHOLD times or more.
+
+    SQL_INSTRUMENTATION_SAMPLE_RATE is the fraction of requests measured;
+    the rest only pay for one random() call. Queries run while a streaming
+    response is consumed are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, 'SQL_INSTRUMENTATION_SAMPLE_RATE', 0)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        duplicates = recorder.duplicates(getattr(settings, 'SQL_DUPLICATE_THRESHOLD', 3))
+        self.add_server_timing(response, recorder, duplicates, duration)
+        self.log(request, response, recorder, duplicates, duration)
+        return response
+
+    def add_server_timing(self, response, recorder, duplicates, duration):
+        entries = [
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"',
+            f'app;dur={duration * 1000:.1f}',
+        ]
+        if duplicates:
+            repeated = sum(count for _, count in duplicates)
+            entries.append(f'db-dup;desc="{len(duplicates)} statements repeated {repeated} times"')
+        if response.has_header('Server-Timing'):
+            entries.insert(0, response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(entries)
+
+    def log(self, request, response, recorder, duplicates, duration):
+        level = logging.WARNING if duplicates else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        logger.log(level, json.dumps({
+            'event': 'sql',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 2),
+            'duration_ms': round(duration * 1000, 2),
+            'duplicates': [{'sql': sql[:300], 'count': count} for sql, count in duplicates],
+        }))
+
+
+class QueryCounter:
+    """
+    The cheapest execute wrapper: a query count, for every request.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def view_labels(request, response=None):
+    """
+    (view, action) naming the code that served a request, without anything
+    from the URL that would make label values unbounded. @api_view
+    functions are named after the function.
+    """
+    view = (getattr(response, 'renderer_context', None) or {}).get('view')
+    if view is not None:
+        return type(view).__name__, getattr(view, 'action', None) or request.method.lower()
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved', request.method.lower()
+    func = getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None) or match.func
+    # Viewset routes map methods to actions
+    actions = getattr(match.func, 'actions', None) or {}
+    method = request.method.lower()
+    return getattr(func, '__name__', 'unknown'), actions.get(method, method)
+
+
+class MetricsMiddleware:
+    """
+    Records request counts, latency and query-count histograms per DRF
+    view and action, the authentication backend used and pagination depth
+    in api.metrics.registry, which /api/metrics serves. METRICS_ENABLED
+    turns it off.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        view, action = view_labels(request, response)
+        registry.inc('api_requests_total', view=view, action=action,
+                     method=request.method, status=response.status_code)
+        registry.observe('api_request_duration_seconds', duration, view=view, action=action)
+        registry.observe('api_request_queries', counter.count, view=view, action=action)
+        self.record_view_details(response, view)
+        return response
+
+    def record_view_details(self, response, view_name):
+        context = getattr(response, 'renderer_context', None) or {}
+        drf_request = context.get('request')
+        # Read what authentication found without triggering it
+        if drf_request is not None and '_user' in drf_request.__dict__:
+            authenticator = drf_request.__dict__.get('_authenticator')
+            registry.inc('api_auth_requests_total',
+                         backend=type(authenticator).__name__ if authenticator else 'anonymous')
+
+        # GenericAPIView.paginator caches the paginator it used
+        paginator = getattr(context.get('view'), '_paginator', None)
+        if isinstance(paginator, PageNumberPagination) and getattr(paginator, 'page', None):
+            registry.observe('api_pagination_depth', paginator.page.number, view=view_name)
+        elif isinstance(paginator, KeysetPagination) and hasattr(paginator, 'page'):
+            position = 'continued' if drf_request.query_params.get(paginator.cursor_query_param) else 'first'
+            registry.inc('api_cursor_pages_total', view=view_name, position=position)
+
+
+class SlowQueryMiddleware:
+    """
+    Captures statements slower than SLOW_QUERY_THRESHOLD_MS, with their
+    EXPLAIN plans, into api.slowqueries.slow_query_log and the
+    api.slow_queries logger (logs/slow_queries.log when logs/ exists).
+    A threshold of 0 turns it off.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 0)
+        if threshold <= 0:
+            return self.get_response(request)
+        # Resolved when a query is captured, since URL resolution happens
+        # after the middleware starts
+        recorder = SlowQueryRecorder(request, lambda: '.'.join(view_labels(request)), threshold)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            return self.get_response(request)
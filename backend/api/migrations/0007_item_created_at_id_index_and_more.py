@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_alter_category_options_alter_item_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['created_at', 'id'], name='api_item_created_87b2f7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffitemassignment',
+            index=models.Index(fields=['assigned_date', 'id'], name='api_staffit_assigne_0ac616_idx'),
+        ),
+    ]
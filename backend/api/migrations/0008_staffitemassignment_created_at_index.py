@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_item_created_at_id_index_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='staffitemassignment',
+            index=models.Index(fields=['created_at'], name='api_staffit_created_8a92ce_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:39
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    Item = apps.get_model('api', 'Item')
+    Staff = apps.get_model('api', 'Staff')
+    DashboardCounter = apps.get_model('api', 'DashboardCounter')
+
+    totals = {'total_items': 0, 'total_staff': 0, 'assigned_items': 0}
+    rows = []
+    for row in Item.objects.values('category_id').annotate(count=Count('id')).order_by():
+        totals['total_items'] += row['count']
+        key = '' if row['category_id'] is None else str(row['category_id'])
+        rows.append(DashboardCounter(kind='category_items', key=key, value=row['count']))
+
+    departments = (
+        Staff.objects.values('department')
+        .annotate(
+            staff_count=Count('id', distinct=True),
+            open_count=Count('assignments', filter=Q(assignments__return_date__isnull=True)),
+        )
+        .order_by()
+    )
+    for row in departments:
+        totals['total_staff'] += row['staff_count']
+        if row['open_count']:
+            totals['assigned_items'] += row['open_count']
+            rows.append(DashboardCounter(
+                kind='department_assignments', key=row['department'], value=row['open_count']
+            ))
+
+    rows.extend(DashboardCounter(kind=kind, key='', value=value) for kind, value in totals.items())
+    DashboardCounter.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_staffitemassignment_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('total_items', 'Total items'), ('total_staff', 'Total staff'), ('assigned_items', 'Open assignments'), ('category_items', 'Items per category'), ('department_assignments', 'Open assignments per department')], max_length=40)),
+                ('key', models.CharField(blank=True, default='', max_length=200)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('kind', 'key')},
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+from django.db import migrations
+
+# Item does not declare the search column/table as fields: on Postgres a
+# generated tsvector column with a GIN index, on SQLite an FTS5 table kept
+# in sync by triggers. Other backends fall back to icontains matching.
+# The DDL is spelled out here rather than imported so the migration keeps
+# doing what it did when written; api.search has its own copy of the
+# SQLite triggers for restoring them after table rebuilds.
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE api_item ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple',
+            coalesce(model, '') || ' ' || coalesce(serial_number, '') || ' ' || coalesce(tag_number, '')
+        ), 'B') ||
+        setweight(to_tsvector('simple', coalesce(notes, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX api_item_search_vector_gin ON api_item USING GIN (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS api_item_search_vector_gin",
+    "ALTER TABLE api_item DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE api_item_fts USING fts5(
+        name, model, serial_number, tag_number, notes,
+        content='api_item', content_rowid='id', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER api_item_fts_insert AFTER INSERT ON api_item BEGIN
+        INSERT INTO api_item_fts(rowid, name, model, serial_number, tag_number, notes)
+        VALUES (new.id, new.name, new.model, new.serial_number, new.tag_number, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER api_item_fts_delete AFTER DELETE ON api_item BEGIN
+        INSERT INTO api_item_fts(api_item_fts, rowid, name, model, serial_number, tag_number, notes)
+        VALUES ('delete', old.id, old.name, old.model, old.serial_number, old.tag_number, old.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER api_item_fts_update AFTER UPDATE OF name, model, serial_number, tag_number, notes ON api_item BEGIN
+        INSERT INTO api_item_fts(api_item_fts, rowid, name, model, serial_number, tag_number, notes)
+        VALUES ('delete', old.id, old.name, old.model, old.serial_number, old.tag_number, old.notes);
+        INSERT INTO api_item_fts(rowid, name, model, serial_number, tag_number, notes)
+        VALUES (new.id, new.name, new.model, new.serial_number, new.tag_number, new.notes);
+    END
+    """,
+    # bm25() column weights, used as the table's rank function
+    "INSERT INTO api_item_fts(api_item_fts, rank) VALUES ('rank', 'bm25(10.0, 4.0, 4.0, 4.0, 1.0)')",
+    # Index the rows that already exist
+    "INSERT INTO api_item_fts(api_item_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS api_item_fts_update",
+    "DROP TRIGGER IF EXISTS api_item_fts_delete",
+    "DROP TRIGGER IF EXISTS api_item_fts_insert",
+    "DROP TABLE IF EXISTS api_item_fts",
+]
+
+
+def _run(schema_editor, postgres, sqlite):
+    vendor = schema_editor.connection.vendor
+    statements = {'postgresql': postgres, 'sqlite': sqlite}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, POSTGRES_FORWARD, SQLITE_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, POSTGRES_REVERSE, SQLITE_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
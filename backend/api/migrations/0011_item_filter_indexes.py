@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-17 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_item_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['date_of_purchase'], name='api_item_date_of_1697ec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['purchase_price'], name='api_item_purchas_ff95d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffitemassignment',
+            index=models.Index(fields=['item', 'return_date'], name='api_staffit_item_id_024b8f_idx'),
+        ),
+    ]
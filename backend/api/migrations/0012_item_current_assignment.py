@@ -0,0 +1,51 @@
+# Generated by Django 5.0.6 on 2026-10-17 07:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_current_assignments(apps, schema_editor):
+    Item = apps.get_model('api', 'Item')
+    StaffItemAssignment = apps.get_model('api', 'StaffItemAssignment')
+    newest_open = (
+        StaffItemAssignment.objects.filter(item=OuterRef('pk'), return_date__isnull=True)
+        .order_by('-id').values('id')[:1]
+    )
+    Item.objects.update(current_assignment=Subquery(newest_open))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_item_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='staffitemassignment',
+            name='api_staffit_item_id_024b8f_idx',
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='current_assignment',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.staffitemassignment'),
+        ),
+        migrations.AddIndex(
+            model_name='staffitemassignment',
+            index=models.Index(condition=models.Q(('return_date__isnull', True)), fields=['item', 'id'], name='api_assignment_open_item_idx'),
+        ),
+        migrations.RunPython(backfill_current_assignments, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('current_assignment__isnull', False)), fields=['current_assignment'], name='api_item_assignment_ptr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('current_assignment__isnull', True)), fields=['created_at', 'id'], name='api_item_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('current_assignment__isnull', False)), fields=['created_at', 'id'], name='api_item_assigned_idx'),
+        ),
+    ]
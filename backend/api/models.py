@@ -1,5 +1,5 @@
 # inventory_management/backend/api/models.py
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from .validators import (
     validate_serial_number, validate_tag_number, validate_positive_price,
@@ -7,8 +7,51 @@ from .validators import (
     validate_department_name
 )
 
+# This mixin remembers the stored values of `tracked_fields` and saves
+# atomically, so the handlers in signals.py can see what a save changed and
+# update the dashboard counters in the same transaction as the row.
+class TrackedModelMixin:
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values)
+            if name in cls.tracked_fields
+        }
+        return instance
+
+    def snapshot_loaded_values(self):
+        """
+        Make sure every tracked field's stored value is known before the row
+        is overwritten, fetching any that were deferred or never loaded.
+        """
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        missing = [name for name in self.tracked_fields if name not in loaded]
+        if missing and self.pk is not None:
+            row = type(self)._base_manager.filter(pk=self.pk).values(*missing).first()
+            if row is not None:
+                loaded.update(row)
+
+    def loaded_value(self, attname):
+        return self._loaded_values.get(attname)
+
+    def remember_loaded_values(self):
+        self._loaded_values = {name: getattr(self, name) for name in self.tracked_fields}
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.remember_loaded_values()
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 # This is a model for inventory items.
-class Item(models.Model):
+class Item(TrackedModelMixin, models.Model):
+    tracked_fields = ('category_id',)
+
     name = models.CharField(
         max_length=200,
         validators=[validate_item_name],
@@ -44,20 +87,68 @@ class Item(models.Model):
         help_text="Purchase price must be greater than 0"
     )
     notes = models.TextField(blank=True, null=True)
+    # Newest open assignment of this item, or null when it is available.
+    # Maintained by the assignment signals; see availability.py.
+    current_assignment = models.ForeignKey(
+        'StaffItemAssignment',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        db_index=False,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['name']),
             models.Index(fields=['serial_number']),
             models.Index(fields=['tag_number']),
+            # Keyset pagination seeks on (created_at, id)
+            models.Index(fields=['created_at', 'id']),
+            # List filters (category and supplier use their FK indexes)
+            models.Index(fields=['date_of_purchase']),
+            models.Index(fields=['purchase_price']),
+            # Partial indexes on the assignment pointer. Most items are
+            # available, so the pointer itself is only indexed where set,
+            # and each status gets an index in list order.
+            models.Index(
+                fields=['current_assignment'],
+                condition=models.Q(current_assignment__isnull=False),
+                name='api_item_assignment_ptr_idx',
+            ),
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(current_assignment__isnull=True),
+                name='api_item_available_idx',
+            ),
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(current_assignment__isnull=False),
+                name='api_item_assigned_idx',
+            ),
         ]
     
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Leave current_assignment out of plain updates so a stale copy of
+        # the item cannot overwrite the pointer the signals maintain.
+        if (not self._state.adding and not args and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name != 'current_assignment'
+            ]
+        super().save(*args, **kwargs)
+
 # This is a model for item categories.
 class Category(models.Model):
     name = models.CharField(
@@ -95,7 +186,9 @@ class Supplier(models.Model):
         return self.name
 
 # This is a standalone staff profile model.
-class Staff(models.Model):
+class Staff(TrackedModelMixin, models.Model):
+    tracked_fields = ('department',)
+
     # This is a new field to store the staff member's name.
     name = models.CharField(max_length=200)
     email = models.EmailField(
@@ -121,7 +214,9 @@ class Staff(models.Model):
         return self.name
 
 # This model tracks which item is assigned to which staff member.
-class StaffItemAssignment(models.Model):
+class StaffItemAssignment(TrackedModelMixin, models.Model):
+    tracked_fields = ('staff_id', 'item_id', 'return_date')
+
     staff = models.ForeignKey(Staff, on_delete=models.CASCADE, related_name='assignments')
     item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='assignments')
     assigned_date = models.DateField(auto_now_add=True)
@@ -136,7 +231,45 @@ class StaffItemAssignment(models.Model):
         indexes = [
             models.Index(fields=['assigned_date']),
             models.Index(fields=['staff', 'assigned_date']),
+            # Keyset pagination seeks on (assigned_date, id)
+            models.Index(fields=['assigned_date', 'id']),
+            # Dashboard recent activity reads the newest rows
+            models.Index(fields=['created_at']),
+            # Open assignments by item, for keeping Item.current_assignment
+            models.Index(
+                fields=['item', 'id'],
+                condition=models.Q(return_date__isnull=True),
+                name='api_assignment_open_item_idx',
+            ),
         ]
 
     def __str__(self):
         return f"{self.item.name} assigned to {self.staff.name}"
+
+
+# This model holds incrementally maintained rollups for the dashboard.
+class DashboardCounter(models.Model):
+    TOTAL_ITEMS = 'total_items'
+    TOTAL_STAFF = 'total_staff'
+    ASSIGNED_ITEMS = 'assigned_items'
+    CATEGORY_ITEMS = 'category_items'
+    DEPARTMENT_ASSIGNMENTS = 'department_assignments'
+    KIND_CHOICES = [
+        (TOTAL_ITEMS, 'Total items'),
+        (TOTAL_STAFF, 'Total staff'),
+        (ASSIGNED_ITEMS, 'Open assignments'),
+        (CATEGORY_ITEMS, 'Items per category'),
+        (DEPARTMENT_ASSIGNMENTS, 'Open assignments per department'),
+    ]
+
+    kind = models.CharField(max_length=40, choices=KIND_CHOICES)
+    # Category id or department name; empty for totals and uncategorized items
+    key = models.CharField(max_length=200, blank=True, default='')
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['kind', 'key']
+
+    def __str__(self):
+        return f"{self.kind}[{self.key}] = {self.value}"
@@ -0,0 +1,164 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a (column, id) pair.
+
+    Each page is fetched with a `WHERE (column, id) < (last_column, last_id)`
+    seek on a composite index instead of OFFSET, and no COUNT(*) is issued,
+    so every page costs the same however deep it is. Because the cursor
+    points at a row rather than a position, rows inserted while a client is
+    paging are never skipped or repeated.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering):
+        # e.g. ('-created_at', '-id'); the last column must be unique
+        self.ordering = tuple(ordering)
+        self.key_field = self.ordering[0].lstrip('-')
+        self.descending = self.ordering[0].startswith('-')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model_field = queryset.model._meta.get_field(self.key_field)
+
+        position, reverse = self.decode_cursor(request)
+
+        # Walking backwards means flipping both the seek and the sort.
+        descending = self.descending != reverse
+        if descending:
+            ordering = ['-' + self.key_field, '-pk']
+        else:
+            ordering = [self.key_field, 'pk']
+        queryset = queryset.order_by(*ordering)
+
+        if position is not None:
+            value, pk = position
+            lookup = 'lt' if descending else 'gt'
+            # The outer range bound on the key column lets the (column, id)
+            # index do a range seek; the OR alone makes it scan from the
+            # start of the index.
+            queryset = queryset.filter(
+                Q(**{f'{self.key_field}__{lookup}e': value}) & (
+                    Q(**{f'{self.key_field}__{lookup}': value}) |
+                    Q(**{self.key_field: value, f'pk__{lookup}': pk})
+                )
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            value = self.model_field.to_python(payload['v'])
+            pk = int(payload['p'])
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError, DjangoValidationError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return (value, pk), reverse
+
+    def encode_cursor(self, obj, reverse):
+        # Pages hold model instances, or .values() rows with a 'pk' key
+        if isinstance(obj, dict):
+            value, pk = obj[self.key_field], obj['pk']
+        else:
+            value, pk = getattr(obj, self.key_field), obj.pk
+        payload = {'v': value.isoformat() if hasattr(value, 'isoformat') else value, 'p': pk}
+        if reverse:
+            payload['r'] = True
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """
+    Lets a viewset's list action opt in to keyset pagination.
+
+    Clients ask for it with `?pagination=cursor` (or by sending any `cursor`
+    parameter); otherwise the default page-number pagination is used.
+    """
+    keyset_ordering = None
+
+    def use_keyset_pagination(self):
+        params = self.request.query_params
+        return params.get('pagination') == 'cursor' or 'cursor' in params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.keyset_ordering and self.use_keyset_pagination():
+                self._paginator = KeysetPagination(self.keyset_ordering)
+            else:
+                self._paginator = None if self.pagination_class is None else self.pagination_class()
+        return self._paginator
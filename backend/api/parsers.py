@@ -0,0 +1,51 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser that decodes with orjson when it is installed and the body
+    is UTF-8. Like JSONParser with STRICT_JSON, NaN and Infinity are
+    rejected.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+def _reject_ext_type(code, data):
+    raise ParseError('MessagePack parse error - extension type %d is not supported' % code)
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses MessagePack request bodies (Content-Type: application/msgpack).
+
+    Only what a JSON body could hold gets through: map keys must be
+    strings and extension types are rejected, except timestamps, which
+    become aware datetimes.
+    """
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(
+                stream.read(), raw=False, strict_map_key=True, timestamp=3,
+                ext_hook=_reject_ext_type,
+            )
+        # TypeError: unhashable keys, which strict_map_key should already stop
+        except (ValueError, TypeError, msgpack.ExtraData, msgpack.FormatError,
+                msgpack.StackError) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .identity import request_staff_id
+
 class IsAdminOrReadOnly(permissions.BasePermission):
     """
     Custom permission to only allow admins to edit objects.
@@ -59,13 +61,9 @@ class IsStaffAssignmentOwnerOrAdmin(permissions.BasePermission):
         
         # Staff can only view their own assignments
         if request.method in permissions.SAFE_METHODS:
-            # Check if the user has a corresponding Staff record
-            from .models import Staff
-            try:
-                staff = Staff.objects.get(email=request.user.email)
-                return obj.staff == staff
-            except Staff.DoesNotExist:
-                return False
+            # Same lookup as the viewset queryset, resolved once per request
+            staff_id = request_staff_id(request)
+            return staff_id is not None and obj.staff_id == staff_id
         
         # Only admins can create/update/delete assignments
         return False
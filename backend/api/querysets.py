@@ -0,0 +1,49 @@
+from rest_framework import serializers
+
+
+def _collect_query_plan(serializer, prefix, only_fields, related):
+    """
+    Walk the readable fields of a serializer and record the model columns
+    and forward relations that rendering it will touch.
+    """
+    model = serializer.Meta.model
+    concrete = {f.name: f for f in model._meta.concrete_fields}
+
+    # The primary key is always needed to build model instances.
+    only_fields.add(prefix + model._meta.pk.name)
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        source = field.source.split('.')[0]
+        model_field = concrete.get(source)
+        if model_field is None:
+            continue
+
+        if isinstance(field, serializers.ModelSerializer) and model_field.is_relation:
+            # Nested single object: join it in and keep walking.
+            related.append(prefix + source)
+            only_fields.add(prefix + source)
+            _collect_query_plan(field, prefix + source + '__', only_fields, related)
+        else:
+            only_fields.add(prefix + source)
+
+
+def eager_load(queryset, serializer, keep=()):
+    """
+    Shape a queryset after what `serializer` will render.
+
+    Nested forward relations are joined with select_related() and every
+    column the serializer never reads is deferred, so rendering a page costs
+    one query regardless of how many rows it holds. Columns in `keep` (such
+    as pagination keys) are loaded even if the serializer does not render
+    them.
+    """
+    only_fields = set(keep)
+    related = []
+    _collect_query_plan(serializer, '', only_fields, related)
+
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*sorted(only_fields))
@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional; FastJSONRenderer falls back to json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional; MessagePackRenderer is only registered with it
+    msgpack = None
+
+
+def encode_default(obj):
+    """
+    Convert what the encoders cannot handle natively (Decimal, lazy strings,
+    querysets, and for MessagePack dates and times) exactly as DRF's
+    JSONEncoder would.
+    """
+    return _drf_encoder.default(obj)
+
+
+_drf_encoder = JSONEncoder()
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renders a dict or a list of dicts as CSV.
+
+    Export actions stream their own body and never reach render(); this is
+    used for format negotiation and for error responses on those actions.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        buffer = io.StringIO()
+        fieldnames = list(rows[0].keys()) if rows else []
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders newline-delimited JSON, one object per line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(
+            json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows
+        ).encode(self.charset)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    The output matches JSONRenderer's compact form byte for byte for the
+    data this API renders: orjson handles dicts, lists, strings, numbers,
+    dates and UUIDs in C and hands everything else to DRF's encoder.
+    Indented output (?format=api, "; indent=4") and non-default JSON
+    settings use JSONRenderer itself.
+    """
+    orjson_options = (
+        (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=encode_default, option=self.orjson_options)
+        # Same escaping as JSONRenderer, so the output is valid JavaScript
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders MessagePack, for clients that send Accept: application/msgpack.
+    Values JSON would render as strings (Decimal, dates) are strings here too.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
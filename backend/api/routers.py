@@ -0,0 +1,14 @@
+from rest_framework.routers import DefaultRouter
+
+
+class BulkRouter(DefaultRouter):
+    """
+    DefaultRouter whose list routes also send PATCH and DELETE to the
+    viewset's bulk_update / bulk_destroy, when it has them (see
+    bulk.BulkUpdateDestroyMixin).
+    """
+    routes = [
+        route._replace(mapping={**route.mapping, 'patch': 'bulk_update', 'delete': 'bulk_destroy'})
+        if route.name == '{basename}-list' else route
+        for route in DefaultRouter.routes
+    ]
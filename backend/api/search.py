@@ -0,0 +1,139 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Item
+
+# Columns covered by the item search index, most important first. The DDL
+# in migration 0010 lists the same columns.
+SEARCH_COLUMNS = ('name', 'model', 'serial_number', 'tag_number', 'notes')
+
+# SQLite: external-content FTS5 table kept in sync by triggers
+FTS_TABLE = 'api_item_fts'
+# bm25() weights for SEARCH_COLUMNS, stored as the table's rank function
+FTS_WEIGHTS = (10.0, 4.0, 4.0, 4.0, 1.0)
+
+# Postgres: generated tsvector column with a GIN index
+SEARCH_VECTOR_COLUMN = 'search_vector'
+
+MAX_TERMS = 8
+
+# Triggers that keep the FTS table in step with api_item, as created by
+# migration 0010 (which also creates the table and sets FTS_WEIGHTS as its
+# rank function). Item does not declare these objects as fields.
+SQLITE_TRIGGERS = {
+    'api_item_fts_insert': """
+    CREATE TRIGGER api_item_fts_insert AFTER INSERT ON api_item BEGIN
+        INSERT INTO api_item_fts(rowid, name, model, serial_number, tag_number, notes)
+        VALUES (new.id, new.name, new.model, new.serial_number, new.tag_number, new.notes);
+    END
+    """,
+    'api_item_fts_delete': """
+    CREATE TRIGGER api_item_fts_delete AFTER DELETE ON api_item BEGIN
+        INSERT INTO api_item_fts(api_item_fts, rowid, name, model, serial_number, tag_number, notes)
+        VALUES ('delete', old.id, old.name, old.model, old.serial_number, old.tag_number, old.notes);
+    END
+    """,
+    'api_item_fts_update': """
+    CREATE TRIGGER api_item_fts_update AFTER UPDATE OF name, model, serial_number, tag_number, notes ON api_item BEGIN
+        INSERT INTO api_item_fts(api_item_fts, rowid, name, model, serial_number, tag_number, notes)
+        VALUES ('delete', old.id, old.name, old.model, old.serial_number, old.tag_number, old.notes);
+        INSERT INTO api_item_fts(rowid, name, model, serial_number, tag_number, notes)
+        VALUES (new.id, new.name, new.model, new.serial_number, new.tag_number, new.notes);
+    END
+    """,
+}
+
+SQLITE_REBUILD = "INSERT INTO api_item_fts(api_item_fts) VALUES ('rebuild')"
+
+
+def ensure_sqlite_triggers(connection):
+    """
+    SQLite rebuilds a table to alter it, which silently drops its triggers.
+    Recreate any that are missing after migrating and reindex, since writes
+    made without them never reached the FTS table.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+        )
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {row[0] for row in cursor.fetchall()}
+        if all(name in existing for name in SQLITE_TRIGGERS):
+            return
+        for name, statement in SQLITE_TRIGGERS.items():
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(statement)
+        cursor.execute(SQLITE_REBUILD)
+
+
+def search_terms(text):
+    """
+    Split user input into plain word terms. Operators and punctuation are
+    dropped, so the result is always a valid query on either backend.
+    """
+    return re.findall(r'\w+', text.lower())[:MAX_TERMS]
+
+
+def _postgres_search(queryset, terms, quote):
+    table = quote(Item._meta.db_table)
+    vector = f'{table}.{quote(SEARCH_VECTOR_COLUMN)}'
+    # Every term must match, each as a prefix ("lap" finds "laptop")
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    matches = RawSQL(
+        f"{vector} @@ to_tsquery('simple', %s)", (tsquery,), output_field=BooleanField()
+    )
+    rank = RawSQL(
+        f"ts_rank({vector}, to_tsquery('simple', %s))", (tsquery,), output_field=FloatField()
+    )
+    return queryset.filter(matches).annotate(search_rank=rank)
+
+
+def _sqlite_search(queryset, terms, quote):
+    table = quote(Item._meta.db_table)
+    fts = quote(FTS_TABLE)
+    match = ' '.join(f'"{term}"*' for term in terms)
+    # Join the FTS table on rowid so SQLite drives the query from the index
+    # and ranks in C; its `rank` column is bm25() with FTS_WEIGHTS (lower is
+    # better, so negate it to rank higher-first on both backends).
+    return queryset.extra(
+        select={'search_rank': f'-{fts}.rank'},
+        tables=[FTS_TABLE],
+        where=[f'{fts}.rowid = {table}.{quote("id")}', f'{fts} MATCH %s'],
+        params=[match],
+    )
+
+
+def _fallback_search(queryset, terms):
+    for term in terms:
+        condition = Q()
+        for column in SEARCH_COLUMNS:
+            condition |= Q(**{f'{column}__icontains': term})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def search_items(queryset, text):
+    """
+    Filter an Item queryset to rows matching `text` and order them by
+    relevance, using the database's full-text index.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    if connection.vendor == 'postgresql':
+        queryset = _postgres_search(queryset, terms, quote)
+    elif connection.vendor == 'sqlite':
+        queryset = _sqlite_search(queryset, terms, quote)
+    else:
+        return _fallback_search(queryset, terms)
+    return queryset.order_by('-search_rank', '-created_at', '-id')
@@ -0,0 +1,132 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from .models import Item, Category, Supplier, Staff, StaffItemAssignment
+from .counters import rebuild_counters
+from .cache import bump_model_version
+from .availability import sync_current_assignments
+
+DEPARTMENTS = [
+    'IT', 'Finance', 'Human Resources', 'Operations', 'Sales', 'Marketing',
+    'Legal', 'Research & Development', 'Customer Support', 'Facilities',
+]
+
+ITEM_KINDS = [
+    'Laptop', 'Monitor', 'Keyboard', 'Mouse', 'Docking Station', 'Headset',
+    'Phone', 'Tablet', 'Printer', 'Projector', 'Webcam', 'Router',
+]
+
+
+def _bulk_create(model, objects, batch_size):
+    created = []
+    for start in range(0, len(objects), batch_size):
+        with transaction.atomic():
+            created.extend(model.objects.bulk_create(objects[start:start + batch_size]))
+    return created
+
+
+def generate_dataset(items=1000, assignments=100, categories=20, suppliers=50,
+                     staff=500, seed=0, batch_size=5000, log=None):
+    """
+    Deterministically create a dataset of the given size with bulk_create().
+
+    The same arguments always produce the same rows, so results measured on
+    one machine can be reproduced on another. Expects the api tables to be
+    empty; see `flush_dataset`.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+
+    category_ids = [c.pk for c in _bulk_create(Category, [
+        Category(name=f"Category {i}", description=f"Seeded category {i}")
+        for i in range(categories)
+    ], batch_size)]
+    supplier_ids = [s.pk for s in _bulk_create(Supplier, [
+        Supplier(name=f"Supplier {i}", contact_info=f"supplier{i}@example.com")
+        for i in range(suppliers)
+    ], batch_size)]
+    staff_ids = [s.pk for s in _bulk_create(Staff, [
+        Staff(
+            name=f"Staff Member {i}",
+            email=f"staff{i}@example.com",
+            department=DEPARTMENTS[i % len(DEPARTMENTS)],
+        )
+        for i in range(staff)
+    ], batch_size)]
+    log(f"Created {categories} categories, {suppliers} suppliers, {staff} staff")
+
+    item_ids = []
+    first_purchase = date(2018, 1, 1)
+    for start in range(0, items, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, items)):
+            kind = ITEM_KINDS[i % len(ITEM_KINDS)]
+            batch.append(Item(
+                name=f"{kind} {i}",
+                model=f"{kind[:3].upper()}-{rng.randint(100, 999)}",
+                serial_number=f"SN{seed:02d}-{i:09d}",
+                tag_number=f"TAG{seed:02d}-{i:09d}",
+                date_of_purchase=first_purchase + timedelta(days=rng.randint(0, 2500)),
+                purchase_price=Decimal(rng.randint(500, 500000)) / 100,
+                notes=f"Seeded {kind.lower()} number {i}" if rng.random() < 0.3 else None,
+                category_id=rng.choice(category_ids) if category_ids else None,
+                supplier_id=rng.choice(supplier_ids) if supplier_ids else None,
+            ))
+        with transaction.atomic():
+            item_ids.extend(item.pk for item in Item.objects.bulk_create(batch))
+        log(f"Created {len(item_ids)}/{items} items")
+
+    assignments = min(assignments, len(item_ids)) if staff_ids else 0
+    assigned_items = rng.sample(item_ids, assignments)
+    created = 0
+    for start in range(0, assignments, batch_size):
+        batch = []
+        for item_id in assigned_items[start:start + batch_size]:
+            returned = rng.random() < 0.2
+            batch.append(StaffItemAssignment(
+                staff_id=rng.choice(staff_ids),
+                item_id=item_id,
+                return_date=date(2024, 1, 1) + timedelta(days=rng.randint(0, 365)) if returned else None,
+                notes=None,
+            ))
+        with transaction.atomic():
+            StaffItemAssignment.objects.bulk_create(batch)
+        created += len(batch)
+        log(f"Created {created}/{assignments} assignments")
+
+    # bulk_create() bypasses the signals that maintain counters, item
+    # pointers and caches
+    with transaction.atomic():
+        sync_current_assignments(assigned_items)
+    rebuild_counters()
+    for model in (Category, Supplier, Staff, Item, StaffItemAssignment):
+        bump_model_version(model)
+
+    return {
+        'categories': len(category_ids),
+        'suppliers': len(supplier_ids),
+        'staff': len(staff_ids),
+        'items': len(item_ids),
+        'assignments': created,
+    }
+
+
+def flush_dataset():
+    """
+    Delete every inventory row (users and tokens are left alone).
+
+    Each table is emptied with a single DELETE, so no post_delete signals
+    run: the dashboard counters are rebuilt from the now empty tables
+    afterwards and the cache versions bumped here instead.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Children first; Item.current_assignment points back at
+            # assignments, but the constraints are only checked on commit
+            for model in (StaffItemAssignment, Item, Staff, Category, Supplier):
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+                bump_model_version(model)
+        rebuild_counters()
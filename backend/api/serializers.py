@@ -49,7 +49,7 @@ class ItemSerializer(serializers.ModelSerializer):
             'id', 'name', 'model', 'serial_number', 'tag_number',
             'date_of_purchase', 'purchase_price', 'notes',  # ✅ Added
             'supplier_id', 'category_id',
-            'category', 'supplier',
+            'category', 'supplier', 'current_assignment',
             'created_at', 'updated_at'
         ]
 
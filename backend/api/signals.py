@@ -0,0 +1,168 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import counters
+from .availability import sync_current_assignments
+from .authentication import invalidate_token
+from .cache import bump_model_version
+from .models import Item, Category, Supplier, Staff, StaffItemAssignment, DashboardCounter
+
+
+@receiver(pre_save, sender=Item)
+@receiver(pre_save, sender=Staff)
+@receiver(pre_save, sender=StaffItemAssignment)
+def snapshot_tracked_fields(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance.snapshot_loaded_values()
+
+
+@receiver(pre_delete, sender=Item)
+@receiver(pre_delete, sender=StaffItemAssignment)
+def snapshot_deleted_fields(sender, instance, **kwargs):
+    # Once the row is gone a deferred field can no longer be loaded, so
+    # the post_delete receivers read the stored values captured here
+    instance.snapshot_loaded_values()
+
+
+def _department_of(instance, staff_id):
+    """
+    Department of `staff_id`, reusing the assignment's cached staff if it
+    is the same row.
+    """
+    cached = instance._state.fields_cache.get('staff')
+    if cached is not None and cached.pk == staff_id:
+        return cached.department
+    return Staff.objects.filter(pk=staff_id).values_list('department', flat=True).first()
+
+
+# Items
+
+@receiver(post_save, sender=Item)
+def item_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.apply_deltas(counters.item_deltas([instance.category_id]))
+    else:
+        old_category_id = instance.loaded_value('category_id')
+        if old_category_id != instance.category_id:
+            deltas = counters.item_deltas([old_category_id], sign=-1)
+            deltas.update(counters.item_deltas([instance.category_id]))
+            counters.apply_deltas(deltas)
+    instance.remember_loaded_values()
+
+
+@receiver(post_delete, sender=Item)
+def item_deleted(sender, instance, **kwargs):
+    counters.apply_deltas(counters.item_deltas([instance.loaded_value('category_id')], sign=-1))
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    # Its items were moved to "uncategorized" with a SET NULL update that
+    # sends no item signals, so move the count the same way.
+    counters.uncategorize([instance.pk])
+
+
+# Staff
+
+@receiver(post_save, sender=Staff)
+def staff_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.apply_deltas({(DashboardCounter.TOTAL_STAFF, ''): 1})
+    else:
+        old_department = instance.loaded_value('department')
+        if old_department != instance.department:
+            open_count = instance.assignments.filter(return_date__isnull=True).count()
+            counters.apply_deltas({
+                (DashboardCounter.DEPARTMENT_ASSIGNMENTS, old_department): -open_count,
+                (DashboardCounter.DEPARTMENT_ASSIGNMENTS, instance.department): open_count,
+            })
+    instance.remember_loaded_values()
+
+
+@receiver(post_delete, sender=Staff)
+def staff_deleted(sender, instance, **kwargs):
+    # Its assignments were deleted first and sent their own signals
+    counters.apply_deltas({(DashboardCounter.TOTAL_STAFF, ''): -1})
+
+
+# Assignments
+
+@receiver(post_save, sender=StaffItemAssignment)
+def assignment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_open = not created and instance.loaded_value('return_date') is None
+    old_staff_id = None if created else instance.loaded_value('staff_id')
+    is_open = instance.return_date is None
+
+    if was_open != is_open or (is_open and old_staff_id != instance.staff_id):
+        deltas = Counter()
+        if was_open:
+            deltas.update(counters.open_assignment_deltas(
+                [_department_of(instance, old_staff_id)], sign=-1
+            ))
+        if is_open:
+            deltas.update(counters.open_assignment_deltas(
+                [_department_of(instance, instance.staff_id)]
+            ))
+        counters.apply_deltas(deltas)
+
+    old_item_id = None if created else instance.loaded_value('item_id')
+    if was_open != is_open or old_item_id != instance.item_id:
+        sync_current_assignments([old_item_id, instance.item_id])
+    instance.remember_loaded_values()
+
+
+@receiver(post_delete, sender=StaffItemAssignment)
+def assignment_deleted(sender, instance, **kwargs):
+    if instance.loaded_value('return_date') is None:
+        counters.apply_deltas(counters.open_assignment_deltas(
+            [_department_of(instance, instance.loaded_value('staff_id'))], sign=-1
+        ))
+        # The delete cleared the item's pointer; fall back to any other
+        # open assignment it still has
+        sync_current_assignments([instance.loaded_value('item_id')])
+
+
+# Response cache
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Supplier)
+@receiver(post_save, sender=Staff)
+@receiver(post_save, sender=StaffItemAssignment)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_delete, sender=Staff)
+@receiver(post_delete, sender=StaffItemAssignment)
+@receiver(post_delete, sender=User)
+def invalidate_cached_responses(sender, **kwargs):
+    bump_model_version(sender)
+
+
+# Token authentication cache
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, raw=False, **kwargs):
+    # Deactivation, permission and email changes must reach cached users
+    if raw:
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # Logout deletes the token; deleting a user cascades here too
+    invalidate_token(instance.key)
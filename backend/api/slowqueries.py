@@ -0,0 +1,121 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger('api.slow_queries')
+
+# Statements worth a plan; EXPLAIN of anything else is either unsupported or
+# not what the slow log is for
+EXPLAINABLE = ('SELECT', 'WITH')
+
+
+class SlowQueryLog:
+    """
+    Thread-safe ring buffer of this process's most recent slow queries,
+    holding SLOW_QUERY_BUFFER_SIZE entries.
+    """
+
+    def __init__(self):
+        self._entries = deque()
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        size = getattr(settings, 'SLOW_QUERY_BUFFER_SIZE', 100)
+        with self._lock:
+            if self._entries.maxlen != size:
+                self._entries = deque(self._entries, maxlen=size)
+            self._entries.append(entry)
+
+    def entries(self):
+        """
+        The buffered entries, newest first.
+        """
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def explain(connection, sql, params):
+    """
+    The database's plan for `sql` (EXPLAIN on Postgres, EXPLAIN QUERY PLAN
+    on SQLite) as text, or None for statements that are not queries.
+    Runs in a savepoint so a failing EXPLAIN cannot break the caller's
+    transaction on Postgres.
+    """
+    if not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                rows = cursor.fetchall()
+    except DatabaseError as e:
+        return f'EXPLAIN failed: {e}'
+    # Postgres returns one text column per line, SQLite (id, parent,
+    # notused, detail)
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+class SlowQueryRecorder:
+    """
+    connection.execute_wrapper() callable that captures every statement
+    taking SLOW_QUERY_THRESHOLD_MS or longer: SQL, parameters, timing, the
+    view running it and its EXPLAIN plan, at most SLOW_QUERY_MAX_EXPLAINS
+    plans per request.
+    """
+
+    def __init__(self, request, describe_view, threshold_ms):
+        self.request = request
+        self.describe_view = describe_view
+        self.threshold = threshold_ms / 1000
+        self.explains_left = getattr(settings, 'SLOW_QUERY_MAX_EXPLAINS', 3)
+        self._capturing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # The EXPLAIN and its savepoint run through this wrapper too
+        if self._capturing:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        if duration >= self.threshold:
+            self._capturing = True
+            try:
+                self.capture(context['connection'], sql, params, many, duration)
+            finally:
+                self._capturing = False
+        return result
+
+    def capture(self, connection, sql, params, many, duration):
+        plan = None
+        if not many and self.explains_left > 0:
+            self.explains_left -= 1
+            plan = explain(connection, sql, params)
+        capture_params = getattr(settings, 'SLOW_QUERY_CAPTURE_PARAMS', True)
+        entry = {
+            'time': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': round(duration * 1000, 2),
+            'database': connection.vendor,
+            'view': self.describe_view(),
+            'method': self.request.method,
+            'path': self.request.path,
+            'sql': sql,
+            'params': repr(params)[:1000] if capture_params else None,
+            'many': many,
+            'plan': plan,
+        }
+        slow_query_log.add(entry)
+        logger.warning(json.dumps(entry))
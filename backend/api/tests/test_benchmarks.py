@@ -0,0 +1,123 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.contrib.auth.models import User
+from django.test import LiveServerTestCase, TestCase
+from rest_framework.authtoken.models import Token
+
+from api.benchmarks import ENDPOINTS, compare_results, run_suite
+from api.counters import diff_counters
+from api.loadtest import LoadStats, format_summary, percentile, run_load
+from api.models import DashboardCounter, Item, Staff, StaffItemAssignment
+from api.seed import flush_dataset
+
+
+class SeedDataTest(TestCase):
+    def seed(self, **options):
+        call_command('seed_data', items=40, assignments=10, staff=5, categories=3,
+                     suppliers=2, stdout=StringIO(), **options)
+        return list(Item.objects.order_by('tag_number').values_list(
+            'name', 'model', 'purchase_price', 'date_of_purchase', 'category__name'))
+
+    def test_same_seed_same_rows(self):
+        first = self.seed()
+        self.assertEqual(self.seed(flush=True), first)
+        self.assertNotEqual(self.seed(flush=True, seed=1), first)
+        self.assertEqual(Item.objects.count(), 40)
+        self.assertEqual(Staff.objects.count(), 5)
+        self.assertEqual(StaffItemAssignment.objects.count(), 10)
+        self.assertEqual(diff_counters(), [])
+
+    def test_flush_rebuilds_counters(self):
+        self.seed()
+        flush_dataset()
+        self.assertEqual(Item.objects.count(), 0)
+        self.assertEqual(StaffItemAssignment.objects.count(), 0)
+        self.assertEqual(diff_counters(), [])
+        self.assertFalse(DashboardCounter.objects.exclude(value=0).exists())
+
+    def test_refuses_non_empty_database(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+        self.assertEqual(Item.objects.count(), 40)
+
+
+class BenchmarkSuiteTest(TestCase):
+    def test_run_suite(self):
+        call_command('seed_data', items=30, assignments=5, staff=5, stdout=StringIO())
+        results = run_suite(runs=1, warmup=0, endpoints=ENDPOINTS[:2] + ENDPOINTS[-1:])
+        self.assertEqual(set(results), {'items', 'items_cursor', 'dashboard'})
+        for result in results.values():
+            self.assertEqual(result['status'], 200)
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['peak_kb'], 0)
+
+    def test_compare_results(self):
+        baseline = {'1000': {'items': {
+            'status': 200, 'median_ms': 10.0, 'p95_ms': 20.0, 'queries': 2, 'peak_kb': 100.0,
+        }}}
+        same = {'1000': {'items': dict(baseline['1000']['items'], median_ms=14.0),
+                         'new_endpoint': baseline['1000']['items']},
+                '5000': baseline['1000']}
+        self.assertEqual(compare_results(same, baseline), [])
+
+        worse = {'1000': {'items': dict(baseline['1000']['items'], median_ms=30.0, queries=3)}}
+        regressions = compare_results(worse, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('1000/items: queries 2 -> 3', regressions)
+        self.assertTrue(any('median_ms' in regression for regression in regressions))
+        self.assertEqual(len(compare_results(worse, baseline, tolerance=5)), 1)
+        # A baseline from a machine twice as fast
+        self.assertEqual(len(compare_results(worse, baseline, speed=2.0)), 1)
+
+    def test_suite_leaves_the_configured_cache_alone(self):
+        cache.set('not-the-suite', 1)
+        run_suite(runs=1, warmup=0, endpoints=ENDPOINTS[-1:])
+        self.assertEqual(cache.get('not-the-suite'), 1)
+        cache.delete('not-the-suite')
+
+
+class LoadStatsTest(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_summary(self):
+        stats = LoadStats()
+        for ms in range(1, 11):
+            stats.record('items', ms / 1000, 200)
+        stats.record('assign', 0.005, 500)
+        stats.record('assign', 0.005, None)
+        summary = stats.summary(elapsed=2)
+        self.assertEqual(summary['items']['requests'], 10)
+        self.assertEqual(summary['items']['rps'], 5.0)
+        self.assertEqual(summary['items']['p95_ms'], 10.0)
+        self.assertEqual(summary['assign']['error_rate'], 1.0)
+        self.assertEqual(summary['assign']['statuses'], {'500': 1, 'failed': 1})
+        self.assertEqual(summary['__total__']['errors'], 2)
+        self.assertIn('assign statuses:', format_summary(summary))
+
+
+class LoadHarnessTest(LiveServerTestCase):
+    def test_short_run(self):
+        call_command('seed_data', items=30, assignments=5, staff=5, stdout=StringIO())
+        admin = User.objects.create_user(username='load', password='pw', is_staff=True)
+        token = Token.objects.create(user=admin).key
+        open_assignments = StaffItemAssignment.objects.filter(return_date__isnull=True).count()
+
+        summary = run_load(self.live_server_url, token, users=2, duration=1, think_time=0.01)
+
+        self.assertGreater(summary['__total__']['requests'], 0)
+        reads = [name for name in summary if name not in ('assign', 'return', '__total__')]
+        self.assertTrue(reads)
+        for name in reads:
+            self.assertEqual(summary[name]['errors'], 0, summary[name])
+        # Whatever the virtual users assigned has been returned again
+        self.assertEqual(
+            StaffItemAssignment.objects.filter(return_date__isnull=True).count(), open_assignments
+        )
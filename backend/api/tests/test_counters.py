@@ -0,0 +1,113 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from api.counters import diff_counters, record_items_created, read_dashboard_counters
+from api.models import Item, Category, Staff, StaffItemAssignment, DashboardCounter
+
+
+class DashboardCounterTest(TestCase):
+    def setUp(self):
+        self.laptops = Category.objects.create(name="Laptops")
+        self.phones = Category.objects.create(name="Phones")
+        self.it = Staff.objects.create(name="Ann", email="ann@company.com", department="IT")
+        self.hr = Staff.objects.create(name="Bob", email="bob@company.com", department="HR")
+        self.laptop = Item.objects.create(name="Laptop", category=self.laptops)
+        self.phone = Item.objects.create(name="Phone", category=self.phones)
+
+    def assertCountersMatchSource(self):
+        self.assertEqual(diff_counters(), [])
+
+    def counter(self, kind, key=''):
+        row = DashboardCounter.objects.filter(kind=kind, key=key).first()
+        return row.value if row else 0
+
+    def test_item_create_and_delete(self):
+        self.assertEqual(self.counter(DashboardCounter.TOTAL_ITEMS), 2)
+        self.assertEqual(self.counter(DashboardCounter.CATEGORY_ITEMS, str(self.laptops.pk)), 1)
+        self.phone.delete()
+        self.assertEqual(self.counter(DashboardCounter.TOTAL_ITEMS), 1)
+        self.assertCountersMatchSource()
+
+    def test_deleting_deferred_instances(self):
+        StaffItemAssignment.objects.create(staff=self.it, item=self.laptop)
+        # The post_delete receivers cannot load deferred fields from a
+        # deleted row, so pre_delete captures them
+        StaffItemAssignment.objects.only('id').get().delete()
+        self.laptop.refresh_from_db()
+        self.assertIsNone(self.laptop.current_assignment_id)
+        self.assertEqual(self.counter(DashboardCounter.DEPARTMENT_ASSIGNMENTS, 'IT'), 0)
+        Item.objects.only('id').get(pk=self.phone.pk).delete()
+        self.assertEqual(self.counter(DashboardCounter.CATEGORY_ITEMS, str(self.phones.pk)), 0)
+        self.assertCountersMatchSource()
+
+    def test_item_category_change(self):
+        item = Item.objects.get(pk=self.phone.pk)
+        item.category = self.laptops
+        item.save()
+        item.name = "Renamed"
+        item.save()
+        self.assertEqual(self.counter(DashboardCounter.CATEGORY_ITEMS, str(self.laptops.pk)), 2)
+        self.assertEqual(self.counter(DashboardCounter.CATEGORY_ITEMS, str(self.phones.pk)), 0)
+        self.assertCountersMatchSource()
+
+    def test_item_category_change_on_deferred_instance(self):
+        item = Item.objects.only('id', 'name').get(pk=self.phone.pk)
+        item.category = None
+        item.save()
+        self.assertEqual(self.counter(DashboardCounter.CATEGORY_ITEMS, ''), 1)
+        self.assertCountersMatchSource()
+
+    def test_category_delete_moves_items_to_uncategorized(self):
+        self.phones.delete()
+        self.assertEqual(self.counter(DashboardCounter.CATEGORY_ITEMS, ''), 1)
+        self.assertCountersMatchSource()
+
+    def test_assignment_lifecycle(self):
+        assignment = StaffItemAssignment.objects.create(staff=self.it, item=self.laptop)
+        self.assertEqual(self.counter(DashboardCounter.ASSIGNED_ITEMS), 1)
+        self.assertEqual(self.counter(DashboardCounter.DEPARTMENT_ASSIGNMENTS, 'IT'), 1)
+
+        assignment.staff = self.hr
+        assignment.save()
+        self.assertEqual(self.counter(DashboardCounter.DEPARTMENT_ASSIGNMENTS, 'IT'), 0)
+        self.assertEqual(self.counter(DashboardCounter.DEPARTMENT_ASSIGNMENTS, 'HR'), 1)
+
+        assignment.return_date = date(2024, 1, 1)
+        assignment.save()
+        self.assertEqual(self.counter(DashboardCounter.ASSIGNED_ITEMS), 0)
+        self.assertCountersMatchSource()
+
+        assignment.delete()
+        self.assertCountersMatchSource()
+
+    def test_staff_department_change_and_delete(self):
+        StaffItemAssignment.objects.create(staff=self.it, item=self.laptop)
+        StaffItemAssignment.objects.create(staff=self.it, item=self.phone)
+        self.it.department = "Finance"
+        self.it.save()
+        self.assertEqual(self.counter(DashboardCounter.DEPARTMENT_ASSIGNMENTS, 'Finance'), 2)
+        self.assertCountersMatchSource()
+
+        self.it.delete()
+        self.assertEqual(self.counter(DashboardCounter.TOTAL_STAFF), 1)
+        self.assertEqual(self.counter(DashboardCounter.ASSIGNED_ITEMS), 0)
+        self.assertCountersMatchSource()
+
+    def test_bulk_create_path(self):
+        items = Item.objects.bulk_create([Item(name=f"Bulk {i}", category=self.phones) for i in range(5)])
+        record_items_created(items)
+        totals, categories, _ = read_dashboard_counters()
+        self.assertEqual(totals[DashboardCounter.TOTAL_ITEMS], 7)
+        self.assertEqual(categories[str(self.phones.pk)], 6)
+        self.assertCountersMatchSource()
+
+    def test_rebuild_command(self):
+        DashboardCounter.objects.all().update(value=99)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_counters', '--check', stdout=StringIO())
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertCountersMatchSource()
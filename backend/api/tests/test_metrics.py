@@ -0,0 +1,153 @@
+import json
+import re
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from api.metrics import MetricsRegistry, registry
+from api.models import Item, Category
+
+
+def sample(text, name, **labels):
+    """
+    Value of the sample `name` whose labels include `labels`, or None.
+    """
+    for line in text.splitlines():
+        match = re.match(r'(\w+)(?:\{(.*)\})? (\S+)$', line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ''))
+        if all(found.get(key) == str(value) for key, value in labels.items()):
+            return float(match.group(3))
+    return None
+
+
+class MetricsRegistryTest(TestCase):
+    def test_render_counters_and_histograms(self):
+        metrics = MetricsRegistry()
+        metrics.inc('api_cache_total', cache='response', result='hit')
+        metrics.inc('api_cache_total', 2, cache='response', result='hit')
+        for seconds in (0.003, 0.02, 0.02, 30):
+            metrics.observe('api_request_duration_seconds', seconds, view='ItemViewSet', action='list')
+
+        text = metrics.render()
+        self.assertIn('# TYPE api_request_duration_seconds histogram', text)
+        self.assertEqual(sample(text, 'api_cache_total', cache='response', result='hit'), 3)
+        labels = {'view': 'ItemViewSet', 'action': 'list'}
+        # Buckets are cumulative
+        self.assertEqual(sample(text, 'api_request_duration_seconds_bucket', le='0.005', **labels), 1)
+        self.assertEqual(sample(text, 'api_request_duration_seconds_bucket', le='0.025', **labels), 3)
+        self.assertEqual(sample(text, 'api_request_duration_seconds_bucket', le='10', **labels), 3)
+        self.assertEqual(sample(text, 'api_request_duration_seconds_bucket', le='+Inf', **labels), 4)
+        self.assertEqual(sample(text, 'api_request_duration_seconds_count', **labels), 4)
+        self.assertAlmostEqual(sample(text, 'api_request_duration_seconds_sum', **labels), 30.043)
+
+        with self.assertRaises(ValueError):
+            metrics.observe('api_cache_total', 1)
+        with self.assertRaises(KeyError):
+            metrics.inc('api_unknown_total')
+
+    def test_label_values_are_escaped(self):
+        metrics = MetricsRegistry()
+        metrics.inc('api_cache_total', cache='a"b\\c', result='hit')
+        self.assertIn('cache="a\\"b\\\\c"', metrics.render())
+
+    def test_processes_are_summed_through_the_directory(self):
+        metrics = MetricsRegistry()
+        metrics.inc('api_cache_total', cache='response', result='miss')
+        metrics.observe('api_request_queries', 2, view='ItemViewSet', action='list')
+        with tempfile.TemporaryDirectory() as directory:
+            # What another worker flushed
+            other = MetricsRegistry()
+            other.inc('api_cache_total', 4, cache='response', result='miss')
+            other.observe('api_request_queries', 40, view='ItemViewSet', action='list')
+            Path(directory, '999999.json').write_text(json.dumps(other.snapshot()))
+
+            with override_settings(METRICS_DIR=directory):
+                text = metrics.render()
+            self.assertTrue(list(Path(directory).glob('*.json')))
+
+        labels = {'view': 'ItemViewSet', 'action': 'list'}
+        self.assertEqual(sample(text, 'api_cache_total', cache='response', result='miss'), 5)
+        self.assertEqual(sample(text, 'api_request_queries_count', **labels), 2)
+        self.assertEqual(sample(text, 'api_request_queries_bucket', le='2', **labels), 1)
+        self.assertEqual(sample(text, 'api_request_queries_bucket', le='50', **labels), 2)
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_DIR=None, METRICS_TOKEN='scrape-secret', DEBUG=False,
+                   CACHE_SHARED=True)
+class MetricsEndpointTest(TestCase):
+    def setUp(self):
+        registry.clear()
+        token_cache.clear()
+        self.user = User.objects.create_user(username='user', email='user@test.com', password='pw')
+        self.token = Token.objects.create(user=self.user)
+        category = Category.objects.create(name="Laptops")
+        for i in range(3):
+            Item.objects.create(name=f"Laptop {i}", category=category)
+        self.client = APIClient()
+
+    def tearDown(self):
+        registry.clear()
+        token_cache.clear()
+
+    def scrape(self, **headers):
+        return APIClient().get('/api/metrics', **headers)
+
+    def test_requests_are_recorded_per_view_and_action(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(self.client.get('/api/items/').status_code, 200)
+        self.assertEqual(self.client.get('/api/items/?page=2').status_code, 404)
+        self.assertEqual(self.client.get('/api/items/?pagination=cursor').status_code, 200)
+        item = Item.objects.first()
+        self.assertEqual(self.client.get(f'/api/items/{item.pk}/').status_code, 200)
+
+        response = self.scrape(HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+
+        list_labels = {'view': 'ItemViewSet', 'action': 'list'}
+        self.assertEqual(sample(text, 'api_requests_total', method='GET', status=200, **list_labels), 2)
+        self.assertEqual(sample(text, 'api_requests_total', method='GET', status=404, **list_labels), 1)
+        self.assertEqual(sample(text, 'api_requests_total', view='ItemViewSet', action='retrieve'), 1)
+        self.assertEqual(sample(text, 'api_request_duration_seconds_count', **list_labels), 3)
+        self.assertGreater(sample(text, 'api_request_queries_sum', **list_labels), 0)
+        self.assertEqual(sample(text, 'api_pagination_depth_count', view='ItemViewSet'), 1)
+        self.assertEqual(sample(text, 'api_cursor_pages_total', view='ItemViewSet', position='first'), 1)
+        # The first request loads the token, the rest hit the cache
+        cache_labels = {'backend': 'CachedTokenAuthentication'}
+        self.assertEqual(sample(text, 'api_auth_cache_total', result='miss', **cache_labels), 1)
+        self.assertEqual(sample(text, 'api_auth_cache_total', result='hit', **cache_labels), 3)
+        self.assertEqual(sample(text, 'api_auth_requests_total', **cache_labels), 4)
+
+    def test_conditional_requests_count_as_cache_lookups(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        etag = self.client.get('/api/items/')['ETag']
+        self.assertEqual(self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get('/api/items/', HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+        text = self.scrape(HTTP_AUTHORIZATION='Bearer scrape-secret').content.decode()
+        self.assertEqual(sample(text, 'api_cache_total', cache='conditional', result='hit'), 1)
+        self.assertEqual(sample(text, 'api_cache_total', cache='conditional', result='miss'), 1)
+
+    def test_scrapes_need_the_token_or_staff(self):
+        self.assertEqual(self.scrape().status_code, 403)
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        client = APIClient()
+        client.force_login(self.user)
+        self.assertEqual(client.get('/api/metrics').status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.client.get('/api/items/')
+        text = self.scrape(HTTP_AUTHORIZATION='Bearer scrape-secret').content.decode()
+        self.assertIsNone(sample(text, 'api_requests_total', view='ItemViewSet'))
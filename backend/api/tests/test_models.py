@@ -127,3 +127,51 @@ class StaffItemAssignmentModelTest(TestCase):
         self.item.delete()
         with self.assertRaises(StaffItemAssignment.DoesNotExist):
             StaffItemAssignment.objects.get(id=assignment_id)
+
+
+class ItemCurrentAssignmentTest(TestCase):
+    def setUp(self):
+        self.ann = Staff.objects.create(name="Ann", email="ann@company.com", department="IT")
+        self.bob = Staff.objects.create(name="Bob", email="bob@company.com", department="HR")
+        self.laptop = Item.objects.create(name="Laptop")
+        self.phone = Item.objects.create(name="Phone")
+
+    def current(self, item):
+        return Item.objects.values_list('current_assignment', flat=True).get(pk=item.pk)
+
+    def test_pointer_follows_open_and_return(self):
+        self.assertIsNone(self.current(self.laptop))
+        assignment = StaffItemAssignment.objects.create(staff=self.ann, item=self.laptop)
+        self.assertEqual(self.current(self.laptop), assignment.pk)
+        assignment.return_date = date(2024, 1, 1)
+        assignment.save()
+        self.assertIsNone(self.current(self.laptop))
+
+    def test_pointer_falls_back_to_other_open_assignment(self):
+        first = StaffItemAssignment.objects.create(staff=self.ann, item=self.laptop)
+        second = StaffItemAssignment.objects.create(staff=self.bob, item=self.laptop)
+        self.assertEqual(self.current(self.laptop), second.pk)
+        second.delete()
+        self.assertEqual(self.current(self.laptop), first.pk)
+        first.delete()
+        self.assertIsNone(self.current(self.laptop))
+
+    def test_pointer_moves_with_the_item(self):
+        assignment = StaffItemAssignment.objects.create(staff=self.ann, item=self.laptop)
+        assignment.item = self.phone
+        assignment.save()
+        self.assertIsNone(self.current(self.laptop))
+        self.assertEqual(self.current(self.phone), assignment.pk)
+
+    def test_stale_item_save_keeps_pointer(self):
+        stale = Item.objects.get(pk=self.laptop.pk)
+        assignment = StaffItemAssignment.objects.create(staff=self.ann, item=self.laptop)
+        stale.name = "Renamed Laptop"
+        stale.save()
+        self.assertEqual(self.current(self.laptop), assignment.pk)
+        self.assertEqual(Item.objects.get(pk=self.laptop.pk).name, "Renamed Laptop")
+
+    def test_deleting_item_with_open_assignment(self):
+        StaffItemAssignment.objects.create(staff=self.ann, item=self.laptop)
+        self.laptop.delete()
+        self.assertFalse(StaffItemAssignment.objects.exists())
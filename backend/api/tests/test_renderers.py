@@ -0,0 +1,136 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import skipIf
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.models import Item, Category, Supplier
+from api.parsers import FastJSONParser, MessagePackParser
+from api.querysets import eager_load
+from api.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from api.serializers import ItemSerializer
+
+
+class FastJSONRendererTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Laptops — ünïcode")
+        supplier = Supplier.objects.create(name="Acme")
+        for i in range(3):
+            Item.objects.create(
+                name=f"Laptop {i}", category=category, supplier=supplier,
+                purchase_price=Decimal('1299.99'), date_of_purchase=date(2024, 1, i + 1),
+                notes="line\u2028separator" if i else None,
+            )
+
+    def test_item_pages_match_drf_byte_for_byte(self):
+        serializer = ItemSerializer(many=True)
+        data = ItemSerializer(eager_load(Item.objects.all(), serializer.child), many=True).data
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_values_drf_encodes_itself_match(self):
+        data = {
+            'price': Decimal('10.50'),
+            'utc': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            'naive': datetime(2024, 5, 1, 12, 30),
+            'offset': datetime(2024, 5, 1, 12, 30, tzinfo=timezone(timedelta(hours=2))),
+            'day': date(2024, 5, 1),
+            'time': time(9, 15),
+            'duration': timedelta(minutes=90),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'lazy': gettext_lazy("Not found."),
+            'error': [ErrorDetail("Invalid.", code='invalid')],
+            'nested': ({1: 'one'}, None, True, 1.5),
+            'items': Category.objects.values_list('name', flat=True),
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indented_output_uses_drf(self):
+        data = {'a': [1, 2]}
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4'),
+        )
+
+    def test_parser_matches_drf_and_rejects_bad_input(self):
+        body = '{"name": "Laptop — ü", "ids": [1, 2], "price": 1.5, "none": null}'.encode()
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body))
+        )
+        for bad in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(bad))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_renderers', items=3, runs=2, stdout=out)
+        self.assertIn('FastJSONRenderer', out.getvalue())
+
+
+@skipIf(msgpack is None, "msgpack is not installed")
+class MessagePackTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=admin).key}')
+        self.category = Category.objects.create(name="Laptops")
+        Item.objects.create(name="Laptop", category=self.category, purchase_price=Decimal('10.00'))
+
+    @override_settings(TOKEN_CACHE_SIZE=0)
+    def test_accept_msgpack_renders_the_same_data_as_json(self):
+        as_json = self.client.get('/api/items/').json()
+        response = self.client.get('/api/items/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), as_json)
+
+    def test_msgpack_request_bodies(self):
+        body = msgpack.packb({'name': 'Tablet', 'category_id': self.category.id, 'purchase_price': '5.00'})
+        response = self.client.post(
+            '/api/items/', body, content_type='application/msgpack', HTTP_ACCEPT='application/msgpack'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(response.content)['purchase_price'], '5.00')
+
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(io.BytesIO(b'\xc1'))
+
+    def test_msgpack_bodies_json_could_not_hold_are_rejected(self):
+        # {[1]: 2}, {1: 2} and ExtType(5, b'\x01')
+        for body in (b'\x81\x91\x01\x02', b'\x81\x01\x02', b'\xd4\x05\x01'):
+            with self.assertRaises(ParseError):
+                MessagePackParser().parse(io.BytesIO(body))
+            response = self.client.post('/api/items/', body, content_type='application/msgpack')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+
+        timestamp = msgpack.packb({'at': msgpack.Timestamp(1714521600)})
+        self.assertEqual(
+            MessagePackParser().parse(io.BytesIO(timestamp)),
+            {'at': datetime(2024, 5, 1, tzinfo=timezone.utc)},
+        )
+
+    def test_renderer_converts_like_json(self):
+        data = {'price': Decimal('1.5'), 'at': datetime(2024, 5, 1, tzinfo=timezone.utc)}
+        self.assertEqual(
+            msgpack.unpackb(MessagePackRenderer().render(data)),
+            {'price': 1.5, 'at': '2024-05-01T00:00:00Z'},
+        )
+
+
+@skipIf(orjson is None, "orjson is not installed")
+class RendererSettingsTest(TestCase):
+    def test_settings_use_the_fast_classes(self):
+        from rest_framework.settings import api_settings
+        self.assertIs(api_settings.DEFAULT_RENDERER_CLASSES[0], FastJSONRenderer)
+        self.assertIs(api_settings.DEFAULT_PARSER_CLASSES[0], FastJSONParser)
@@ -1,11 +1,35 @@
-from django.test import TestCase
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
+from django.http import HttpResponse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from api.models import Item, Category, Supplier, Staff, StaffItemAssignment
+from api.authentication import TokenCache, token_cache
+from api.bulk import BulkUpdateDestroyMixin, raw_delete
+from api.counters import diff_counters
+from api.importers import ItemCSVImporter
+from api.fastpath import UnsupportedSerializer, compile_row_mapper
+from api.middleware import SQLInstrumentationMiddleware, query_signature
+from api.slowqueries import slow_query_log
+from api.serializers import ItemSerializer, StaffSerializer
+from api.views import ItemViewSet, StaffViewSet, StaffItemAssignmentViewSet
+from rest_framework import serializers
+from django.core.files.uploadedfile import SimpleUploadedFile
 from decimal import Decimal
+from datetime import date, timedelta
+import json
+import tempfile
+import time
+from unittest import mock, skipUnless
 
+# Query counts below include the token lookup on every request;
+# CachedTokenAuthenticationTestCase covers the cached path.
+@override_settings(TOKEN_CACHE_SIZE=0)
 class BaseAPITestCase(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -128,6 +152,22 @@ class ItemViewSetTestCase(BaseAPITestCase):
         response = self.client.post('/api/items/', data)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_write_actions_load_full_items(self):
+        for action in ('update', 'partial_update', 'destroy'):
+            view = ItemViewSet(action=action, request=None, format_kwarg=None)
+            self.assertEqual(view.get_queryset().get(pk=self.item.pk).get_deferred_fields(), set())
+
+    def test_patch_item_refreshes_updated_at_and_counters(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        other = Category.objects.create(name="Other Category")
+        before = self.item.updated_at
+        response = self.client.patch(f'/api/items/{self.item.id}/', {'category_id': other.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.category, other)
+        self.assertGreater(self.item.updated_at, before)
+        self.assertEqual(diff_counters(), [])
+
 class StaffViewSetTestCase(BaseAPITestCase):
     def test_list_staff_admin(self):
         self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
@@ -162,3 +202,1393 @@ class StaffItemAssignmentTestCase(BaseAPITestCase):
         }
         response = self.client.post('/api/assignments/', data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_patch_assignment_detail(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        other_item = Item.objects.create(name="Another Item", category=self.category)
+        other_staff = Staff.objects.create(name="Other Staff", email="other@test.com", department="Finance")
+        before = self.assignment.updated_at
+        response = self.client.patch(f'/api/assignments/{self.assignment.id}/', {
+            'item_id': other_item.id, 'staff_id': other_staff.id,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assignment.refresh_from_db()
+        self.assertGreater(self.assignment.updated_at, before)
+        self.item.refresh_from_db()
+        other_item.refresh_from_db()
+        self.assertIsNone(self.item.current_assignment_id)
+        self.assertEqual(other_item.current_assignment_id, self.assignment.id)
+        self.assertEqual(diff_counters(), [])
+
+    def test_delete_assignment_detail(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        response = self.client.delete(f'/api/assignments/{self.assignment.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(StaffItemAssignment.objects.exists())
+        self.item.refresh_from_db()
+        self.assertIsNone(self.item.current_assignment_id)
+        self.assertEqual(diff_counters(), [])
+
+    def test_delete_assignment_loaded_with_deferred_fields(self):
+        # Shape the destroy queryset like the list one, as it once was
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        actions = StaffItemAssignmentViewSet.eager_load_actions + ('destroy',)
+        with mock.patch.object(StaffItemAssignmentViewSet, 'eager_load_actions', actions):
+            response = self.client.delete(f'/api/assignments/{self.assignment.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.item.refresh_from_db()
+        self.assertIsNone(self.item.current_assignment_id)
+        self.assertEqual(diff_counters(), [])
+
+class ItemQueryCountTestCase(BaseAPITestCase):
+    def _create_items(self, count):
+        for i in range(count):
+            category = Category.objects.create(name=f"Category {i}")
+            supplier = Supplier.objects.create(name=f"Supplier {i}")
+            Item.objects.create(name=f"Item {i}", category=category, supplier=supplier)
+
+    def test_list_items_query_count_is_constant(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        # Token lookup, validators, page count, page rows
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/items/')
+        self.assertEqual(len(response.data['results']), 1)
+
+        self._create_items(25)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/items/')
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_list_items_renders_nested_relations(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        response = self.client.get('/api/items/')
+        row = response.data['results'][0]
+        self.assertEqual(row['category']['name'], "Test Category")
+        self.assertEqual(row['supplier']['name'], "Test Supplier")
+
+    def test_retrieve_item_query_count(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/items/{self.item.id}/')
+        self.assertEqual(response.data['category']['id'], self.category.id)
+
+    def test_partial_update_item_with_eager_queryset(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        response = self.client.patch(f'/api/items/{self.item.id}/', {'model': 'X1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.model, 'X1')
+        self.assertEqual(self.item.category, self.category)
+
+class AssignmentQueryCountTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # A regular user whose email matches a Staff record
+        self.staff_user = User.objects.create_user(
+            username='staffer',
+            email='staff@test.com',
+            password='testpass123'
+        )
+        self.staff_token = Token.objects.create(user=self.staff_user)
+
+    def _create_assignments(self, count):
+        start = StaffItemAssignment.objects.count()
+        for i in range(start, start + count):
+            category = Category.objects.create(name=f"Category {i}")
+            supplier = Supplier.objects.create(name=f"Supplier {i}")
+            item = Item.objects.create(name=f"Item {i}", category=category, supplier=supplier)
+            StaffItemAssignment.objects.create(staff=self.staff, item=item)
+
+    def test_list_assignments_admin_query_count_is_constant(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        self._create_assignments(1)
+        # Token lookup, validators, page count, page rows
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/assignments/')
+        self.assertEqual(len(response.data['results']), 1)
+
+        self._create_assignments(24)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/assignments/')
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_list_assignments_staff_query_count_is_constant(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.staff_token.key}')
+        self._create_assignments(1)
+        # Token lookup, staff lookup, validators, page count, page rows
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/assignments/')
+        self.assertEqual(len(response.data['results']), 1)
+
+        self._create_assignments(24)
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/assignments/')
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_retrieve_assignment_staff_resolves_staff_once(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.staff_token.key}')
+        self._create_assignments(1)
+        assignment = StaffItemAssignment.objects.get()
+        # Token lookup, staff lookup shared by queryset and permission,
+        # validators, row
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/assignments/{assignment.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(STAFF_LOOKUP_CACHE_TIMEOUT=60, CACHE_SHARED=True)
+    def test_staff_lookup_cached_across_requests(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.staff_token.key}')
+        self._create_assignments(1)
+        self.client.get('/api/assignments/')
+        # Token lookup, page count, page rows
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/assignments/')
+        self.assertEqual(len(response.data['results']), 1)
+
+        # A staff write invalidates the cached mapping
+        self.staff.email = 'moved@test.com'
+        self.staff.save()
+        response = self.client.get('/api/assignments/')
+        self.assertEqual(response.data['results'], [])
+
+    def test_list_assignments_renders_nested_item(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        self._create_assignments(1)
+        row = self.client.get('/api/assignments/').data['results'][0]
+        self.assertEqual(row['staff']['email'], "staff@test.com")
+        self.assertEqual(row['item']['category']['name'], "Category 0")
+        self.assertEqual(row['item']['supplier']['name'], "Supplier 0")
+
+    def test_list_assignments_without_staff_record(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        self._create_assignments(1)
+        response = self.client.get('/api/assignments/')
+        self.assertEqual(response.data['count'], 0)
+
+class KeysetPaginationTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(44):
+            Item.objects.create(name=f"Item {i}", category=self.category)
+        # Force ties on created_at so the id tie-breaker is exercised
+        Item.objects.filter(name__in=["Item 10", "Item 11", "Item 12"]).update(
+            created_at=Item.objects.get(name="Item 10").created_at
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+
+    def _walk(self, url, on_page=None):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row['id'] for row in response.data['results'])
+            if on_page:
+                on_page()
+            url = response.data['next']
+        return ids
+
+    def test_cursor_pages_cover_every_item_once(self):
+        ids = self._walk('/api/items/?pagination=cursor')
+        expected = list(
+            Item.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_cursor_pages_are_stable_under_inserts(self):
+        expected = list(
+            Item.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        counter = iter(range(100))
+        ids = self._walk(
+            '/api/items/?pagination=cursor',
+            on_page=lambda: Item.objects.create(name=f"New {next(counter)}"),
+        )
+        self.assertEqual(ids, expected)
+
+    def test_cursor_page_has_no_count_query(self):
+        first = self.client.get('/api/items/?pagination=cursor')
+        self.assertNotIn('count', first.data)
+        # Token lookup, validators, page rows
+        with self.assertNumQueries(3):
+            self.client.get(first.data['next'])
+
+    @skipUnless(connection.vendor == 'sqlite', 'reads SQLite query plans')
+    def test_cursor_page_seeks_the_index(self):
+        first = self.client.get('/api/items/?pagination=cursor')
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            self.client.get(first.data['next'])
+        # Explained with its bound parameters, as it runs: SQLite plans
+        # literal values differently
+        sql, params = next(
+            (sql, params) for sql, params in statements
+            if 'ORDER BY' in sql and 'FROM "api_item"' in sql
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        # A range seek on (created_at, id), not a walk past every newer row
+        self.assertIn('SEARCH api_item USING INDEX', plan)
+        self.assertIn('created_at<', plan)
+        self.assertNotIn('SCAN api_item', plan)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get('/api/items/?pagination=cursor')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [row['id'] for row in back.data['results']],
+            [row['id'] for row in first.data['results']],
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/items/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_pagination_remains_default(self):
+        response = self.client.get('/api/items/')
+        self.assertEqual(response.data['count'], 45)
+
+    def test_assignment_cursor_pages(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        for item in Item.objects.all()[:25]:
+            StaffItemAssignment.objects.create(staff=self.staff, item=item)
+        ids = self._walk('/api/assignments/?pagination=cursor')
+        expected = list(
+            StaffItemAssignment.objects.order_by('-assigned_date', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+class ItemImportTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        Item.objects.filter(pk=self.item.pk).update(serial_number='SN-EXISTING', tag_number='TAG-EXISTING')
+
+    def _upload(self, content, url='/api/items/import/'):
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        upload = SimpleUploadedFile('items.csv', content, content_type='text/csv')
+        return self.client.post(url, {'file': upload}, format='multipart')
+
+    def test_import_creates_items_and_reports_row_errors(self):
+        content = (
+            "name,model,serial_number,tag_number,date_of_purchase,purchase_price,category,supplier\n"
+            "Laptop A,X1,SN-1,TAG-1,2024-01-15,999.99,Test Category,Test Supplier\n"
+            "Laptop B,X1,SN-EXISTING,TAG-2,,,Test Category,\n"
+            "Laptop C,X1,SN-3,TAG-1,,,,\n"
+            "Bad#Name,,SN-4,TAG-4,,,,\n"
+            "Laptop E,,SN-5,TAG-5,not-a-date,-5,Missing Category,\n"
+            "Laptop F,,,,,,,\n"
+        )
+        response = self._upload(content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 4)
+
+        errors = {entry['row']: entry['errors'] for entry in response.data['errors']}
+        self.assertIn('serial_number', errors[3])
+        self.assertIn('tag_number', errors[4])
+        self.assertIn('name', errors[5])
+        self.assertEqual(
+            set(errors[6]), {'category', 'date_of_purchase', 'purchase_price'}
+        )
+
+        item = Item.objects.get(serial_number='SN-1')
+        self.assertEqual(item.category, self.category)
+        self.assertEqual(item.supplier, self.supplier)
+        self.assertEqual(str(item.purchase_price), '999.99')
+        self.assertTrue(Item.objects.filter(name='Laptop F', serial_number=None).exists())
+
+    def test_import_query_count_is_independent_of_row_count(self):
+        rows = "".join(f"Item {i},,SN-{i},TAG-{i},,,Test Category,\n" for i in range(50))
+        content = "name,model,serial_number,tag_number,date_of_purchase,purchase_price,category,supplier\n" + rows
+        # Token lookup, 4 prefetches, and for the single batch: savepoint,
+        # insert, two counter updates in their own savepoint, release
+        with self.assertNumQueries(12):
+            response = self._upload(content)
+        self.assertEqual(response.data['created'], 50)
+
+    def test_import_without_trailing_slash(self):
+        response = self._upload("name\nLaptop\n", url='/api/items/import')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_import_missing_required_column(self):
+        response = self._upload("model\nX1\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @mock.patch.object(ItemCSVImporter, 'batch_size', 2)
+    def test_import_reports_where_a_malformed_file_stopped(self):
+        # csv refuses fields over its size limit
+        content = "name\nLaptop 1\nLaptop 2\nLaptop 3\n" + "x" * 200_000 + "\nLaptop 5\n"
+        response = self._upload(content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(response.data['aborted']['row'], 5)
+        self.assertIn('Malformed CSV', response.data['aborted']['error'])
+        # Both batches before the bad line stay committed, nothing after it is read
+        self.assertEqual(Item.objects.filter(name__startswith='Laptop ').count(), 3)
+
+    @mock.patch.object(ItemCSVImporter, 'batch_size', 10)
+    def test_import_reports_where_decoding_stopped(self):
+        # Past the first chunk the text stream decodes, so the header reads fine
+        rows = "".join(f"Item {i}\n" for i in range(2000))
+        response = self._upload(b"name\n" + rows.encode() + b"Caf\xe9\nLast\n")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        aborted = response.data['aborted']
+        self.assertEqual(aborted['error'], 'File must be UTF-8 encoded CSV')
+        self.assertEqual(response.data['created'], aborted['row'] - 2)
+        self.assertGreater(response.data['created'], 0)
+        self.assertEqual(Item.objects.filter(name__startswith='Item ').count(), response.data['created'])
+
+    def test_import_unreadable_file_writes_nothing(self):
+        response = self._upload(b"name\nCaf\xe9\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Item.objects.filter(name__startswith='Caf').exists())
+
+    def test_complete_import_is_not_aborted(self):
+        response = self._upload("name\nLaptop\n")
+        self.assertIsNone(response.data['aborted'])
+
+    def test_import_without_file(self):
+        response = self.client.post('/api/items/import/', {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_regular_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        response = self._upload("name\nLaptop\n")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class ExportTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        Item.objects.filter(pk=self.item.pk).update(purchase_price=Decimal('12.50'))
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+
+    def _content(self, response):
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_export_items_csv(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        response = self.client.get('/api/items/export/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('items.csv', response['Content-Disposition'])
+        lines = self._content(response).splitlines()
+        self.assertTrue(lines[0].startswith('id,name,model'))
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Test Item', lines[1])
+        self.assertIn('12.50', lines[1])
+        self.assertIn('Test Category', lines[1])
+
+    def test_export_items_ndjson(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        response = self.client.get('/api/items/export/?format=ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual(rows[0]['name'], 'Test Item')
+        self.assertEqual(rows[0]['purchase_price'], '12.50')
+        self.assertEqual(rows[0]['supplier'], 'Test Supplier')
+
+    def test_export_assignments_respects_ownership(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        lines = self._content(self.client.get('/api/assignments/export/')).splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('staff@test.com', lines[1])
+
+        # The regular user has no Staff record, so sees no assignments
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        lines = self._content(self.client.get('/api/assignments/export/')).splitlines()
+        self.assertEqual(len(lines), 1)
+
+    def test_export_unauthenticated(self):
+        response = self.client.get('/api/items/export/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+class DashboardStatsTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        other_staff = Staff.objects.create(name="Other Staff", email="other@test.com", department="Finance")
+        spare = Item.objects.create(name="Spare Item")
+        returned = Item.objects.create(name="Returned Item", category=self.category)
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+        StaffItemAssignment.objects.create(staff=other_staff, item=spare)
+        StaffItemAssignment.objects.create(staff=other_staff, item=returned, return_date=date(2024, 1, 1))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+
+    def test_dashboard_stats(self):
+        response = self.client.get('/api/dashboard/stats')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['totalItems'], 3)
+        self.assertEqual(response.data['assignedItems'], 2)
+        self.assertEqual(response.data['availableItems'], 1)
+        self.assertEqual(response.data['totalStaff'], 2)
+        self.assertEqual(response.data['itemsByCategory'], {'Test Category': 2, 'Uncategorized': 1})
+        self.assertEqual(response.data['assignmentsByDepartment'], {'IT': 1, 'Finance': 1})
+        self.assertEqual(len(response.data['recentActivity']), 3)
+        self.assertEqual(
+            response.data['recentActivity'][0]['description'],
+            "Returned Item assigned to Other Staff",
+        )
+
+    def test_dashboard_stats_query_count(self):
+        # Token lookup, validators, counters, category names, recent
+        with self.assertNumQueries(5):
+            self.client.get('/api/dashboard/stats')
+
+    def test_dashboard_stats_date_filter(self):
+        response = self.client.get('/api/dashboard/stats?startDate=2999-01-01T00:00:00Z')
+        self.assertEqual(response.data['recentActivity'], [])
+        self.assertEqual(response.data['totalItems'], 3)
+
+
+@override_settings(CACHE_SHARED=True)
+class ResponseCacheTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+
+    def test_repeated_category_poll_skips_database(self):
+        first = self.client.get('/api/categories/')
+        # Only the token lookup remains
+        with self.assertNumQueries(1):
+            second = self.client.get('/api/categories/')
+        self.assertEqual(first.data, second.data)
+
+    def test_category_write_invalidates(self):
+        self.client.get('/api/categories/')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        self.client.post('/api/categories/', {'name': 'Fresh Category'})
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        response = self.client.get('/api/categories/')
+        self.assertIn('Fresh Category', [row['name'] for row in response.data['results']])
+
+    def test_supplier_delete_invalidates(self):
+        self.client.get('/api/suppliers/')
+        self.supplier.delete()
+        response = self.client.get('/api/suppliers/')
+        self.assertEqual(response.data['count'], 0)
+
+    def test_dashboard_poll_and_invalidation(self):
+        first = self.client.get('/api/dashboard/stats')
+        with self.assertNumQueries(1):
+            self.client.get('/api/dashboard/stats')
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+        response = self.client.get('/api/dashboard/stats')
+        self.assertEqual(response.data['assignedItems'], first.data['assignedItems'] + 1)
+
+    def test_query_params_are_part_of_key(self):
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+        everything = self.client.get('/api/dashboard/stats')
+        future = self.client.get('/api/dashboard/stats?startDate=2999-01-01T00:00:00Z')
+        self.assertEqual(len(everything.data['recentActivity']), 1)
+        self.assertEqual(future.data['recentActivity'], [])
+
+    @override_settings(CACHE_SHARED=False)
+    def test_not_cached_without_shared_cache(self):
+        self.client.get('/api/categories/')
+        # Token lookup, validators, count and rows: a per-process cache
+        # would miss other workers' writes, so the view runs again
+        with self.assertNumQueries(4):
+            self.client.get('/api/categories/')
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            caches = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}
+            with override_settings(CACHES=caches):
+                self.client.get('/api/categories/')
+                with self.assertNumQueries(1):
+                    self.client.get('/api/categories/')
+                Category.objects.create(name="On Disk")
+                response = self.client.get('/api/categories/')
+                self.assertEqual(response.data['count'], 2)
+
+class ItemSearchTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.laptop = Item.objects.create(
+            name="Dell Latitude Laptop", model="E5440", serial_number="DL-5440-001"
+        )
+        self.bag = Item.objects.create(
+            name="Carry Bag", notes="Fits a laptop up to 15 inches"
+        )
+        self.monitor = Item.objects.create(name="Monitor", tag_number="MON-77")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+
+    def _search(self, text):
+        response = self.client.get('/api/items/', {'search': text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data['results']]
+
+    def test_search_ranks_name_matches_first(self):
+        self.assertEqual(self._search('laptop'), [self.laptop.id, self.bag.id])
+
+    def test_search_matches_prefixes_and_identifiers(self):
+        self.assertEqual(self._search('lati'), [self.laptop.id])
+        self.assertEqual(self._search('E5440'), [self.laptop.id])
+        self.assertEqual(self._search('MON-77'), [self.monitor.id])
+
+    def test_search_requires_every_term(self):
+        self.assertEqual(self._search('laptop inches'), [self.bag.id])
+
+    def test_search_ignores_query_syntax(self):
+        self.assertEqual(self._search('"laptop*" ^('), [self.laptop.id, self.bag.id])
+        self.assertEqual(self._search('***'), [])
+
+    def test_search_index_follows_updates_and_deletes(self):
+        Item.objects.filter(pk=self.monitor.pk).update(name="Projector")
+        self.assertEqual(self._search('projector'), [self.monitor.id])
+        self.assertEqual(self._search('monitor'), [])
+        self.laptop.delete()
+        self.assertEqual(self._search('laptop'), [self.bag.id])
+
+    def test_search_query_count(self):
+        # Token lookup, validators, page count, page rows
+        with self.assertNumQueries(4):
+            self.client.get('/api/items/', {'search': 'laptop'})
+
+
+class ItemFilterTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_category = Category.objects.create(name="Other Category")
+        self.cheap = Item.objects.create(
+            name="Cheap Item", category=self.category, supplier=self.supplier,
+            purchase_price=Decimal('10.00'), date_of_purchase=date(2023, 1, 15)
+        )
+        self.pricey = Item.objects.create(
+            name="Pricey Item", category=self.other_category,
+            purchase_price=Decimal('900.00'), date_of_purchase=date(2024, 6, 1)
+        )
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.cheap)
+        returned = StaffItemAssignment.objects.create(staff=self.staff, item=self.pricey)
+        returned.return_date = date(2024, 7, 1)
+        returned.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+
+    def _filter(self, **params):
+        response = self.client.get('/api/items/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {row['id'] for row in response.data['results']}
+
+    def test_filter_by_category_and_supplier(self):
+        self.assertEqual(self._filter(category=self.category.id), {self.item.id, self.cheap.id})
+        self.assertEqual(self._filter(category=self.category.id, supplier=self.supplier.id),
+                         {self.item.id, self.cheap.id})
+        self.assertEqual(self._filter(category=self.other_category.id), {self.pricey.id})
+
+    def test_filter_by_purchase_date_and_price_ranges(self):
+        self.assertEqual(self._filter(purchased_after='2024-01-01'), {self.pricey.id})
+        self.assertEqual(self._filter(purchased_before='2023-01-15'), {self.cheap.id})
+        self.assertEqual(self._filter(min_price='10', max_price='10.00'), {self.cheap.id})
+        self.assertEqual(self._filter(min_price='100.5'), {self.pricey.id})
+
+    def test_filter_by_status(self):
+        # A returned assignment leaves the item available again
+        self.assertEqual(self._filter(status='available'), {self.item.id, self.pricey.id})
+        self.assertEqual(self._filter(status='assigned'), {self.cheap.id})
+        self.assertEqual(self._filter(status='all'), {self.item.id, self.cheap.id, self.pricey.id})
+
+    def test_filters_apply_to_export(self):
+        response = self.client.get('/api/items/export/', {'status': 'assigned'})
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertIn('Cheap Item', rows[1])
+
+    def test_invalid_filter_values_are_rejected(self):
+        response = self.client.get('/api/items/', {
+            'category': 'abc', 'purchased_after': '2024-13-01',
+            'min_price': 'NaN', 'status': 'lost',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            set(response.data['details']),
+            {'category', 'purchased_after', 'min_price', 'status'}
+        )
+
+
+@override_settings(TOKEN_CACHE_SIZE=100, TOKEN_CACHE_TIMEOUT=300, CACHE_SHARED=True)
+class CachedTokenAuthenticationTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+
+    def test_cache_hit_skips_token_query(self):
+        self.client.get('/api/auth/profile/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.data['username'], 'user')
+
+    def test_logout_invalidates_cached_token(self):
+        self.client.get('/api/auth/profile/')
+        response = self.client.post('/api/auth/logout/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_invalidates_cached_token(self):
+        self.client.get('/api/auth/profile/')
+        self.regular_user.is_active = False
+        self.regular_user.save()
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_changes_reach_cached_token(self):
+        self.client.get('/api/auth/profile/')
+        self.regular_user.is_staff = True
+        self.regular_user.save()
+        response = self.client.get('/api/auth/profile/')
+        self.assertTrue(response.data['is_staff'])
+
+    def test_logout_reaches_other_processes(self):
+        # Another worker: its own token cache, the same Django cache
+        other_process = mock.patch('api.authentication.token_cache', TokenCache())
+        with other_process as other_cache:
+            self.client.get('/api/auth/profile/')
+        self.assertEqual(len(other_cache), 1)
+
+        self.client.post('/api/auth/logout/')
+        with other_process:
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_not_cached_without_shared_cache(self):
+        # Another worker with its own locmem cache never sees this one's
+        # version bumps, so it must not keep the token
+        token_cache.clear()
+        other_process = mock.patch('api.authentication.cache', LocMemCache('other-process', {}))
+        with other_process:
+            self.client.get('/api/auth/profile/')
+        self.assertEqual(len(token_cache), 0)
+
+        self.client.post('/api/auth/logout/')
+        with other_process:
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_CACHE_SIZE=1)
+    def test_cache_is_bounded(self):
+        token_cache.clear()
+        self.client.get('/api/auth/profile/')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        self.client.get('/api/auth/profile/')
+        self.assertEqual(len(token_cache), 1)
+        self.assertIsNone(token_cache.get(self.user_token.key))
+
+
+class StatelessJWTAuthenticationTestCase(BaseAPITestCase):
+    def _login(self, username='user'):
+        response = self.client.post('/api/auth/jwt/login/', {
+            'username': username, 'password': 'testpass123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('refresh', response.data)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        return response
+
+    def test_jwt_requests_skip_user_lookup(self):
+        self._login()
+        # Validators, page count and page rows only
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/items/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_claims_carry_identity_and_role(self):
+        self._login('admin')
+        # Staff-only endpoints accept the is_staff claim
+        response = self.client.get('/api/staff/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user = response.wsgi_request.user
+        self.assertEqual((user.id, user.email, user.is_staff),
+                         (self.admin_user.id, 'admin@test.com', True))
+        self.assertEqual(user, self.admin_user)
+
+    def test_other_user_fields_load_lazily(self):
+        self._login()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.data['username'], 'user')
+        self.assertIsNotNone(response.data['date_joined'])
+
+    def test_refresh_keeps_claims(self):
+        refresh = self._login('admin').data['refresh']
+        response = self.client.post('/api/auth/jwt/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get('/api/staff/').status_code, status.HTTP_200_OK)
+
+    def _refresh(self, refresh):
+        self.client.credentials()
+        return self.client.post('/api/auth/jwt/refresh/', {'refresh': refresh})
+
+    def test_refresh_rebuilds_claims_from_user(self):
+        refresh = self._login('admin').data['refresh']
+        self.admin_user.is_staff = False
+        self.admin_user.email = 'demoted@test.com'
+        self.admin_user.save()
+        response = self._refresh(refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        response = self.client.get('/api/staff/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.wsgi_request.user.email, 'demoted@test.com')
+
+    def test_refresh_rejects_inactive_and_deleted_users(self):
+        refresh = self._login().data['refresh']
+        self.regular_user.is_active = False
+        self.regular_user.save()
+        self.assertEqual(self._refresh(refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.regular_user.delete()
+        self.assertEqual(self._refresh(refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_credentials(self):
+        response = self.client.post('/api/auth/jwt/login/', {
+            'username': 'user', 'password': 'wrong'
+        })
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BulkAssignmentTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        self.other_staff = Staff.objects.create(name="Other Staff", email="other@test.com", department="HR")
+        self.items = [Item.objects.create(name=f"Laptop {i}") for i in range(3)]
+
+    def _current(self, item):
+        return Item.objects.values_list('current_assignment', flat=True).get(pk=item.pk)
+
+    def test_bulk_assign_creates_valid_entries_and_reports_the_rest(self):
+        taken = StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+        response = self.client.post('/api/assignments/bulk-assign/', {
+            'staff_id': self.staff.id,
+            'assignments': [
+                {'item_id': self.items[0].id},
+                {'item_id': self.items[1].id, 'staff_id': self.other_staff.id, 'notes': 'Cohort'},
+                {'item_id': self.items[0].id},
+                {'item_id': self.item.id},
+                {'item_id': 99999, 'staff_id': 99999},
+                {'item_id': 'abc'},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 4))
+
+        results = response.data['results']
+        self.assertEqual([r['index'] for r in results], list(range(6)))
+        self.assertEqual(results[1]['staff_id'], self.other_staff.id)
+        self.assertIn('item_id', results[2]['errors'])
+        self.assertIn('item_id', results[3]['errors'])
+        self.assertEqual(set(results[4]['errors']), {'item_id', 'staff_id'})
+        self.assertIn('item_id', results[5]['errors'])
+
+        self.assertEqual(self._current(self.items[0]), results[0]['id'])
+        self.assertEqual(self._current(self.item), taken.id)
+        self.assertEqual(StaffItemAssignment.objects.get(pk=results[1]['id']).notes, 'Cohort')
+        self.assertEqual(diff_counters(), [])
+
+    def test_bulk_assign_query_count_is_constant(self):
+        # Creates the department's counter row
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+        for size in (5, 50):
+            items = [Item.objects.create(name=f"Cohort Laptop {size} {i}") for i in range(size)]
+            payload = {
+                'staff_id': self.staff.id,
+                'assignments': [{'item_id': item.id} for item in items],
+            }
+            # Token, items, staff, existing pairs, insert, pointers, two
+            # counter updates, and two savepoints with their releases
+            with self.assertNumQueries(12):
+                response = self.client.post('/api/assignments/bulk-assign/', payload, format='json')
+            self.assertEqual(response.data['created'], size)
+
+    def test_bulk_return_by_assignment_and_item(self):
+        first = StaffItemAssignment.objects.create(staff=self.staff, item=self.items[0])
+        second = StaffItemAssignment.objects.create(staff=self.other_staff, item=self.items[1])
+        response = self.client.post('/api/assignments/bulk-return/', {
+            'assignment_ids': [first.id, 99999],
+            'item_ids': [self.items[1].id, self.items[2].id],
+            'return_date': '2030-01-01',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['returned'], response.data['failed']), (2, 2))
+        self.assertEqual(response.data['results'][2]['id'], second.id)
+        self.assertIn('errors', response.data['results'][1])
+        self.assertIn('errors', response.data['results'][3])
+
+        first.refresh_from_db()
+        self.assertEqual(first.return_date, date(2030, 1, 1))
+        self.assertIsNone(self._current(self.items[0]))
+        self.assertIsNone(self._current(self.items[1]))
+        self.assertEqual(diff_counters(), [])
+
+        # Returning again is reported, not applied twice
+        response = self.client.post('/api/assignments/bulk-return/', {
+            'assignment_ids': [first.id],
+        }, format='json')
+        self.assertEqual(response.data['returned'], 0)
+        self.assertEqual(diff_counters(), [])
+
+    def test_bulk_return_rejects_dates_before_assignment(self):
+        assignment = StaffItemAssignment.objects.create(staff=self.staff, item=self.items[0])
+        response = self.client.post('/api/assignments/bulk-return/', {
+            'assignment_ids': [assignment.id], 'return_date': '2000-01-01',
+        }, format='json')
+        self.assertIn('return_date', response.data['results'][0]['errors'])
+        self.assertEqual(self._current(self.items[0]), assignment.id)
+
+    def test_bulk_requests_are_validated(self):
+        response = self.client.post('/api/assignments/bulk-assign/', {'assignments': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/assignments/bulk-return/', {
+            'item_ids': [self.item.id], 'return_date': 'soon',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_actions_are_admin_only(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        for url in ('/api/assignments/bulk-assign/', '/api/assignments/bulk-return/'):
+            response = self.client.post(url, {}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BulkChangeTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        self.other_category = Category.objects.create(name="Other Category")
+        self.items = [
+            Item.objects.create(name=f"Laptop {i}", category=self.category, purchase_price=Decimal('100.00'))
+            for i in range(3)
+        ]
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.items[0])
+
+    def test_bulk_update_items_by_id(self):
+        ids = [self.items[0].id, self.items[1].id, 99999]
+        response = self.client.patch('/api/items/', {
+            'ids': ids, 'changes': {'category_id': self.other_category.id, 'notes': 'Moved'},
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['updated'], response.data['missing']), (2, [99999]))
+        self.assertEqual(
+            Item.objects.filter(category=self.other_category, notes='Moved').count(), 2
+        )
+        self.assertEqual(diff_counters(), [])
+
+    def test_bulk_update_items_by_filter(self):
+        response = self.client.patch('/api/items/?status=available&max_price=150', {
+            'changes': {'purchase_price': '120.00'},
+        }, format='json')
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(Item.objects.filter(purchase_price=Decimal('120.00')).count(), 2)
+
+    def test_bulk_update_is_validated(self):
+        for payload in (
+            {'ids': [self.item.id], 'changes': {}},
+            {'ids': [self.item.id], 'changes': {'purchase_price': '-1'}},
+            {'ids': [self.item.id], 'changes': {'serial_number': 'SN-1'}},
+            {'ids': 'all', 'changes': {'notes': 'x'}},
+            # Neither ids nor a filter
+            {'changes': {'notes': 'x'}},
+        ):
+            response = self.client.patch('/api/items/?page=1', payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, payload)
+        self.assertFalse(Item.objects.filter(notes='x').exists())
+
+    def test_raw_delete_batches_materialized_ids(self):
+        extra = [Supplier.objects.create(name=f"Supplier {i}").pk for i in range(3)]
+        with CaptureQueriesContext(connection) as queries:
+            deleted = raw_delete(Supplier.objects.filter(pk__in=extra), batch_size=2)
+        self.assertEqual(deleted, 3)
+        self.assertFalse(Supplier.objects.filter(pk__in=extra).exists())
+        deletes = [query['sql'] for query in queries if query['sql'].startswith('DELETE')]
+        # No DELETE reads its own table in a subquery, which MySQL rejects
+        self.assertEqual(len(deletes), 2)
+        self.assertFalse(any('SELECT' in sql for sql in deletes))
+
+    def test_bulk_delete_items_with_assignments(self):
+        response = self.client.delete(
+            f'/api/items/?category={self.category.id}&status=assigned', format='json'
+        )
+        self.assertEqual(response.data['deleted'], 1)
+        self.assertFalse(Item.objects.filter(pk=self.items[0].pk).exists())
+        self.assertFalse(StaffItemAssignment.objects.exists())
+        self.assertEqual(Item.objects.count(), 3)
+        self.assertEqual(diff_counters(), [])
+
+    def test_default_bulk_destroy_deletes_with_signals(self):
+        queryset = Item.objects.filter(pk__in=[self.items[0].pk, self.items[1].pk])
+        with transaction.atomic():
+            deleted = BulkUpdateDestroyMixin().perform_bulk_destroy(queryset)
+        self.assertEqual(deleted, 2)
+        self.assertFalse(StaffItemAssignment.objects.exists())
+        self.assertEqual(diff_counters(), [])
+
+    def test_bulk_delete_categories_and_suppliers(self):
+        response = self.client.delete('/api/categories/', {
+            'ids': [self.category.id, self.other_category.id],
+        }, format='json')
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertEqual(Item.objects.filter(category__isnull=True).count(), 4)
+        self.assertEqual(diff_counters(), [])
+
+        response = self.client.delete('/api/suppliers/', {'ids': [self.supplier.id]}, format='json')
+        self.assertEqual(response.data['deleted'], 1)
+        self.item.refresh_from_db()
+        self.assertIsNone(self.item.supplier_id)
+
+    def test_bulk_update_rejects_unique_names(self):
+        response = self.client.patch('/api/categories/', {
+            'ids': [self.category.id], 'changes': {'name': 'Renamed'},
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch('/api/suppliers/', {
+            'ids': [self.supplier.id], 'changes': {'contact_info': 'sales@test.com'},
+        }, format='json')
+        self.assertEqual(response.data['updated'], 1)
+
+    def test_bulk_changes_are_admin_only(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        response = self.client.patch('/api/items/', {'ids': [self.item.id], 'changes': {'notes': 'x'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.delete('/api/items/', {'ids': [self.item.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SparseFieldsetTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        self.item.notes = "Long notes"
+        self.item.tag_number = "TAG-1"
+        self.item.save()
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+
+    def test_fields_shrink_items_and_collapse_relations(self):
+        response = self.client.get('/api/items/?fields=id,name,category')
+        row = response.data['results'][0]
+        self.assertEqual(row, {'id': self.item.id, 'name': "Test Item", 'category': self.category.id})
+
+    def test_expand_renders_nested_object(self):
+        response = self.client.get(f'/api/items/{self.item.id}/?fields=id,tag_number&expand=supplier')
+        self.assertEqual(set(response.data), {'id', 'tag_number', 'supplier'})
+        self.assertEqual(response.data['supplier']['name'], "Test Supplier")
+
+    def test_dotted_fields_select_inside_nested_objects(self):
+        response = self.client.get('/api/assignments/?fields=id,staff,item.name,item.category.name')
+        row = response.data['results'][0]
+        self.assertEqual(row['staff'], self.staff.id)
+        self.assertEqual(row['item'], {'name': "Test Item", 'category': {'name': "Test Category"}})
+
+    def test_fields_are_pushed_down_to_the_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/items/?fields=id,name')
+        sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"notes"', sql)
+        self.assertNotIn('"api_category"', sql)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/assignments/?fields=id,item.name&pagination=cursor')
+        sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"api_staff"', sql)
+        self.assertNotIn('"notes"', sql)
+
+    def test_cursor_pagination_keeps_query_count_with_sparse_fields(self):
+        Item.objects.create(name="Second Item")
+        # Token lookup, validators and page rows; the cursor key is loaded
+        # with the page
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/items/?fields=id&pagination=cursor&page_size=1')
+        self.assertIsNotNone(response.data['next'])
+
+    def test_plain_viewsets_accept_fields(self):
+        response = self.client.get('/api/categories/?fields=id,name')
+        self.assertEqual(response.data['results'][0], {'id': self.category.id, 'name': "Test Category"})
+        response = self.client.get('/api/staff/?fields=email')
+        self.assertEqual(response.data['results'][0], {'email': "staff@test.com"})
+
+    def test_unknown_fields_are_rejected(self):
+        for query in ('fields=id,colour', 'fields=id,item.colour', 'expand=name'):
+            response = self.client.get(f'/api/assignments/?{query}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+    def test_writes_ignore_fieldsets(self):
+        response = self.client.patch(f'/api/items/{self.item.id}/?fields=id', {'model': 'X1'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('name', response.data)
+
+
+@override_settings(CACHE_SHARED=True)
+class ConditionalGetTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+
+    def test_list_answers_304_without_touching_the_database(self):
+        first = self.client.get('/api/items/')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn('no-cache', first['Cache-Control'])
+        # Only the token lookup remains
+        with self.assertNumQueries(1):
+            second = self.client.get('/api/items/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second.content, b'')
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_writes_change_the_etag(self):
+        etag = self.client.get('/api/items/')['ETag']
+        # A nested category and the assignment pointer both show in items
+        self.category.name = "Renamed"
+        self.category.save()
+        response = self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response['ETag']
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+        response = self.client.get('/api/items/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_query_user_and_format(self):
+        etag = self.client.get(f'/api/items/{self.item.id}/')['ETag']
+        self.assertEqual(
+            self.client.get(f'/api/items/{self.item.id}/', HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        for url in (f'/api/items/{self.item.id}/?fields=id', f'/api/items/{self.item.id}/?format=api'):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        response = self.client.get(f'/api/items/{self.item.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_last_modified_once_its_second_is_over(self):
+        response = self.client.get('/api/categories/')
+        self.assertNotIn('Last-Modified', response)
+        with mock.patch('api.conditional.time.time', return_value=time.time() + 5):
+            response = self.client.get('/api/categories/')
+            last_modified = response['Last-Modified']
+            response = self.client.get('/api/categories/', HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            Category.objects.create(name="Fresh Category")
+            response = self.client.get('/api/categories/', HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_dashboard_and_errors(self):
+        etag = self.client.get('/api/dashboard/stats')['ETag']
+        response = self.client.get('/api/dashboard/stats', HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        # Only successful reads carry validators
+        response = self.client.get('/api/items/99999/')
+        self.assertNotIn('ETag', response)
+        response = self.client.patch(f'/api/items/{self.item.id}/', {'model': 'X1'}, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+
+@override_settings(CACHE_SHARED=False)
+class DatabaseConditionalGetTestCase(BaseAPITestCase):
+    """
+    Without a shared cache the validators come from updated_at and row
+    counts, so they also see writes made by other processes.
+    """
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+
+    def assertChanged(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        return response['ETag']
+
+    def assertNotModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, url)
+
+    def test_list_follows_edits_and_deletes(self):
+        first = self.client.get('/api/items/')
+        self.assertNotIn('Last-Modified', first)
+        self.assertIn('no-cache', first['Cache-Control'])
+        etag = first['ETag']
+        self.assertNotModified('/api/items/', etag)
+
+        # Writes that bypass the version tokens still move updated_at
+        Item.objects.filter(pk=self.item.pk).update(name="Renamed", updated_at=timezone.now())
+        etag = self.assertChanged('/api/items/', etag)
+        self.category.name = "Renamed"
+        self.category.save()
+        etag = self.assertChanged('/api/items/', etag)
+        # A delete leaves the latest updated_at alone but not the count
+        older = Item.objects.create(name="Older Item")
+        Item.objects.filter(pk=older.pk).update(updated_at=older.created_at - timedelta(days=1))
+        etag = self.assertChanged('/api/items/', etag)
+        raw_delete(Item.objects.filter(pk=older.pk))
+        self.assertChanged('/api/items/', etag)
+
+    def test_filtered_list_only_follows_its_rows(self):
+        url = f'/api/items/?category={self.category.id}'
+        etag = self.client.get(url)['ETag']
+        Item.objects.create(name="Uncategorized")
+        self.assertNotModified(url, etag)
+        Item.objects.create(name="Categorized", category=self.category)
+        self.assertChanged(url, etag)
+        for url in ('/api/items/?search=Categorized', '/api/items/?pagination=cursor'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertNotModified(url, response['ETag'])
+
+    def test_retrieve_follows_its_object(self):
+        url = f'/api/items/{self.item.id}/'
+        etag = self.client.get(url)['ETag']
+        Item.objects.create(name="Another Item")
+        self.assertNotModified(url, etag)
+        self.item.notes = "Dented"
+        self.item.save()
+        etag = self.assertChanged(url, etag)
+        # Assignments show through current_assignment
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+        self.assertChanged(url, etag)
+        self.assertNotIn('ETag', self.client.get('/api/items/99999/'))
+        self.assertNotIn('ETag', self.client.get('/api/items/abc/'))
+
+    def test_per_user_rows(self):
+        Staff.objects.filter(pk=self.staff.pk).update(email=self.regular_user.email)
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        etag = self.client.get('/api/assignments/')['ETag']
+        other = Staff.objects.create(name="Other", email="other@test.com")
+        StaffItemAssignment.objects.create(
+            staff=other, item=Item.objects.create(name="Other Item"),
+        )
+        # Another user's assignment is not among the rendered rows, but its
+        # staff and item tables changed
+        etag = self.assertChanged('/api/assignments/', etag)
+        self.assertNotModified('/api/assignments/', etag)
+
+    def test_dashboard(self):
+        etag = self.client.get('/api/dashboard/stats')['ETag']
+        self.assertNotModified('/api/dashboard/stats', etag)
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+        self.assertChanged('/api/dashboard/stats', etag)
+
+    def test_models_without_updated_at_send_no_validators(self):
+        response = self.client.get('/api/users/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+        response = self.client.get('/api/users/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class FastListEquivalenceTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        other = Staff.objects.create(name="Ünïcode Staff", email="u@test.com", department="HR")
+        self.items = [
+            Item.objects.create(
+                name=f"Laptop {i}", category=self.category if i % 2 else None,
+                supplier=self.supplier if i % 3 else None, model="X1 — pro",
+                serial_number=f"SN-{i}", tag_number=f"TAG-{i}",
+                date_of_purchase=date(2024, 1, i + 1) if i % 2 else None,
+                purchase_price=Decimal('1299.9') if i % 2 else None,
+                notes="Line two" if i == 3 else None,
+            )
+            for i in range(7)
+        ]
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.items[1], notes="Loan")
+        StaffItemAssignment.objects.create(staff=other, item=self.items[2])
+        Staff.objects.filter(pk=other.pk).update(email="u@test.com")
+
+    def assertSameAsSerializer(self, url):
+        fast = self.client.get(url)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK, url)
+        for viewset in (ItemViewSet, StaffViewSet, StaffItemAssignmentViewSet):
+            viewset.fast_list = False
+        try:
+            slow = self.client.get(url)
+        finally:
+            for viewset in (ItemViewSet, StaffViewSet, StaffItemAssignmentViewSet):
+                del viewset.fast_list
+        self.assertEqual(fast.content, slow.content, url)
+        return fast
+
+    def test_item_lists_are_byte_identical(self):
+        for url in (
+            '/api/items/',
+            '/api/items/?page=1',
+            f'/api/items/?category={self.category.id}&status=available',
+            '/api/items/?search=laptop',
+            '/api/items/?fields=id,name,category,purchase_price',
+            '/api/items/?fields=id,tag_number&expand=category',
+        ):
+            self.assertSameAsSerializer(url)
+
+    @override_settings(TIME_ZONE='America/New_York')
+    def test_datetimes_follow_the_current_timezone(self):
+        response = self.assertSameAsSerializer('/api/assignments/')
+        self.assertTrue(response.data['results'][0]['item']['created_at'].endswith(('-04:00', '-05:00')))
+
+    def test_cursor_pages_are_byte_identical(self):
+        response = self.assertSameAsSerializer('/api/items/?pagination=cursor&page_size=3')
+        next_url = response.data['next']
+        response = self.assertSameAsSerializer(next_url)
+        self.assertSameAsSerializer(response.data['previous'])
+        self.assertSameAsSerializer('/api/assignments/?pagination=cursor&page_size=1')
+
+    def test_assignment_and_staff_lists_are_byte_identical(self):
+        self.assertSameAsSerializer('/api/assignments/')
+        self.assertSameAsSerializer('/api/assignments/?fields=id,item.name,item.category,staff')
+        self.assertSameAsSerializer('/api/staff/')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        self.regular_user.email = self.staff.email
+        self.regular_user.save()
+        response = self.assertSameAsSerializer('/api/assignments/')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_unsupported_serializers_are_reported(self):
+        class Computed(ItemSerializer):
+            label = serializers.SerializerMethodField()
+
+            def get_label(self, obj):
+                return obj.name
+
+            class Meta(ItemSerializer.Meta):
+                fields = ItemSerializer.Meta.fields + ['label']
+
+        with self.assertRaises(UnsupportedSerializer):
+            compile_row_mapper(Computed())
+        mapper = compile_row_mapper(StaffSerializer())
+        self.assertEqual(mapper.paths, ('id', 'name', 'email', 'department'))
+
+
+@override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=1.0, SQL_DUPLICATE_THRESHOLD=3)
+class SQLInstrumentationTestCase(BaseAPITestCase):
+    def test_server_timing_counts_request_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/items/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="%d queries"' % len(queries))
+        self.assertRegex(timing, r'app;dur=[\d.]+')
+        self.assertNotIn('db-dup', timing)
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user_token.key}')
+        response = self.client.get('/api/items/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_repeated_statements_are_flagged(self):
+        def n_plus_one(request):
+            for item in Item.objects.all():
+                Category.objects.filter(pk=item.category_id).first()
+            return HttpResponse('ok')
+
+        Item.objects.create(name="Second", category=self.category)
+        Item.objects.create(name="Third", category=self.category)
+        middleware = SQLInstrumentationMiddleware(n_plus_one)
+        with self.assertLogs('api.sql', 'WARNING') as logs:
+            response = middleware(RequestFactory().get('/api/items/'))
+
+        self.assertIn('db-dup;desc="1 statements repeated 3 times"', response['Server-Timing'])
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['queries'], 4)
+        self.assertEqual(line['path'], '/api/items/')
+        self.assertEqual(line['duplicates'][0]['count'], 3)
+        self.assertIn('api_category', line['duplicates'][0]['sql'])
+
+    def test_query_signature_collapses_parameter_lists(self):
+        self.assertEqual(
+            query_signature('SELECT 1 WHERE id IN (%s, %s, %s) AND x = %s'),
+            query_signature('SELECT 1 WHERE id IN (%s, %s) AND x = %s'),
+        )
+
+
+# Every statement counts as slow at this threshold
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0.0001, SLOW_QUERY_MAX_EXPLAINS=100,
+                   SLOW_QUERY_BUFFER_SIZE=100, SLOW_QUERY_CAPTURE_PARAMS=True)
+class SlowQueryLogTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        slow_query_log.clear()
+        self.addCleanup(slow_query_log.clear)
+        StaffItemAssignment.objects.create(staff=self.staff, item=self.item)
+
+    def get(self, url, token=None):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {(token or self.admin_token).key}')
+        with self.assertLogs('api.slow_queries', 'WARNING') as logs:
+            response = self.client.get(url)
+        return response, [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_captures_sql_params_view_and_plan(self):
+        response, logged = self.get('/api/assignments/?staff=%d' % self.staff.pk)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        entries = [e for e in slow_query_log.entries() if 'api_staffitemassignment' in e['sql']]
+        self.assertTrue(entries)
+        entry = entries[0]
+        self.assertEqual(entry['view'], 'StaffItemAssignmentViewSet.list')
+        self.assertEqual((entry['method'], entry['path']), ('GET', '/api/assignments/'))
+        self.assertEqual(entry['database'], connection.vendor)
+        self.assertIsNotNone(entry['params'])
+        self.assertGreaterEqual(entry['duration_ms'], 0)
+        # SQLite's EXPLAIN QUERY PLAN describes each table access
+        self.assertRegex(entry['plan'], r'SCAN|SEARCH')
+        # The log file gets the same entries
+        self.assertIn(entry, logged)
+
+    def test_writes_are_captured_without_a_plan(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        with self.assertLogs('api.slow_queries', 'WARNING'):
+            response = self.client.patch(f'/api/categories/{self.category.pk}/', {'name': 'Renamed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        update = next(e for e in slow_query_log.entries() if e['sql'].startswith('UPDATE'))
+        self.assertIsNone(update['plan'])
+        self.assertEqual(update['view'], 'CategoryViewSet.partial_update')
+
+    @override_settings(SLOW_QUERY_MAX_EXPLAINS=1, SLOW_QUERY_BUFFER_SIZE=2,
+                       SLOW_QUERY_CAPTURE_PARAMS=False)
+    def test_limits(self):
+        self.get('/api/assignments/')
+        entries = slow_query_log.entries()
+        self.assertEqual(len(entries), 2)
+        self.assertTrue(all(entry['params'] is None for entry in entries))
+        slow_query_log.clear()
+        _, logged = self.get('/api/items/')
+        self.assertEqual(sum(1 for entry in logged if entry['plan'] is not None), 1)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_disabled(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        self.client.get('/api/assignments/')
+        self.assertEqual(slow_query_log.entries(), [])
+
+    def test_endpoint_is_admin_only(self):
+        response, _ = self.get('/api/slow-queries/', token=self.user_token)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.get('/api/dashboard/stats')
+        response, _ = self.get('/api/slow-queries/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['threshold_ms'], 0.0001)
+        views = [entry['view'] for entry in response.data['entries']]
+        self.assertIn('dashboard_stats.get', views)
+        # Newest first
+        times = [entry['time'] for entry in response.data['entries']]
+        self.assertEqual(times, sorted(times, reverse=True))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        with self.assertLogs('api.slow_queries', 'WARNING'):
+            self.assertEqual(self.client.delete('/api/slow-queries/').status_code,
+                             status.HTTP_204_NO_CONTENT)
+        self.assertEqual(slow_query_log.entries(), [])
@@ -1,17 +1,18 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     ItemViewSet, CategoryViewSet, SupplierViewSet,
-    StaffViewSet, StaffItemAssignmentViewSet,UserViewSet
+    StaffViewSet, StaffItemAssignmentViewSet,UserViewSet, dashboard_stats, metrics, slow_queries
 )
 
+from .routers import BulkRouter
 from .auth_views import (
     register, login, logout, password_reset_request, 
     password_reset_confirm, user_profile, login_view
 )
 
 # Create a router and register our viewsets
-router = DefaultRouter()
+router = BulkRouter()
 router.register(r'items', ItemViewSet)
 router.register(r'categories', CategoryViewSet)
 router.register(r'suppliers', SupplierViewSet)
@@ -20,11 +21,17 @@ router.register(r'assignments', StaffItemAssignmentViewSet)
 router.register(r'users', UserViewSet)
 
 urlpatterns = [
+    # The frontend posts imports without a trailing slash
+    path('items/import', ItemViewSet.as_view({'post': 'import_items'}), name='item-import-noslash'),
     path('', include(router.urls)),  # all routes go under /api/
     path('dashboard/stats', dashboard_stats, name='dashboard_stats'),
+    path('metrics', metrics, name='metrics'),
+    path('slow-queries/', slow_queries, name='slow_queries'),
     # Authentication endpoints
     path('auth/register/', register, name='register'),
     path('auth/login/', login, name='login'),
+    path('auth/jwt/login/', login_view, name='jwt_login'),
+    path('auth/jwt/refresh/', TokenRefreshView.as_view(), name='jwt_refresh'),
     path('auth/logout/', logout, name='logout'),
     path('auth/password-reset/', password_reset_request, name='password_reset_request'),
     path('auth/password-reset-confirm/', password_reset_confirm, name='password_reset_confirm'),
@@ -1,48 +1,160 @@
 # inventory_management/backend/api/views.py
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
-from .models import Item, Category, Supplier, Staff, StaffItemAssignment
+from .models import Item, Category, Supplier, Staff, StaffItemAssignment, DashboardCounter
 from .serializers import (
     ItemSerializer, CategorySerializer, SupplierSerializer,
     StaffSerializer, StaffItemAssignmentSerializer,UserSerializer
 )
 from .permissions import IsAdminOrReadOnly, IsAdminUser, IsStaffAssignmentOwnerOrAdmin,IsOwnerOrAdmin
+from .querysets import eager_load
+from .pagination import KeysetPaginationMixin
+from .fieldsets import SparseFieldsetMixin
+from .fastpath import FastListMixin
+from .importers import ItemCSVImporter, ImportFormatError
+from .bulk import (
+    BulkAssigner, BulkReturner, BulkRequestError, BulkUpdateDestroyMixin,
+    delete_categories, delete_items, delete_suppliers, update_items,
+)
+from .exporters import streaming_export, ITEM_EXPORT_COLUMNS, ASSIGNMENT_EXPORT_COLUMNS
+from .renderers import CSVRenderer, NDJSONRenderer
+from .counters import read_dashboard_counters
+from .cache import cached_response
+from .conditional import ConditionalGetMixin, conditional_response
+from .filters import ItemFilter, ItemSearchFilter
+from .identity import request_staff_id
+from .metrics import registry
+from .slowqueries import slow_query_log
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from django.db.models import Count
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.parsers import FormParser, MultiPartParser
 from datetime import datetime, timezone as dt_timezone
 from django.utils import timezone
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(BulkUpdateDestroyMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     Provides all CRUD operations for the Category model.
     Only admins can create/update/delete, authenticated users can read.
+    PATCH/DELETE on the list update or delete many categories by id.
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
+    conditional_models = (Category,)
+
+    def get_queryset(self):
+        return self.eager_load_fieldset(super().get_queryset())
+
+    def perform_bulk_destroy(self, queryset):
+        return delete_categories(queryset)
 
-class SupplierViewSet(viewsets.ModelViewSet):
+    @cached_response(Category)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+class SupplierViewSet(BulkUpdateDestroyMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     Provides all CRUD operations for the Supplier model.
     Only admins can create/update/delete, authenticated users can read.
+    PATCH/DELETE on the list update or delete many suppliers by id.
     """
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
     permission_classes = [IsAdminOrReadOnly]
+    conditional_models = (Supplier,)
+
+    def get_queryset(self):
+        return self.eager_load_fieldset(super().get_queryset())
 
-class ItemViewSet(viewsets.ModelViewSet):
+    def perform_bulk_destroy(self, queryset):
+        return delete_suppliers(queryset)
+
+    @cached_response(Supplier)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+class ItemViewSet(BulkUpdateDestroyMixin, ConditionalGetMixin, SparseFieldsetMixin, FastListMixin, KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     Provides all CRUD operations for the Item model.
     Only admins can create/update/delete, authenticated users can read.
+    Pass ?pagination=cursor for keyset pagination on (created_at, id),
+    ?search= for ranked full-text search, and the filters documented on
+    ItemFilter (category, supplier, purchase date, price, status), and
+    ?fields= / ?expand= to choose the rendered fields (SparseFieldsetMixin).
+    Lists are built from .values() rows (FastListMixin).
+    PATCH/DELETE on the list update or delete every item matching "ids"
+    and/or those filters.
     """
     queryset = Item.objects.all()
     serializer_class = ItemSerializer
     permission_classes = [IsAdminOrReadOnly]
+    # Item.current_assignment follows assignment writes
+    conditional_models = (Item, Category, Supplier, StaffItemAssignment)
+    filter_backends = [ItemFilter, ItemSearchFilter]
+    keyset_ordering = ('-created_at', '-id')
+    # Writes get full instances: save() and the signal receivers read
+    # columns the serializer may not render
+    eager_load_actions = ('list', 'retrieve', 'export')
+
+    def get_queryset(self):
+        """
+        For reads, join category and supplier up front and load only the
+        columns the serializer renders, so a page costs the same number of
+        queries whatever its size.
+        """
+        queryset = super().get_queryset()
+        if self.action not in self.eager_load_actions:
+            return queryset
+        return eager_load(queryset, self.get_serializer(), keep=['created_at'])
+
+    def perform_bulk_update(self, queryset, values):
+        return update_items(queryset, values)
+
+    def perform_bulk_destroy(self, queryset):
+        return delete_items(queryset)
+
+    @action(detail=False, methods=['post'], url_path='import',
+            parser_classes=[MultiPartParser, FormParser])
+    def import_items(self, request):
+        """
+        Bulk-create items from an uploaded CSV file (multipart field `file`).
+        Columns: name, model, serial_number, tag_number, date_of_purchase,
+        purchase_price, notes, category, supplier (category and supplier by
+        name). Returns counts and a per-row error report. If the file stops
+        decoding or parsing partway through, the rows before it are kept and
+        `aborted` gives the line and error it stopped at.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({
+                'error': 'A CSV file is required in the "file" field'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = ItemCSVImporter().run(upload)
+        except ImportFormatError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_status = status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK
+        return Response(report, status=response_status)
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """
+        Stream every item matching the list filters as CSV (default) or
+        NDJSON (?format=ndjson or Accept: application/x-ndjson).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_export(
+            queryset, ITEM_EXPORT_COLUMNS, request.accepted_renderer.format, 'items'
+        )
 
 # New viewsets for staff and item assignments
-class StaffViewSet(viewsets.ModelViewSet):
+class StaffViewSet(ConditionalGetMixin, SparseFieldsetMixin, FastListMixin, viewsets.ModelViewSet):
     """
     Provides all CRUD operations for the Staff model.
     Only admins can manage staff records.
@@ -50,36 +162,92 @@ class StaffViewSet(viewsets.ModelViewSet):
     queryset = Staff.objects.all()
     serializer_class = StaffSerializer
     permission_classes = [IsAdminUser]
+    conditional_models = (Staff,)
+
+    def get_queryset(self):
+        return self.eager_load_fieldset(super().get_queryset())
 
-class StaffItemAssignmentViewSet(viewsets.ModelViewSet):
+class StaffItemAssignmentViewSet(ConditionalGetMixin, SparseFieldsetMixin, FastListMixin, KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     Provides all CRUD operations for the StaffItemAssignment model.
     Staff can view their own assignments, admins can manage all.
+    Pass ?pagination=cursor for keyset pagination on (assigned_date, id),
+    and ?fields= / ?expand= to choose the rendered fields.
     """
     queryset = StaffItemAssignment.objects.all()
     serializer_class = StaffItemAssignmentSerializer
     permission_classes = [IsStaffAssignmentOwnerOrAdmin]
+    conditional_models = (StaffItemAssignment, Staff, Item, Category, Supplier)
+    keyset_ordering = ('-assigned_date', '-id')
+    # Writes get full instances: a deferred updated_at is never saved, and
+    # the delete signals read return_date
+    eager_load_actions = ('list', 'retrieve', 'export')
     
     def get_queryset(self):
         """
         Filter assignments based on user role.
+        For reads, staff, item and the item's category and supplier are
+        joined in the same query, so a page loads in a fixed number of
+        queries.
         """
         queryset = StaffItemAssignment.objects.all()
+        if self.action in self.eager_load_actions:
+            queryset = eager_load(queryset, self.get_serializer(), keep=['assigned_date'])
         
         # If user is admin, return all assignments
         if self.request.user.is_staff:
             return queryset
         
         # If regular user, only return their assignments
-        try:
-            staff = Staff.objects.get(email=self.request.user.email)
-            return queryset.filter(staff=staff)
-        except Staff.DoesNotExist:
+        staff_id = request_staff_id(self.request)
+        if staff_id is None:
             return queryset.none()
+        return queryset.filter(staff_id=staff_id)
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """
+        Stream every assignment visible to the user as CSV (default) or
+        NDJSON (?format=ndjson or Accept: application/x-ndjson).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_export(
+            queryset, ASSIGNMENT_EXPORT_COLUMNS, request.accepted_renderer.format, 'assignments'
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-assign',
+            permission_classes=[IsAdminUser])
+    def bulk_assign(self, request):
+        """
+        Assign many items at once. Body: {"assignments": [{"item_id",
+        "staff_id", "notes"}, ...]}, with an optional top-level "staff_id"
+        for entries that omit theirs. Returns counts and per-entry results.
+        """
+        try:
+            report = BulkAssigner().run(request.data)
+        except BulkRequestError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_status = status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK
+        return Response(report, status=response_status)
+
+    @action(detail=False, methods=['post'], url_path='bulk-return',
+            permission_classes=[IsAdminUser])
+    def bulk_return(self, request):
+        """
+        Return many assignments at once, named by "assignment_ids" and/or
+        "item_ids", on "return_date" (default today). Returns counts and
+        per-entry results.
+        """
+        try:
+            report = BulkReturner().run(request.data)
+        except BulkRequestError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
 
 # user_views.py
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     Provides CRUD operations for the User model.
     Users can edit their own profile, admins can manage all users.
@@ -87,6 +255,10 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsOwnerOrAdmin]
+    conditional_models = (User,)
+
+    def get_queryset(self):
+        return self.eager_load_fieldset(super().get_queryset())
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -105,10 +277,14 @@ class UserViewSet(viewsets.ModelViewSet):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_response(Item, Category, Staff, StaffItemAssignment)
+@cached_response(Item, Category, Staff, StaffItemAssignment)
 def dashboard_stats(request):
     """
     Returns aggregated statistics for the dashboard.
     Accepts optional ISO date params: startDate, endDate
+    Reads the dashboard counters, the category names and the recent
+    activity: three queries whatever the size of the inventory.
     """
     def parse_iso(dt_str):
       try:
@@ -127,8 +303,6 @@ def dashboard_stats(request):
     start_dt = parse_iso(request.query_params.get('startDate'))
     end_dt = parse_iso(request.query_params.get('endDate'))
 
-    items_qs = Item.objects.all()
-    staff_qs = Staff.objects.all()
     assignments_qs = StaffItemAssignment.objects.all()
 
     if start_dt and end_dt:
@@ -138,24 +312,26 @@ def dashboard_stats(request):
     elif end_dt:
         assignments_qs = assignments_qs.filter(created_at__lte=end_dt)
 
-    total_items = items_qs.count()
-    current_assigned = StaffItemAssignment.objects.filter(return_date__isnull=True).count()
+    # Totals and breakdowns come from the incrementally maintained counters
+    # (see counters.py), so no item or assignment rows are scanned here.
+    totals, category_counts, assignments_by_department = read_dashboard_counters()
+    total_items = totals.get(DashboardCounter.TOTAL_ITEMS, 0)
+    current_assigned = totals.get(DashboardCounter.ASSIGNED_ITEMS, 0)
     available_items = max(total_items - current_assigned, 0)
-    total_staff = staff_qs.count()
+    total_staff = totals.get(DashboardCounter.TOTAL_STAFF, 0)
 
-    items_by_category_qs = Item.objects.values('category__name').annotate(count=Count('id'))
+    category_names = dict(Category.objects.values_list('id', 'name'))
     items_by_category = {}
-    for row in items_by_category_qs:
-        key = row['category__name'] or 'Uncategorized'
-        items_by_category[key] = row['count']
+    for key, count in category_counts.items():
+        name = category_names.get(int(key)) if key else None
+        label = name or 'Uncategorized'
+        items_by_category[label] = items_by_category.get(label, 0) + count
 
-    assignments_by_dept_qs = StaffItemAssignment.objects.filter(return_date__isnull=True).values('staff__department').annotate(count=Count('id'))
-    assignments_by_department = {}
-    for row in assignments_by_dept_qs:
-        key = row['staff__department'] or 'Unknown'
-        assignments_by_department[key] = row['count']
-
-    recent_qs = assignments_qs.select_related('item', 'staff').order_by('-created_at')[:10]
+    recent_qs = (
+        assignments_qs.select_related('item', 'staff')
+        .only('id', 'created_at', 'item__name', 'staff__name')
+        .order_by('-created_at')[:10]
+    )
     recent_activity = [
         {
             'id': a.id,
@@ -174,3 +350,39 @@ def dashboard_stats(request):
         'itemsByCategory': items_by_category,
         'assignmentsByDepartment': assignments_by_department,
     })
+
+
+def metrics(request):
+    """
+    Request, latency, query, authentication, cache and pagination metrics
+    in the Prometheus text format, summed over every worker process (see
+    api.metrics). A plain Django view, so DRF authentication does not try
+    to read the scraper's bearer token as a JWT.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.headers.get('Authorization', '')
+    allowed = (
+        settings.DEBUG
+        or (token and constant_time_compare(header, f'Bearer {token}'))
+        or request.user.is_staff
+    )
+    if not allowed:
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def slow_queries(request):
+    """
+    The slow queries this worker process captured, newest first, with
+    their parameters, view and EXPLAIN plan; DELETE empties the buffer.
+    logs/slow_queries.log has the entries of every process.
+    """
+    if request.method == 'DELETE':
+        slow_query_log.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({
+        'threshold_ms': settings.SLOW_QUERY_THRESHOLD_MS,
+        'entries': slow_query_log.entries(),
+    })
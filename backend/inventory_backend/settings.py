@@ -65,6 +65,12 @@ except ImportError:
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Must be at the top
     'django.middleware.security.SecurityMiddleware',
+    # Request metrics for /api/metrics; see METRICS_DIR
+    'api.middleware.MetricsMiddleware',
+    # Query counts and timings for sampled requests; see SQL_INSTRUMENTATION_SAMPLE_RATE
+    'api.middleware.SQLInstrumentationMiddleware',
+    # Slow statements and their plans; see SLOW_QUERY_THRESHOLD_MS
+    'api.middleware.SlowQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -120,6 +126,83 @@ DATABASES = {
 }
 
 
+# Cache configuration
+# Redis in docker-compose.yml. CACHE_BACKEND=file shares the cache between
+# worker processes on one host through a directory; locmem (the default for
+# development) is private to each process.
+cache_backend = os.getenv('CACHE_BACKEND', 'locmem')
+
+if cache_backend == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+        }
+    }
+elif cache_backend == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', 'inventory'),
+        }
+    }
+
+# Whether every worker process sees the same cache. Writes invalidate cached
+# data by bumping version tokens in the cache, which a per-process cache
+# keeps from the other workers, so response caching and the token cache are
+# off without one, and ETags are computed from the database instead.
+# Set CACHE_SHARED=True for locmem when a single process serves the API.
+CACHE_SHARED = os.getenv('CACHE_SHARED', str(cache_backend != 'locmem')).lower() == 'true'
+
+# Seconds a cached API response may live; model version counters make
+# entries unreachable as soon as their data changes.
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+
+# Fraction of requests whose SQL is counted and timed, reported in
+# Server-Timing headers and on the api.sql logger; 0 turns it off.
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(
+    os.getenv('SQL_INSTRUMENTATION_SAMPLE_RATE', '1.0' if DEBUG else '0.05')
+)
+# A statement run this many times in one request is logged as a likely N+1
+SQL_DUPLICATE_THRESHOLD = int(os.getenv('SQL_DUPLICATE_THRESHOLD', '3'))
+
+# Metrics served at /api/metrics. Each worker process writes its values to
+# METRICS_DIR every METRICS_FLUSH_INTERVAL seconds so any worker can answer
+# for all of them; without it a scrape only sees the worker it reaches.
+# Scrapers send "Authorization: Bearer <METRICS_TOKEN>"; with DEBUG, or for
+# staff sessions, no token is needed.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '1.0'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Statements taking this many milliseconds or more are kept with their
+# EXPLAIN plan in a per-process ring buffer (GET /api/slow-queries/, admins
+# only) and logged to logs/slow_queries.log; 0 turns it off. Parameters can
+# hold tokens or personal data, so they can be left out.
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv('SLOW_QUERY_BUFFER_SIZE', '100'))
+SLOW_QUERY_MAX_EXPLAINS = int(os.getenv('SLOW_QUERY_MAX_EXPLAINS', '3'))
+SLOW_QUERY_CAPTURE_PARAMS = os.getenv('SLOW_QUERY_CAPTURE_PARAMS', 'True').lower() == 'true'
+
+# Seconds to remember which Staff record a user's email maps to across
+# requests (0 resolves it once per request). Staff writes invalidate it;
+# ignored without CACHE_SHARED.
+STAFF_LOOKUP_CACHE_TIMEOUT = int(os.getenv('STAFF_LOOKUP_CACHE_TIMEOUT', '0'))
+
+# Per-process LRU of authenticated API tokens (0 disables it). Logout and
+# user changes invalidate entries early through the cache, so it is only
+# used with CACHE_SHARED.
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', '300'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -176,9 +259,11 @@ CORS_ALLOW_CREDENTIALS = True
 # Django REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Bearer tokens from /api/auth/jwt/login/ authenticate from their
+        # claims alone; see api.authentication.ClaimsUser
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -186,8 +271,26 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'EXCEPTION_HANDLER': 'api.exceptions.custom_exception_handler',
+    # orjson-backed JSON when orjson is installed, DRF's own otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# MessagePack bodies and responses (Accept: application/msgpack) if available
+try:
+    import msgpack
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('api.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('api.parsers.MessagePackParser')
+except ImportError:
+    pass
+
 # Add drf_spectacular schema class if available
 try:
     import drf_spectacular
@@ -254,6 +357,18 @@ if logs_dir.exists():
     LOGGING['root']['handlers'].append('file')
     LOGGING['loggers']['django']['handlers'].append('file')
     LOGGING['loggers']['api']['handlers'].append('file')
+    # One JSON object per line, for grepping and jq
+    LOGGING['formatters']['message'] = {'format': '{message}', 'style': '{'}
+    LOGGING['handlers']['slow_queries'] = {
+        'level': 'WARNING',
+        'class': 'logging.FileHandler',
+        'filename': logs_dir / 'slow_queries.log',
+        'formatter': 'message',
+    }
+    LOGGING['loggers']['api.slow_queries'] = {
+        'handlers': ['slow_queries'],
+        'level': 'WARNING',
+    }
 
 # JWT Settings
 from datetime import timedelta
@@ -277,4 +392,7 @@ SIMPLE_JWT = {
 
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_USER_CLASS': 'api.authentication.ClaimsUser',
+    # Rebuilds the claims above from the current user row on refresh
+    'TOKEN_REFRESH_SERIALIZER': 'api.authentication.ClaimsTokenRefreshSerializer',
 }
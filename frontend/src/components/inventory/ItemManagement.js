@@ -122,8 +122,12 @@ const ItemManagement = () => {
         }
       });
 
-      setItems(prev => [...prev, ...response.data.items]);
-      Toast.success(`Imported ${response.data.items.length} items successfully`);
+      await fetchItems();
+      if (response.data.failed > 0) {
+        Toast.error(`Imported ${response.data.created} items, ${response.data.failed} rows failed`);
+      } else {
+        Toast.success(`Imported ${response.data.created} items successfully`);
+      }
     } catch (error) {
       Toast.error('Failed to import items');
     }